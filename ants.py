@@ -1,11 +1,13 @@
 """ File containing ant class, move one grid space per turn. """
 
 # imports
-import numpy as np
+import fidelity as fi
 import grid as g
+import sampling as sp
 
 ######## Global Variables ########
-from constants import DIRECTION_VECTORS, EXPLORER, FOLLOWER
+from constants import (EXPLORE, EXPLORER, FOLLOW_CONTINUE, FOLLOW_DROP,
+                       FOLLOWER)
 
 
 ######## Ant class ########
@@ -25,17 +27,25 @@ class Ant:
         p_straight: Float between 0 and 1 representing the probability that an
           exploratory ant will go forward rather than turn. Default is 0.509;
             decimal percentage to get to 1 after summing all B kernels.
-        on_grid
+        on_grid: Bool, False once the ant crosses the grid boundary.
+        turn_kernel: TurnKernel of precomputed turn probabilities for B.
+        stream: RandomStream the ant draws its random numbers from. Default
+          is the shared sampling.DEFAULT_STREAM.
     """
 
     def __init__(self, x:int = 128, y:int = 128,
                  B:tuple[float, float, float, float] =
-                 (0.360, 0.047, 0.008, 0.002))-> None:
+                 (0.360, 0.047, 0.008, 0.002),
+                 stream:sp.RandomStream | None = None,
+                 direction:int | None = None)-> None:
         self.x = x
         self.y = y
         self.B = B
         self.p_straight = 1-sum(B) # default 0.581
-        self.direction = np.random.randint(0, 8)
+        self.turn_kernel = sp.get_turn_kernel(tuple(B))
+        self.stream = sp.DEFAULT_STREAM if stream is None else stream
+        # random starting direction unless one is given, e.g. when restoring
+        self.direction = self.stream.integer(8) if direction is None else direction
         self.state = EXPLORER
         self.on_grid = True
 
@@ -101,14 +111,11 @@ class Ant:
               of 45 degree units to turn. If straight, the value is 0.
 
         """
-        # deciding whether to go straight or turn; if random float between 0
-        # and 1 is less than probability to go straight, ant will contine
-        # straight. If not, the ant turns; the amount is randomized form
+        # deciding whether to go straight or turn; one random float between 0
+        # and 1 is looked up in the turning kernel table, which holds the
+        # probability to go straight followed by the turn amounts from
         # turning kernel B.
-        if np.random.rand() < self.p_straight:
-            delta_turn = 0
-        else:
-            delta_turn = angle_of_turn(self.B)
+        delta_turn = self.turn_kernel.explorer_turn(self.stream.uniform())
         return delta_turn
 
     def explorer_turn(self)->int:
@@ -130,27 +137,6 @@ class Ant:
         return delta_turn
 
     ######## Follower Movement Determination ########
-    def _follower_pheromone_scan(self, direction_to_scan:int, grid:g.Grid,
-                                  x:int, y:int)->int:
-        """
-        Returns pheromone value of step in direction to scan.
-
-        Args:
-            direction_to_scan: Int representing direction of grid space where
-              ant may move on the next time step.
-            grid: Grid representing grid used in simulation.
-            x: ant's current x location on the grid.
-            y: ant's current y location on the grid.
-
-        Returns:
-            pheromone: Int representing pheromone level at grid space ant is
-              looking at in direction_to_scan.
-
-        """
-        dx, dy = DIRECTION_VECTORS[direction_to_scan]
-        pheromone = grid.get_pheromone_for_point(x + dx, y + dy)
-        return pheromone
-
     def follower_turn(self, grid:g.Grid)->int:
         """
         Function determines if follower ant will continue following path or
@@ -166,15 +152,9 @@ class Ant:
         """
         x, y = self.get_location()
 
-        forward = self.direction
-        left = (forward - 1) % 8 # grid space 7
-        right = (forward + 1) % 8 # grid space 1
-
         # check the values of 7 - 0 - 1, so grid values to left, forward, and
-        #  right
-        C_0 = self._follower_pheromone_scan(forward, grid, x, y)
-        C_1 = self._follower_pheromone_scan(right, grid, x, y)
-        C_7 = self._follower_pheromone_scan(left, grid, x, y)
+        #  right, read in one lookup from the grid's neighbor offset table
+        C_0, C_1, C_7 = grid.get_neighbor_pheromone(x, y, self.direction)
 
         # path determination based on concentrations in the top left
         #  (-45degree), forward (0 degree), and right (45degree) grid spaces
@@ -191,7 +171,8 @@ class Ant:
         return delta_turn
 
 
-    def update_direction(self, grid:g.Grid, fidelity:int)->None:
+    def update_direction(self, grid:g.Grid,
+                         fidelity:int | fi.FidelityTable)->str:
         """
         Function updates ant direction. Determines the new "forward" direction
           in terms of 45 degree turn units (0-7). Positive is clockwise.
@@ -208,19 +189,31 @@ class Ant:
         Args:
             grid: Grid object used in simulation.
             fidelity: Int representing the user input fidelity value.
-              Probability that the ant will stay on the path.
+              Probability that the ant will stay on the path. A FidelityTable
+              gives the fidelity for the concentration at the ant's location.
         
         Returns:
-            None
+            decision: String representing the path taken: EXPLORE for an
+              explorer turn, FOLLOW_CONTINUE for a follower staying on the
+              trail, FOLLOW_DROP for a follower that lost the trail.
 
         """
         # determine if new state is explorer or follower
+        if isinstance(fidelity, fi.FidelityTable):
+            fidelity = fidelity.fidelity_at(
+                grid.get_pheromone_for_point(self.x, self.y))
         new_state = self.determine_state(fidelity)
 
         if new_state == EXPLORER:
             delta_turn = self.explorer_turn()
+            decision = EXPLORE
         else:
             delta_turn = self.follower_turn(grid)
+            # follower_turn switches ants that lost the trail to explorer
+            if self.state == EXPLORER:
+                decision = FOLLOW_DROP
+            else:
+                decision = FOLLOW_CONTINUE
 
         # self.direction (0-7, according to 3x3 grid around ant) + delta_turn
         #  (-4:+4) can be from -4 to 11.
@@ -230,6 +223,7 @@ class Ant:
         new_direction = (self.direction + delta_turn) % 8
 
         self.set_direction(new_direction)
+        return decision
 
 
     def determine_state(self, fidelity:int)->str:
@@ -245,7 +239,7 @@ class Ant:
               follower
         
         """
-        if np.random.randint(0, 257) < fidelity: # if the ant is staying a follower, not inclusive of 257, 0-256
+        if self.stream.integer(257) < fidelity: # if the ant is staying a follower, not inclusive of 257, 0-256
             self.set_ant_state(FOLLOWER)
         else:
             self.set_ant_state(EXPLORER)
@@ -255,13 +249,16 @@ class Ant:
 
 ######## Turning angle function ants ########
 
-def angle_of_turn(B:tuple[float, float, float, float])->int:
+def angle_of_turn(B:tuple[float, float, float, float],
+                  stream:sp.RandomStream | None = None)->int:
     """
     Function generates a new turn angle with B kernel for an explorer ant's
       change in direction.
 
     Args:
         B: Tuple representing the turning kernels (B1, B2, B3, B4).
+        stream: RandomStream to draw from. Default is the shared
+          sampling.DEFAULT_STREAM.
     Returns:
         angle_amount * turn_direction: Int of value +/- 1, 2, 3, 4 representing
           the number of 45 degree units to turn, and in which direction.
@@ -269,16 +266,10 @@ def angle_of_turn(B:tuple[float, float, float, float])->int:
     """
 
     # use turning kernel B to randomize how many 45 degree directions the ant
-    #  turns
-    turn_angles = [1, 2, 3, 4] # each value represents turns in 45 degree increments; 0 is forward.
-
-    # modifying B so that values add up to 1 but probabilities are still
-    #  proportional:
-    B_adjusted = tuple(np.array(B, dtype=float) / sum(B))
-
-    angle_amount = np.random.choice(turn_angles, p = B_adjusted)
-
-    # randomize left or right, 50% chance each way
-    turn_direction = np.random.choice([-1, 1])
+    #  turns, and whether left or right (50% chance each way). The kernel
+    #  table is built once per B.
+    turn_kernel = sp.get_turn_kernel(tuple(B))
+    if stream is None:
+        stream = sp.DEFAULT_STREAM
 
-    return (angle_amount * turn_direction)
+    return turn_kernel.angle_of_turn(stream.uniform())
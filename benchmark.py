@@ -0,0 +1,291 @@
+""" Contains benchmark suite: times simulation steps across grid sizes, ant
+ counts and fidelity values, reports throughput, per-phase times and peak
+ memory, and compares results against a stored baseline. """
+
+# imports
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+import grid as g
+import population as p
+import profiling as pr
+import sampling as sp
+import simulation_setup as ss
+
+######## Global Variables ########
+from constants import STEP_PHASES
+
+# default benchmark values
+DEFAULT_GRID_SIZES = (256, 512, 1024, 2048, 4096)
+DEFAULT_NUM_ANTS = (0, 1000)
+DEFAULT_FIDELITIES = (255, 247)
+DEFAULT_ENGINES = ("object", "array")
+
+# configuration keys that identify a benchmark case
+CASE_KEYS = ("engine", "grid_size", "num_ants", "fidelity", "tau",
+             "num_steps", "sparse")
+
+
+######## Benchmark Cases ########
+def benchmark_cases(grid_sizes:list[int], num_ants:list[int],
+                    fidelities:list[int], engines:list[str], tau:int = 8,
+                    num_steps:int = 200, sparse:bool = False)->list[dict]:
+    """
+    Builds one benchmark case per combination of values.
+
+    Args:
+        grid_sizes: List of ints of grid sizes to time.
+        num_ants: List of ints of numbers of ants placed at the hill before
+          timing starts.
+        fidelities: List of ints of fidelity values to time.
+        engines: List of run_simulation engine names to time.
+        tau: Int representing "units" of pheromone ants deposit per step.
+        num_steps: Int representing number of timed steps per case.
+        sparse: Boolean to use sparse evaporation.
+
+    Returns:
+        cases: List of dicts with one value for each of CASE_KEYS.
+
+    """
+    cases = []
+    for engine, grid_size, ants, fidelity in itertools.product(
+            engines, grid_sizes, num_ants, fidelities):
+        cases.append({
+            "engine": engine,
+            "grid_size": grid_size,
+            "num_ants": ants,
+            "fidelity": fidelity,
+            "tau": tau,
+            "num_steps": num_steps,
+            "sparse": sparse,
+        })
+    return cases
+
+
+def case_key(case:dict)->str:
+    """Returns a string that identifies case, the same for equal cases."""
+    return json.dumps({key: case[key] for key in CASE_KEYS}, sort_keys=True)
+
+
+######## Timed Steps ########
+def _simulate(case:dict, seed:int,
+              profiler:pr.StepProfiler | None = None)->dict:
+    """Runs the timed steps of case through the simulation's own step
+      functions, returning total seconds and the number of ant moves. With
+      a profiler, its phase times are added up as well; profiled steps run
+      slower, so their totals are not comparable to unprofiled ones."""
+    stream = sp.make_stream(seed)
+    simulation_grid = g.Grid(case["grid_size"], sparse=case["sparse"])
+    hill_loc = simulation_grid.get_hill_loc()
+    if case["engine"] == "array":
+        ants_on_grid = p.AntPopulation(stream=stream)
+        ants_on_grid.add_ants(hill_loc, hill_loc, case["num_ants"])
+    else:
+        ants_on_grid = []
+        for _ in range(case["num_ants"]):
+            ss.add_ant(ants_on_grid, hill_loc, stream)
+
+    ant_moves = 0
+    start = time.perf_counter()
+    for _ in range(case["num_steps"]):
+        # every ant on the grid after spawning moves once
+        ant_moves += len(ants_on_grid) + 1
+        if case["engine"] == "array":
+            ss.population_step(ants_on_grid, simulation_grid,
+                               case["fidelity"], case["tau"],
+                               profiler=profiler)
+        else:
+            ss.simulation_step(ants_on_grid, simulation_grid,
+                               case["fidelity"], case["tau"], stream,
+                               profiler=profiler)
+    return {"seconds": time.perf_counter() - start, "ant_moves": ant_moves}
+
+
+######## Running ########
+def run_case(case:dict, repeats:int = 3, seed:int = 0,
+             measure_memory:bool = True)->dict:
+    """
+    Times one benchmark case, keeping the fastest of repeats unprofiled
+      runs. Phase times come from one extra profiled run and peak memory
+      from another, since profiling and tracing allocations both slow the
+      steps down.
+
+    Args:
+        case: Dict with one value for each of CASE_KEYS.
+        repeats: Int representing number of timed runs. Default 3.
+        seed: Int seeding every run, so repeats do the same work.
+        measure_memory: Boolean to measure peak traced memory. Default True.
+
+    Returns:
+        record: Dict of case, "steps_per_second", "ant_moves_per_second",
+          per-phase "phase_seconds" of the profiled run and
+          "peak_memory_bytes" (None when not measured).
+
+    """
+    best = min((_simulate(case, seed) for _ in range(max(repeats, 1))),
+               key=lambda run: run["seconds"])
+
+    profiler = pr.StepProfiler()
+    _simulate(case, seed, profiler)
+
+    peak_memory = None
+    if measure_memory:
+        tracemalloc.start()
+        _simulate(case, seed)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    record = dict(case)
+    record.update({
+        "seconds": best["seconds"],
+        "steps_per_second": case["num_steps"] / best["seconds"],
+        "ant_moves_per_second": best["ant_moves"] / best["seconds"],
+        "phase_seconds": dict(profiler.phase_seconds),
+        "peak_memory_bytes": peak_memory,
+    })
+    return record
+
+
+def run_benchmarks(cases:list[dict], repeats:int = 3,
+                   measure_memory:bool = True, verbose:bool = False)->dict:
+    """
+    Times every benchmark case.
+
+    Args:
+        cases: List of case dicts, see benchmark_cases.
+        repeats: Int representing number of timed runs per case.
+        measure_memory: Boolean to measure peak traced memory per case.
+        verbose: Boolean to print each result as it finishes.
+
+    Returns:
+        results: Dict with the Python, Numpy and platform versions under
+          "environment" and one record per case under "cases".
+
+    """
+    records = []
+    for case in cases:
+        record = run_case(case, repeats, measure_memory=measure_memory)
+        records.append(record)
+        if verbose:
+            print(format_record(record))
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "cases": records,
+    }
+
+
+######## Baseline Comparison ########
+def compare_to_baseline(results:dict, baseline:dict,
+                        threshold:float = 0.1)->list[dict]:
+    """
+    Finds cases that got slower than the baseline. Cases missing from
+      either results are skipped.
+
+    Args:
+        results: Dict returned by run_benchmarks.
+        baseline: Dict returned by an earlier run_benchmarks, e.g. loaded
+          from its JSON file.
+        threshold: Float representing the allowed fractional slowdown in
+          steps per second before a case counts as a regression. Default
+          0.1, i.e. 10%.
+
+    Returns:
+        regressions: List of dicts with the case "key", "baseline" and
+          "current" steps per second and fractional "slowdown".
+
+    """
+    if threshold < 0:
+        raise ValueError("Invalid threshold; threshold must not be negative.")
+    baseline_speeds = {case_key(record): record["steps_per_second"]
+                       for record in baseline["cases"]}
+    regressions = []
+    for record in results["cases"]:
+        key = case_key(record)
+        if key not in baseline_speeds:
+            continue
+        slowdown = 1 - record["steps_per_second"] / baseline_speeds[key]
+        if slowdown > threshold:
+            regressions.append({
+                "key": key,
+                "baseline": baseline_speeds[key],
+                "current": record["steps_per_second"],
+                "slowdown": slowdown,
+            })
+    return regressions
+
+
+def format_record(record:dict)->str:
+    """Formats one benchmark record as a line of text."""
+    phases = ", ".join(f"{phase} {record['phase_seconds'][phase]:.3f}s"
+                       for phase in STEP_PHASES)
+    memory = ""
+    if record["peak_memory_bytes"] is not None:
+        memory = f", peak {record['peak_memory_bytes'] / 2**20:.1f} MiB"
+    return (
+        f"{record['engine']:>6} grid {record['grid_size']:>5} ants"
+        f" {record['num_ants']:>5} fidelity {record['fidelity']}:"
+        f" {record['steps_per_second']:.1f} steps/s,"
+        f" {record['ant_moves_per_second']:.3g} ant-moves/s ({phases}{memory})"
+    )
+
+
+######## Command line ########
+def main(argv:list[str] | None = None)->int:
+    """Runs the benchmark suite from the command line. Returns exit status 1
+      if any case regressed against the baseline, else 0."""
+    parser = argparse.ArgumentParser(description=(
+        "Time ant trail simulation steps and compare against a baseline."))
+    parser.add_argument("--grid-size", type=int, nargs="+",
+                        default=list(DEFAULT_GRID_SIZES))
+    parser.add_argument("--num-ants", type=int, nargs="+",
+                        default=list(DEFAULT_NUM_ANTS))
+    parser.add_argument("--fidelity", type=int, nargs="+",
+                        default=list(DEFAULT_FIDELITIES))
+    parser.add_argument("--engine", choices=DEFAULT_ENGINES, nargs="+",
+                        default=list(DEFAULT_ENGINES))
+    parser.add_argument("--tau", type=int, default=8)
+    parser.add_argument("--num-steps", type=int, default=200)
+    parser.add_argument("--sparse", action="store_true",
+                        help="use sparse evaporation")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the peak memory run")
+    parser.add_argument("--output", default=None,
+                        help="JSON file to write results to")
+    parser.add_argument("--baseline", default=None,
+                        help="JSON results file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="allowed fractional slowdown, default 0.1")
+    args = parser.parse_args(argv)
+
+    cases = benchmark_cases(args.grid_size, args.num_ants, args.fidelity,
+                            args.engine, args.tau, args.num_steps, args.sparse)
+    results = run_benchmarks(cases, args.repeats, not args.no_memory,
+                             verbose=True)
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline, encoding="utf-8") as baseline_file:
+        regressions = compare_to_baseline(results, json.load(baseline_file),
+                                          args.threshold)
+    for regression in regressions:
+        print(f"REGRESSION {regression['key']}: {regression['baseline']:.1f}"
+              f" -> {regression['current']:.1f} steps/s"
+              f" ({regression['slowdown']:.0%} slower)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,236 @@
+""" Contains checkpoint functions: save and restore the full state of a
+ simulation (pheromone field, ants and random numbers) so long runs can
+ resume, or several runs can branch off one shared warm-up. """
+
+# imports
+import json
+import os
+import shutil
+import numpy as np
+import ants as a
+import grid as g
+import population as p
+import sampling as sp
+
+######## Global Variables ########
+from constants import EXPLORER, EXPLORER_CODE, FOLLOWER, FOLLOWER_CODE
+
+# checkpoint layout: one directory holding these files
+FIELD_FILE = "field.npy"  # pheromone field, loadable as a memory map
+ANTS_FILE = "ants.npz"  # ant arrays and unused buffered random numbers
+STATE_FILE = "state.json"  # step counts, grid settings and RNG state
+# a checkpoint is written to path + TEMP_SUFFIX, and the one it replaces
+#  moved to path + OLD_SUFFIX until the new one is in place
+TEMP_SUFFIX = ".tmp"
+OLD_SUFFIX = ".old"
+
+
+######## Saving ########
+def save_checkpoint(path:str, ants_on_grid:list[a.Ant] | p.AntPopulation,
+                    simulation_grid:g.Grid, stream:sp.RandomStream,
+                    step:int, exited:int = 0,
+                    B:tuple[float, float, float, float] | None = None)->None:
+    """
+    Saves the full simulation state to directory path. The directory is
+      written next to path first; the previous checkpoint is then moved
+      aside, the new one moved into place and only then the previous one
+      removed, so a crash at any point leaves a whole checkpoint that
+      load_checkpoint finds.
+
+    Args:
+        path: String path of the checkpoint directory.
+        ants_on_grid: List of Ant objects on simulation_grid, or an
+          AntPopulation.
+        simulation_grid: Grid object representing lattice ants are being
+          simulated on.
+        stream: RandomStream the simulation draws from.
+        step: Int representing the number of steps completed.
+        exited: Int representing the number of ants that left the grid.
+        B: Tuple representing the run's turning kernels (B1, B2, B3, B4).
+          Default None; taken from the ants, which for a list of Ant objects
+          with no ants on the grid falls back to the default kernel.
+
+    Returns:
+        None.
+
+    """
+    x, y, direction, state, ant_B = ant_arrays(ants_on_grid)
+    if B is None:
+        B = ant_B
+    stream_state = stream.get_state()
+
+    temp_path = path + TEMP_SUFFIX
+    old_path = path + OLD_SUFFIX
+    if os.path.exists(temp_path):
+        shutil.rmtree(temp_path)
+    if os.path.exists(old_path):
+        if os.path.exists(path):
+            shutil.rmtree(old_path)
+        else: # a crash left only the previous checkpoint; keep it
+            os.replace(old_path, path)
+    os.makedirs(temp_path)
+
+    simulation_grid.snapshot(os.path.join(temp_path, FIELD_FILE))
+    np.savez(os.path.join(temp_path, ANTS_FILE), x=x, y=y,
+             direction=direction, state=state,
+             stream_values=np.array(stream_state["values"], dtype=float),
+             stream_block=stream_state["block"])
+    with open(os.path.join(temp_path, STATE_FILE), "w",
+              encoding="utf-8") as state_file:
+        json.dump({
+            "step": step,
+            "exited": exited,
+            "grid_size": simulation_grid.get_size(),
+            "grid_dtype": str(simulation_grid.dtype),
+            "sparse": simulation_grid.sparse,
+            "backend": simulation_grid.backend,
+            "chunk_size": simulation_grid.chunk_size,
+            "B": list(B),
+            "bit_generator": stream_state["bit_generator"],
+        }, state_file)
+
+    if os.path.exists(path):
+        os.replace(path, old_path)
+    os.replace(temp_path, path)
+    if os.path.exists(old_path):
+        shutil.rmtree(old_path)
+
+
+######## Restoring ########
+def load_checkpoint(path:str, engine:str = "array",
+                    seed:int | np.random.SeedSequence | np.random.Generator
+                    | None = None, mmap:bool = True,
+                    backend:str | None = None,
+                    grid_path:str | None = None)->dict:
+    """
+    Restores a simulation state saved by save_checkpoint. If a crash while
+      saving left path missing, the previous checkpoint moved aside to path +
+      OLD_SUFFIX is restored instead.
+
+    Args:
+        path: String path of the checkpoint directory.
+        engine: String representing the ant container to restore into:
+          "array" for an AntPopulation, "object" for a list of Ant objects.
+        seed: None to continue the saved random numbers exactly, or an int,
+          SeedSequence or Generator to fork off with new random numbers.
+        mmap: Boolean to map the saved field into memory copy-on-write rather
+          than reading it whole, so it is copied into the grid chunk by chunk
+          and the checkpoint file is never changed. Default True.
+        backend: String representing where the restored field lives,
+          "memory" or "memmap". Default None; the backend and chunk_size of
+          the saved grid.
+        grid_path: String path of the memmap file of a "memmap" backend.
+          Default None; a temporary file.
+
+    Returns:
+        checkpoint: Dict with "ants", "grid", "stream", completed "step",
+          "exited" count and turning kernel "B".
+
+    """
+    if not os.path.exists(path) and os.path.exists(path + OLD_SUFFIX):
+        path = path + OLD_SUFFIX
+    with open(os.path.join(path, STATE_FILE), encoding="utf-8") as state_file:
+        state = json.load(state_file)
+    saved = np.load(os.path.join(path, ANTS_FILE))
+    field = np.load(os.path.join(path, FIELD_FILE),
+                    mmap_mode="c" if mmap else None)
+
+    # checkpoints saved before backends were recorded held in-memory grids
+    saved_backend = state.get("backend", "memory")
+    chunk_size = state.get("chunk_size")
+    if backend is None:
+        backend = saved_backend
+    elif backend != saved_backend:
+        chunk_size = None # the new backend's default
+    simulation_grid = g.Grid(state["grid_size"], sparse=state["sparse"],
+                             dtype=state["grid_dtype"], backend=backend,
+                             path=grid_path, chunk_size=chunk_size)
+    simulation_grid.set_grid(field)
+
+    if seed is None:
+        stream = sp.make_stream()
+        stream.set_state({
+            "bit_generator": state["bit_generator"],
+            "values": saved["stream_values"].tolist(),
+            "block": saved["stream_block"],
+        })
+    else:
+        stream = sp.make_stream(seed)
+
+    B = tuple(state["B"])
+    ants_on_grid = ants_from_arrays(saved["x"], saved["y"], saved["direction"],
+                                    saved["state"], B, engine, stream,
+                                    state["exited"])
+
+    return {
+        "ants": ants_on_grid,
+        "grid": simulation_grid,
+        "stream": stream,
+        "step": state["step"],
+        "exited": state["exited"],
+        "B": B,
+    }
+
+
+######## Ant Arrays ########
+def ant_arrays(ants_on_grid:list[a.Ant] | p.AntPopulation)->tuple:
+    """Gets x, y, direction and state code arrays of the ants on the grid,
+      and their turning kernel B."""
+    if isinstance(ants_on_grid, p.AntPopulation):
+        count = ants_on_grid.count
+        return (ants_on_grid.x[:count], ants_on_grid.y[:count],
+                ants_on_grid.direction[:count], ants_on_grid.state[:count],
+                ants_on_grid.B)
+
+    live = [ant for ant in ants_on_grid if ant.is_on_grid()]
+    x = np.array([ant.x for ant in live], dtype=np.int64)
+    y = np.array([ant.y for ant in live], dtype=np.int64)
+    direction = np.array([ant.direction for ant in live], dtype=np.int64)
+    state = np.array([FOLLOWER_CODE if ant.get_state() == FOLLOWER
+                      else EXPLORER_CODE for ant in live], dtype=np.int8)
+    B = live[0].B if live else (0.360, 0.047, 0.008, 0.002)
+    return x, y, direction, state, B
+
+
+def ants_from_arrays(x:np.ndarray, y:np.ndarray, direction:np.ndarray,
+                     state:np.ndarray,
+                     B:tuple[float, float, float, float],
+                     engine:str = "array",
+                     stream:sp.RandomStream | None = None,
+                     exited:int = 0)->list[a.Ant] | p.AntPopulation:
+    """
+    Rebuilds ants from the arrays returned by ant_arrays, without drawing any
+      random numbers.
+
+    Args:
+        x: Numpy array of ints of the ants' x-locations.
+        y: Numpy array of ints of the ants' y-locations.
+        direction: Numpy array of ints of the ants' directions, 0-7.
+        state: Numpy array of ant state codes, EXPLORER_CODE or
+          FOLLOWER_CODE.
+        B: Tuple representing the turning kernels (B1, B2, B3, B4).
+        engine: String representing the ant container to build: "array" for
+          an AntPopulation, "object" for a list of Ant objects.
+        stream: RandomStream the ants draw from from now on.
+        exited: Int representing the number of ants that left the grid, kept
+          by an AntPopulation.
+
+    Returns:
+        ants_on_grid: List of Ant objects, or an AntPopulation.
+
+    """
+    if engine == "array":
+        population = p.AntPopulation(B=B, stream=stream)
+        population.set_ants(x, y, direction, state)
+        population.exited = exited
+        return population
+
+    ants_on_grid = []
+    for ant_x, ant_y, ant_direction, code in zip(x.tolist(), y.tolist(),
+                                                 direction.tolist(),
+                                                 state.tolist()):
+        ant = a.Ant(x=ant_x, y=ant_y, B=B, stream=stream,
+                    direction=ant_direction)
+        ant.set_ant_state(FOLLOWER if code == FOLLOWER_CODE else EXPLORER)
+        ants_on_grid.append(ant)
+    return ants_on_grid
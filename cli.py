@@ -0,0 +1,207 @@
+""" Contains the ant-trails command line entry point: runs the simulations
+ described by a TOML or JSON run spec, headless unless the spec asks for
+ figures, writing each run's files and a JSON lines summary. """
+
+# imports
+import argparse
+import contextlib
+import inspect
+import io
+import json
+import os
+try:
+    import tomllib
+except ImportError:  # Python 3.10 reads JSON specs only
+    tomllib = None
+import convergence as cv
+import fidelity as fi
+import simulation_run as sr
+import spawning as sw
+
+# top level spec keys; everything under "defaults" and in each of "runs" is
+#  a run_simulation parameter, or "seeds"
+SPEC_KEYS = ("output_dir", "save_metrics", "save_snapshots", "render",
+             "defaults", "runs")
+
+# run_simulation parameters the spec may not set, since each run gets its own
+_PER_RUN = ("seed", "metrics_path", "snapshot_path", "render_path")
+
+# fidelity curves a spec can name
+_FIDELITY_CURVES = {"saturating": fi.saturating_fidelity,
+                    "threshold": fi.threshold_fidelity}
+
+# name of the summary file in output_dir
+RESULTS_FILE = "results.jsonl"
+
+
+######## Run specs ########
+def load_spec(path:str)->dict:
+    """
+    Reads a run spec from a ".toml" or ".json" file.
+
+    Args:
+        path: String path of the spec file.
+
+    Returns:
+        spec: Dict with optional keys SPEC_KEYS.
+
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8") as spec_file:
+            spec = json.load(spec_file)
+    elif extension == ".toml":
+        if tomllib is None:
+            raise ValueError("Invalid spec; TOML specs need Python 3.11 or"
+                             " newer, use a JSON spec.")
+        with open(path, "rb") as spec_file:
+            spec = tomllib.load(spec_file)
+    else:
+        raise ValueError("Invalid spec; spec files should end in .toml or"
+                         " .json.")
+    unknown = set(spec) - set(SPEC_KEYS)
+    if unknown:
+        raise ValueError(f"Invalid spec; unknown keys {sorted(unknown)},"
+                         f" expected keys from {SPEC_KEYS}.")
+    return spec
+
+
+def spec_jobs(spec:dict)->list[dict]:
+    """
+    Expands a run spec into one job per run and seed.
+
+    Args:
+        spec: Dict of a run spec, see load_spec.
+
+    Returns:
+        jobs: List of dicts with the job "name", its "seed" and its
+          "parameters" as written in the spec.
+
+    """
+    parameter_names = set(inspect.signature(sr.run_simulation).parameters)
+    allowed = (parameter_names - set(_PER_RUN)) | {"seeds"}
+    defaults = spec.get("defaults", {})
+    jobs = []
+    for index, run in enumerate(spec.get("runs", [{}])):
+        parameters = {**defaults, **run}
+        unknown = set(parameters) - allowed
+        if unknown:
+            raise ValueError(f"Invalid spec; unknown run parameters"
+                             f" {sorted(unknown)}.")
+        parameters.setdefault("figure", f"run{index}")
+        seeds = parameters.pop("seeds", [None])
+        for seed in seeds:
+            name = parameters["figure"]
+            if seed is not None:
+                name = f"{name}_seed{seed}"
+            jobs.append({"name": name, "seed": seed,
+                         "parameters": parameters})
+    return jobs
+
+
+def run_arguments(parameters:dict)->dict:
+    """
+    Turns spec parameters into run_simulation arguments: fidelity curves,
+      spawners and convergence monitors given as tables become objects, and
+      B becomes a tuple. Runs stay headless unless plot is set.
+
+    Args:
+        parameters: Dict of one job's spec parameters.
+
+    Returns:
+        arguments: Dict of keyword arguments for run_simulation.
+
+    """
+    arguments = {"plot": False, **parameters}
+    if isinstance(arguments.get("fidelity"), dict):
+        curve = dict(arguments["fidelity"])
+        kind = curve.pop("curve", None)
+        if kind not in _FIDELITY_CURVES:
+            raise ValueError(f"Invalid fidelity curve; curve should be one of"
+                             f" {tuple(_FIDELITY_CURVES)}.")
+        arguments["fidelity"] = _FIDELITY_CURVES[kind](**curve)
+    if "spawner" in arguments:
+        arguments["spawner"] = sw.Spawner.from_config(arguments["spawner"])
+    if "convergence" in arguments:
+        arguments["convergence"] = cv.ConvergenceMonitor(
+            **arguments["convergence"])
+    if "B" in arguments:
+        arguments["B"] = tuple(arguments["B"])
+    return arguments
+
+
+######## Running ########
+def run_spec(spec:dict, verbose:bool = False)->list[dict]:
+    """
+    Runs every job of a run spec, appending one JSON line per finished run to
+      RESULTS_FILE in the spec's output_dir.
+
+    Args:
+        spec: Dict of a run spec, see load_spec.
+        verbose: Boolean to show run_simulation's progress output. Default
+          False.
+
+    Returns:
+        records: List of dicts, one per run, of the job name, seed, spec
+          parameters, final counts and written files.
+
+    """
+    output_dir = spec.get("output_dir", ".")
+    os.makedirs(output_dir, exist_ok=True)
+    records = []
+    with open(os.path.join(output_dir, RESULTS_FILE), "a",
+              encoding="utf-8") as results_file:
+        for job in spec_jobs(spec):
+            arguments = run_arguments(job["parameters"])
+            files = {}
+            if spec.get("save_metrics", False):
+                files["metrics_path"] = f"{job['name']}_metrics.csv"
+            if spec.get("save_snapshots", False):
+                files["snapshot_path"] = f"{job['name']}.snap"
+            if spec.get("render", False):
+                files["render_path"] = f"{job['name']}.gif"
+            for key, name in files.items():
+                arguments[key] = os.path.join(output_dir, name)
+
+            output = contextlib.nullcontext() if verbose else \
+                contextlib.redirect_stdout(io.StringIO())
+            with output:
+                results = sr.run_simulation(seed=job["seed"], **arguments)
+
+            record = {"name": job["name"], "seed": job["seed"],
+                      **job["parameters"]}
+            record.update({name: results[name]
+                           for name in ("F", "L", "live", "exited",
+                                        "converged_step")
+                           if name in results})
+            record["files"] = files
+            results_file.write(json.dumps(record) + "\n")
+            results_file.flush()
+            records.append(record)
+            print(f"{job['name']}: follower ants {record['F']}, explorer ants"
+                  f" {record['L']}")
+    return records
+
+
+######## Command line ########
+def main(argv:list[str] | None = None)->None:
+    """Runs the simulations of a run spec from the command line."""
+    parser = argparse.ArgumentParser(prog="ant-trails", description=(
+        "Run ant trail simulations described by a TOML or JSON run spec."))
+    parser.add_argument("spec", help="path of a .toml or .json run spec")
+    parser.add_argument("--output-dir", default=None,
+                        help="overrides the spec's output_dir")
+    parser.add_argument("--verbose", action="store_true",
+                        help="show each run's progress output")
+    args = parser.parse_args(argv)
+
+    spec = load_spec(args.spec)
+    if args.output_dir is not None:
+        spec["output_dir"] = args.output_dir
+    records = run_spec(spec, args.verbose)
+    print(f"Ran {len(records)} simulations, results in"
+          f" {os.path.join(spec.get('output_dir', '.'), RESULTS_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
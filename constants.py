@@ -4,6 +4,19 @@
 EXPLORER = "explorer"
 FOLLOWER = "follower"
 
+# integer ant state codes, used by array-based ant populations
+EXPLORER_CODE = 0
+FOLLOWER_CODE = 1
+
+# ant direction decisions, the path update_direction takes each step
+EXPLORE = "explore"  # explorer turn
+FOLLOW_CONTINUE = "follow_continue"  # follower stays on the trail
+FOLLOW_DROP = "follow_drop"  # follower loses the trail, turns as explorer
+DECISIONS = (EXPLORE, FOLLOW_CONTINUE, FOLLOW_DROP)
+
+# phases of one simulation step, in step order
+STEP_PHASES = ("spawn", "deposit", "move", "evaporate")
+
 # direction vectors
 # stores (dx, dy) lattice grid movement relative to current position for ant
 #  movement!!
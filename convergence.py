@@ -0,0 +1,137 @@
+""" Contains ConvergenceMonitor class, watches windowed statistics of a run
+ and tells it to stop once they have settled. """
+
+# imports
+import grid as g
+import simulation_setup as ss
+
+# watched statistics
+STATISTICS = ("F", "L", "total_pheromone")
+
+
+######## ConvergenceMonitor class ########
+class ConvergenceMonitor:
+    """
+    Watches follower count F, explorer count L and total pheromone of a run,
+      or a chosen subset of them. Every sample, the sum of each statistic
+      over the latest window of samples is compared with its sum over the
+      window before; the run has converged once the change of every
+      statistic stays within tolerance times its previous window sum, plus
+      atol per sample, for a whole window of samples in a row. Window sums
+      are kept running in a ring buffer, so each sample costs O(1) besides
+      reading the statistics; total pheromone is O(1) on grids with sparse
+      evaporation.
+
+    Attributes:
+        window: Int representing number of samples per window.
+        tolerance: Float representing the largest relative change between
+          consecutive windows counted as settled.
+        atol: Float representing the largest change of a statistic's window
+          mean counted as settled however small the statistic, so
+          statistics that hover near 0 can settle. Default 0; relative
+          changes only.
+        every: Int representing how many steps pass between samples.
+        min_steps: Int representing the fewest steps run before stopping.
+        statistics: Tuple of the watched names from STATISTICS. Pheromone
+          keeps building up on long trails with the default evaporation, so
+          runs watching only ("F", "L") settle sooner.
+        num_samples: Int representing number of samples taken so far.
+        converged_step: Int representing the step at which the run converged,
+          or None.
+    """
+
+    def __init__(self, window:int = 100, tolerance:float = 0.01,
+                 every:int = 1, min_steps:int = 0,
+                 statistics:tuple[str, ...] = STATISTICS,
+                 atol:float = 0.0)->None:
+        if any(name not in STATISTICS for name in statistics) \
+                or not statistics:
+            raise ValueError(f"Invalid statistics; statistics should be"
+                             f" taken from {STATISTICS}.")
+        if window <= 0 or every <= 0:
+            raise ValueError("Invalid window; window and every must be"
+                             " larger than 0.")
+        if tolerance < 0 or atol < 0:
+            raise ValueError("Invalid tolerance; tolerance and atol must be"
+                             " at least 0.")
+        self.window = window
+        self.tolerance = tolerance
+        self.atol = atol
+        self.every = every
+        self.min_steps = min_steps
+        self.statistics = tuple(statistics)
+        self.reset()
+
+    def __repr__(self)->str:
+        return (f"convergence monitor | window: {self.window} samples every"
+                f" {self.every} steps, tolerance: {self.tolerance}, converged"
+                f" step: {self.converged_step}")
+
+    def reset(self)->None:
+        """Forgets every sample, e.g. before a new run."""
+        self.num_samples = 0
+        self.converged_step = None
+        # the latest two windows of samples, oldest overwritten first
+        self._samples = [(0.0,) * len(self.statistics)] * (2 * self.window)
+        self._current = [0.0] * len(self.statistics)
+        self._previous = [0.0] * len(self.statistics)
+        self._settled = 0
+
+    def as_config(self)->dict:
+        """Returns the monitor's parameters as a JSON-ready dict."""
+        return {"window": self.window, "tolerance": self.tolerance,
+                "atol": self.atol, "every": self.every,
+                "min_steps": self.min_steps,
+                "statistics": list(self.statistics)}
+
+    ######## Updates ########
+    def update(self, step:int, ants_on_grid, simulation_grid:g.Grid)->bool:
+        """
+        Samples the statistics after a simulation step, every `every` steps.
+
+        Args:
+            step: Int representing the iteration number.
+            ants_on_grid: List of Ant objects on simulation_grid, or an
+              AntPopulation.
+            simulation_grid: Grid object representing lattice ants are being
+              simulated on.
+
+        Returns:
+            converged: Boolean, True once the run has converged.
+
+        """
+        if self.converged_step is not None:
+            return True
+        if (step + 1) % self.every:
+            return False
+        F = ss.total_F_value(ants_on_grid)
+        values = {"F": F, "L": len(ants_on_grid) - F}
+        if "total_pheromone" in self.statistics:
+            # the only statistic that may scan the grid
+            values["total_pheromone"] = simulation_grid.get_total_pheromone()
+        sample = tuple(values[name] for name in self.statistics)
+
+        # the sample leaving the current window joins the previous one, and
+        #  the one leaving the previous window is dropped
+        slot = self.num_samples % (2 * self.window)
+        middle = self._samples[(slot + self.window) % (2 * self.window)]
+        oldest = self._samples[slot]
+        for index, value in enumerate(sample):
+            self._current[index] += value - middle[index]
+            self._previous[index] += middle[index] - oldest[index]
+        self._samples[slot] = sample
+        self.num_samples += 1
+
+        if self.num_samples < 2 * self.window:
+            return False
+        # window sums are compared, so atol is scaled from a window mean
+        if all(abs(current - previous)
+               <= self.tolerance * abs(previous) + self.atol * self.window
+               for current, previous in zip(self._current, self._previous)):
+            self._settled += 1
+        else:
+            self._settled = 0
+        if self._settled >= self.window and step + 1 >= self.min_steps:
+            self.converged_step = step
+            return True
+        return False
@@ -0,0 +1,250 @@
+""" Contains ensemble simulation: steps many replicate simulations at once,
+ with every replicate's pheromone field in one array and every replicate's
+ ants in one population. """
+
+# imports
+from collections.abc import Callable
+import numpy as np
+import numpy.typing
+import fidelity as fi
+import population as p
+import sampling as sp
+
+######## Global Variables ########
+from constants import EVAP_RATE, FOLLOWER_CODE
+from grid import DIRECTION_DX, DIRECTION_DY
+
+
+######## EnsembleGrid class ########
+class EnsembleGrid:
+    """
+    Object representing num_replicates square grids, one per replicate
+      simulation, stored as one array. Same bounds and saturating arithmetic
+      as grid.Grid.
+
+    Attributes:
+        size: Int representing the number of points per grid side.
+        hill_loc: Int of ant hill location, same for every replicate.
+        num_replicates: Int representing the number of replicate grids.
+        dtype: Numpy dtype used to store pheromone.
+        grid: Numpy 3D array of points, indexed [replicate, y, x].
+        occupancy: Always None; ant occupancy is not tracked for ensembles.
+    """
+
+    def __init__(self, size:int, num_replicates:int,
+                 dtype:np.typing.DTypeLike=np.float64)->None:
+        if size <= 0 or size % 2 != 0:
+            raise ValueError("Invalid size input; size input must be even and"
+                             " larger than 0.")
+        if num_replicates <= 0:
+            raise ValueError("Invalid number of replicates; num_replicates"
+                             " must be larger than 0.")
+        self.size = size
+        self.hill_loc = int(size/2)
+        self.num_replicates = num_replicates
+        self.dtype = np.dtype(dtype)
+        self.grid = np.zeros((num_replicates, size, size), dtype=self.dtype)
+        self.occupancy = None
+        if self.dtype.kind == "f":
+            self._wide_dtype = np.float64
+            self._max_value = np.inf
+        else:
+            self._wide_dtype = np.int64
+            self._max_value = np.iinfo(self.dtype).max
+
+    def __repr__(self)->str:
+        return (
+            f"Ensemble of {self.num_replicates} grids, size = {self.size}x"
+            f"{self.size}, hill_loc = {self.hill_loc}x{self.hill_loc}, dtype"
+            f" = {self.dtype}"
+        )
+
+    def get_hill_loc(self)->int:
+        """Gets hill location."""
+        return self.hill_loc
+
+    def get_pheromone_for_points(self, x:np.ndarray, y:np.ndarray,
+                                 replicate:np.ndarray)->np.ndarray:
+        """Gets pheromone values for points in the given replicates. Points
+          off grid read as C = 0."""
+        in_bounds = self._in_bounds_array(x, y)
+        pheromone = np.zeros(len(x), dtype=self.dtype)
+        pheromone[in_bounds] = self.grid[replicate[in_bounds], y[in_bounds],
+                                         x[in_bounds]]
+        return pheromone
+
+    def add_pheromone_for_points(self, x:np.ndarray, y:np.ndarray,
+                                 replicate:np.ndarray, amount:int)->None:
+        """Adds amount of pheromone at points in the given replicates,
+          saturating at the largest value dtype can hold."""
+        in_bounds = self._in_bounds_array(x, y)
+        cells = ((replicate[in_bounds] * self.size + y[in_bounds]) * self.size
+                 + x[in_bounds])
+        cells, counts = np.unique(cells, return_counts=True)
+        flat_grid = self.grid.reshape(-1)
+        totals = flat_grid[cells].astype(self._wide_dtype) + counts * amount
+        flat_grid[cells] = np.clip(totals, 0, self._max_value)
+
+    def evaporate(self, rate:int)->None:
+        """Removes rate pheromone from every grid space of every replicate,
+          stopping at 0."""
+        np.maximum(self.grid, rate, out=self.grid)
+        np.subtract(self.grid, rate, out=self.grid)
+
+    def _in_bounds_array(self, x:np.ndarray, y:np.ndarray)->np.ndarray:
+        """Checks which (x, y) points are inside grid, same bounds as
+          grid.Grid."""
+        return (0 <= x) & (x < self.size - 1) & (0 <= y) & (y < self.size - 1)
+
+
+######## EnsemblePopulation class ########
+class EnsemblePopulation(p.AntPopulation):
+    """
+    AntPopulation holding the ants of every replicate, each tagged with the
+      replicate it belongs to. Ants only see and mark their own replicate's
+      grid.
+
+    Attributes:
+        replicate: Numpy array of ints representing each ant's replicate.
+        num_replicates: Int representing the number of replicates.
+    """
+
+    _ARRAYS = p.AntPopulation._ARRAYS + ("replicate",)
+
+    def __init__(self, num_replicates:int, capacity:int = 1024,
+                 B:tuple[float, float, float, float] =
+                 (0.360, 0.047, 0.008, 0.002),
+                 stream:sp.RandomStream | None = None)->None:
+        super().__init__(capacity, B, stream)
+        self.num_replicates = num_replicates
+        self.replicate = np.zeros(capacity, dtype=np.int64)
+
+    def add_ants(self, x:int, y:int, number:int = 1)->None:
+        """Adds number new explorer ants at (x, y) to every replicate."""
+        start = self.count
+        super().add_ants(x, y, number * self.num_replicates)
+        self.replicate[start:self.count] = np.repeat(
+            np.arange(self.num_replicates), number)
+
+    def add_ants_at(self, x:np.ndarray, y:np.ndarray)->None:
+        """Adds one new explorer ant at each of the points (x, y) to every
+          replicate."""
+        start = self.count
+        super().add_ants_at(np.tile(x, self.num_replicates),
+                            np.tile(y, self.num_replicates))
+        self.replicate[start:self.count] = np.repeat(
+            np.arange(self.num_replicates), len(x))
+
+    def follower_counts(self)->np.ndarray:
+        """Returns number of follower ants on the grid per replicate."""
+        followers = self.state[:self.count] == FOLLOWER_CODE
+        return np.bincount(self.replicate[:self.count], weights=followers,
+                           minlength=self.num_replicates).astype(np.int64)
+
+    def live_counts(self)->np.ndarray:
+        """Returns number of ants on the grid per replicate."""
+        return np.bincount(self.replicate[:self.count],
+                           minlength=self.num_replicates)
+
+    def deposit(self, ants:np.ndarray, grid:EnsembleGrid, tau:int)->None:
+        """Places tau pheromone at the location of each given ant, on its own
+          replicate's grid."""
+        grid.add_pheromone_for_points(self.x[ants], self.y[ants],
+                                      self.replicate[ants], tau)
+
+    def _local_pheromone(self, grid:EnsembleGrid,
+                         ants:np.ndarray)->np.ndarray:
+        """Reads the pheromone at the grid spaces of the given ants, on their
+          own replicate's grid."""
+        return grid.get_pheromone_for_points(self.x[ants], self.y[ants],
+                                             self.replicate[ants])
+
+    def _neighbor_pheromone(self, grid:EnsembleGrid,
+                            ants:np.ndarray)->np.ndarray:
+        """Reads the pheromone the given ants see at their forward, right and
+          left grid spaces of their own replicate's grid, as columns of an
+          (n, 3) array."""
+        forward = self.direction[ants]
+        pheromone = np.empty((len(ants), 3), dtype=grid.dtype)
+        for column, direction in enumerate((forward, (forward + 1) % 8,
+                                            (forward - 1) % 8)):
+            pheromone[:, column] = grid.get_pheromone_for_points(
+                self.x[ants] + DIRECTION_DX[direction],
+                self.y[ants] + DIRECTION_DY[direction], self.replicate[ants])
+        return pheromone
+
+
+######## Ensemble simulation ########
+def ensemble_step(population:EnsemblePopulation, ensemble_grid:EnsembleGrid,
+                  fidelity:int | fi.FidelityTable, tau:int)->None:
+    """
+    Performs one time step for every replicate at once: one new ant per
+      replicate, deposition, movement and evaporation.
+
+    Args:
+        population: EnsemblePopulation holding every replicate's ants.
+        ensemble_grid: EnsembleGrid holding every replicate's pheromone.
+        fidelity: Int representing the probability of an ant to keep following
+          a trail.
+        tau: Int representing "units" of pheromone ants deposit to their
+          location on the grid at each timestep.
+
+    Returns:
+        None.
+
+    """
+    hill_loc = ensemble_grid.get_hill_loc()
+    population.add_ants(hill_loc, hill_loc)
+    active = population.get_active()
+
+    population.deposit(active, ensemble_grid, tau)
+    population.update_direction(active, ensemble_grid, fidelity)
+    population.move(active, ensemble_grid)
+
+    ensemble_grid.evaporate(EVAP_RATE)
+
+
+def run_ensemble(grid_size:int, fidelity:int | fi.FidelityTable | Callable,
+                 tau:int, num_replicates:int,
+                 num_steps:int = 1500,
+                 B:tuple[float, float, float, float] =
+                 (0.360, 0.047, 0.008, 0.002),
+                 seed:int | np.random.SeedSequence | np.random.Generator
+                 | None = None,
+                 grid_dtype:str = "float64")->dict:
+    """
+    Runs num_replicates independent ant foraging simulations in lockstep.
+
+    Args:
+        grid_size: Int representing the number of points per grid side.
+        fidelity: Int representing the probability of an ant to keep following
+          a trail. From paper 3a: 255, 3b: 251, 3c: 247. Also a function of
+          concentration or a FidelityTable, see simulation_run.run_simulation.
+        tau: Int representing "units" of pheromone ants deposit to their
+          location on the grid at each timestep.
+        num_replicates: Int representing the number of replicate simulations.
+        num_steps: Int representing number of steps to simulate. Default 1500.
+        B: Tuple representing the turning kernels (B1, B2, B3, B4).
+        seed: Int, SeedSequence or Generator for the ensemble's random
+          numbers. Default None; fresh OS entropy.
+        grid_dtype: String naming the Numpy dtype pheromone is stored in.
+
+    Returns:
+        results: Dict with (num_steps, num_replicates) arrays of follower
+          counts "F" and explorer counts "L" after each step, and the final
+          (num_replicates, grid_size, grid_size) pheromone "grids".
+
+    """
+    fidelity = fi.make_fidelity_table(fidelity, grid_dtype)
+    ensemble_grid = EnsembleGrid(grid_size, num_replicates, grid_dtype)
+    population = EnsemblePopulation(num_replicates, B=B,
+                                    stream=sp.make_stream(seed))
+
+    F = np.zeros((num_steps, num_replicates), dtype=np.int64)
+    L = np.zeros((num_steps, num_replicates), dtype=np.int64)
+    for i in range(num_steps):
+        ensemble_step(population, ensemble_grid, fidelity, tau)
+        F[i] = population.follower_counts()
+        L[i] = population.live_counts() - F[i]
+
+    return {"F": F, "L": L, "grids": ensemble_grid.grid}
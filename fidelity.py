@@ -0,0 +1,142 @@
+""" Contains FidelityTable class, fidelity as a function of the pheromone
+ concentration at an ant's grid space, precomputed for every concentration so
+ each ant's follower decision is one table read, and fidelity curves to
+ build tables from. """
+
+# imports
+from collections.abc import Callable
+import numpy as np
+import numpy.typing
+
+# fidelity values are compared against a random int from 0 to 256, so 257
+#  always keeps following and 0 never does
+MAX_FIDELITY = 257
+
+# default largest concentration given its own table entry; higher
+#  concentrations use the last entry
+DEFAULT_MAX_CONCENTRATION = 4095
+
+
+######## FidelityTable class ########
+class FidelityTable:
+    """
+    Fidelity for every pheromone concentration C from 0 to max_concentration,
+      computed once from a fidelity function. An ant on a grid space of
+      concentration C stays a follower when its random int from 0 to 256 is
+      below thresholds[C], the same test a constant int fidelity uses.
+
+    Attributes:
+        max_concentration: Int representing the largest concentration with
+          its own entry; higher concentrations use the last entry.
+        thresholds: Numpy array of ints (0-257) indexed by concentration.
+    """
+
+    def __init__(self, function:Callable[[np.ndarray], np.ndarray],
+                 max_concentration:int = DEFAULT_MAX_CONCENTRATION)->None:
+        if max_concentration < 0:
+            raise ValueError("Invalid max_concentration; max_concentration"
+                             " must be at least 0.")
+        self.max_concentration = max_concentration
+        concentrations = np.arange(max_concentration + 1, dtype=float)
+        values = np.broadcast_to(np.asarray(function(concentrations),
+                                            dtype=float), concentrations.shape)
+        self.thresholds = np.clip(np.rint(values), 0,
+                                  MAX_FIDELITY).astype(np.int64)
+        # a plain list makes single lookups cheaper than NumPy scalars
+        self._threshold_list = self.thresholds.tolist()
+
+    def __repr__(self)->str:
+        return f"fidelity table | concentrations: 0-{self.max_concentration}, fidelity: {self.thresholds.min()}-{self.thresholds.max()}"
+
+    def fidelity_at(self, concentration:float)->int:
+        """Returns the fidelity of an ant on a grid space of concentration."""
+        return self._threshold_list[min(int(concentration),
+                                        self.max_concentration)]
+
+    def fidelities_at(self, concentrations:np.ndarray)->np.ndarray:
+        """Returns the fidelity of ants on grid spaces of concentrations."""
+        index = np.minimum(concentrations, self.max_concentration)
+        return self.thresholds[index.astype(np.int64)]
+
+
+def make_fidelity_table(fidelity:int | FidelityTable
+                        | Callable[[np.ndarray], np.ndarray],
+                        grid_dtype:np.typing.DTypeLike = np.float64,
+                        max_concentration:int = DEFAULT_MAX_CONCENTRATION
+                        )->int | FidelityTable:
+    """
+    Compiles a fidelity function into a FidelityTable at the start of a run.
+      Constant int fidelities and ready tables are returned unchanged.
+
+    Args:
+        fidelity: Int constant fidelity, a FidelityTable, or a function taking
+          a Numpy array of concentrations and returning fidelity values
+          (0-257) for them, e.g. from saturating_fidelity.
+        grid_dtype: Numpy dtype of the pheromone field. Integer dtypes that
+          cannot hold max_concentration get a table of every value they can.
+        max_concentration: Int representing the largest concentration with
+          its own table entry.
+
+    Returns:
+        fidelity: Int or FidelityTable to pass to the step functions.
+
+    """
+    if isinstance(fidelity, (int, np.integer, FidelityTable)):
+        return fidelity
+    if not callable(fidelity):
+        raise TypeError("Invalid fidelity; fidelity should be an int, a"
+                        " FidelityTable or a function of concentration.")
+    grid_dtype = np.dtype(grid_dtype)
+    if grid_dtype.kind in "iu":
+        max_concentration = min(max_concentration,
+                                int(np.iinfo(grid_dtype).max))
+    return FidelityTable(fidelity, max_concentration)
+
+
+######## Fidelity curves ########
+def saturating_fidelity(low:float, high:float,
+                        half_saturation:float)->Callable[[np.ndarray],
+                                                         np.ndarray]:
+    """
+    Makes a fidelity function rising from low on unmarked grid spaces towards
+      high on strong trails, low + (high - low) * C / (C + half_saturation).
+
+    Args:
+        low: Float representing the fidelity at C = 0.
+        high: Float representing the fidelity approached as C grows.
+        half_saturation: Float representing the concentration at which
+          fidelity is halfway between low and high.
+
+    Returns:
+        Function of a Numpy array of concentrations.
+
+    """
+    if half_saturation <= 0:
+        raise ValueError("Invalid half_saturation; half_saturation must be"
+                         " larger than 0.")
+
+    def function(concentrations:np.ndarray)->np.ndarray:
+        return low + (high - low) * concentrations \
+            / (concentrations + half_saturation)
+    return function
+
+
+def threshold_fidelity(low:float, high:float,
+                       threshold:float)->Callable[[np.ndarray], np.ndarray]:
+    """
+    Makes a fidelity function that is low below a concentration threshold and
+      high from it on.
+
+    Args:
+        low: Float representing the fidelity below threshold.
+        high: Float representing the fidelity at and above threshold.
+        threshold: Float representing the concentration where fidelity
+          switches.
+
+    Returns:
+        Function of a Numpy array of concentrations.
+
+    """
+    def function(concentrations:np.ndarray)->np.ndarray:
+        return np.where(concentrations >= threshold, high, low)
+    return function
@@ -1,7 +1,21 @@
 """ File containing Grid class, creates the grid for the simulation. """
 
 # imports
+import concurrent.futures
+import tempfile
 import numpy as np
+import numpy.typing
+import occupancy as o
+
+######## Global Variables ########
+from constants import DIRECTION_VECTORS
+
+# rows per band when evaporating a dense grid on a thread pool
+EVAPORATE_BAND_ROWS = 256
+
+# x and y steps of each direction 0-7, as arrays
+DIRECTION_DX = np.array([dx for dx, _ in DIRECTION_VECTORS], dtype=np.int64)
+DIRECTION_DY = np.array([dy for _, dy in DIRECTION_VECTORS], dtype=np.int64)
 
 
 # Grid class
@@ -14,24 +28,116 @@ class Grid:
         size: Int representing the number of points of grid, default 256 for a
           256x256 point grid.
         hill_loc: Int of ant hill location, default 128. Calculated from size.
-        grid: Numpy 2D array of points.
+        grid: Numpy 2D array of points. A view of the inside of a field with
+          a one point border of zeros, so neighbors of any point on the grid
+          can be read without bounds checks.
+        neighbor_offsets: Numpy (8, 3) array of flat index offsets, in the
+          bordered field, of the forward, right and left neighbors for each
+          direction 0-7. See get_neighbor_pheromone(s).
+        sparse: Bool, True to track grid spaces holding pheromone so
+          evaporation only visits those, instead of the whole grid. Sparse
+          grids only see pheromone added through the 'Set' functions. The
+          tracking flags are stored on the grid's backend.
+        dtype: Numpy dtype used to store pheromone, default float64. Integer
+          dtypes such as uint8, uint16 or int32 use less memory; adding and
+          evaporating pheromone saturates at the dtype's limits instead of
+          wrapping around.
+        backend: String representing where the field is stored: "memory" for
+          an in-memory array, "memmap" for a numpy.memmap file so grids larger
+          than RAM only page in the regions ants have visited.
+        chunk_size: Int representing the side of the square chunks the grid
+          is split into. When set, chunks that received pheromone are
+          tracked, and evaporation and snapshots only visit those. None
+          (default for "memory") visits the whole grid; "memmap" defaults to
+          256.
+        occupancy: OccupancyIndex of the number of ants on each grid space,
+          kept up to date by the simulation steps once track_occupancy is
+          called. Default None; not tracked.
     """
 
-    def __init__(self, size:int=256)->None:
+    def __init__(self, size:int=256, sparse:bool=False,
+                 dtype:np.typing.DTypeLike=np.float64,
+                 backend:str="memory", path:str | None=None,
+                 chunk_size:int | None=None)->None:
         if not isinstance(size, int): # checking grid input type
             raise TypeError("Invalid input type; size input must be an int.")
         if size <= 0: # checking if grid size below 0
             raise ValueError("Invalid size input, size input must be larger than 0.")
         if size % 2 != 0: # checking if grid size even
             raise ValueError("Invalid size input; size input must be even.")
+        dtype = np.dtype(dtype)
+        if dtype.kind not in "uif": # checking for a numeric storage dtype
+            raise TypeError("Invalid dtype; dtype must be an integer or float"
+                            " dtype.")
+        if backend not in ("memory", "memmap"): # checking storage backend
+            raise ValueError("Invalid backend; backend must be 'memory' or"
+                             " 'memmap'.")
         self.size = size
         self.hill_loc = int(size/2)
-        self.grid = np.zeros((size, size))
+        self.dtype = dtype
+        self.backend = backend
+        # the field has a border of zeros one point wide, never written to
+        width = size + 2
+        if backend == "memmap":
+            # a new memmap file is sparse on disk: untouched pages cost
+            #  neither disk nor memory. Without a path, an anonymous temporary
+            #  file is removed once the grid is gone.
+            if path is None:
+                path = tempfile.TemporaryFile()
+            self._field = np.memmap(path, dtype=dtype, mode="w+",
+                                    shape=(width, width))
+            if chunk_size is None:
+                chunk_size = 256
+        else:
+            self._field = np.zeros((width, width), dtype=dtype)
+        self.grid = self._field[1:-1, 1:-1]
+        self._flat = self._field.reshape(-1)
+        # forward, right and left neighbor of each direction, as flat offsets
+        forward = np.arange(8)
+        neighbors = np.stack([forward, (forward + 1) % 8, (forward - 1) % 8],
+                             axis=1)
+        self.neighbor_offsets = DIRECTION_DY[neighbors] * width \
+            + DIRECTION_DX[neighbors]
+        self._neighbor_offsets = self.neighbor_offsets.tolist()
+        self.chunk_size = chunk_size
+        if chunk_size is not None:
+            if chunk_size <= 0:
+                raise ValueError("Invalid chunk size; chunk_size must be"
+                                 " larger than 0.")
+            num_chunks = -(-size // chunk_size)
+            self._active_chunks = np.zeros((num_chunks, num_chunks),
+                                           dtype=bool)
+        # pheromone sums are taken in a wider type, then clipped to the
+        #  range the storage dtype can hold
+        if dtype.kind == "f":
+            self._wide_dtype = np.float64
+            self._max_value = np.inf
+        else:
+            self._wide_dtype = np.int64
+            self._max_value = np.iinfo(dtype).max
+        self.occupancy = None
+        self.sparse = sparse
+        if sparse:
+            # flags and flat field indices of grid spaces that may hold
+            #  pheromone; spaces marked since the last evaporation wait in
+            #  _new_cells. A memmap grid keeps its flags in a memmap too, so
+            #  only pages near trails are ever held in memory.
+            if backend == "memmap":
+                self._tracked = np.memmap(tempfile.TemporaryFile(),
+                                          dtype=bool, mode="w+",
+                                          shape=(width * width,))
+            else:
+                self._tracked = np.zeros(width * width, dtype=bool)
+            self._cells = np.empty(0, dtype=np.int64)
+            self._new_cells = []
+            # running total, updated by every change to the field
+            self._total_pheromone = 0
 
     def __repr__(self)->str:
         return (
             f"Grid size = {self.size}x{self.size}, hill_loc ="
-            f" {self.hill_loc}x{self.hill_loc})"
+            f" {self.hill_loc}x{self.hill_loc}, dtype = {self.dtype},"
+            f" backend = {self.backend})"
         )
 
     ######## 'Get' Functions ########
@@ -51,15 +157,278 @@ class Grid:
         else:
             return self.grid[y, x]
 
+    def get_pheromone_for_points(self, x:np.ndarray, y:np.ndarray)->np.ndarray:
+        """Gets pheromone values for arrays of points on the grid. Points off
+          grid read as C = 0, same as get_pheromone_for_point."""
+        in_bounds = self._in_bounds_array(x, y)
+        pheromone = np.zeros(len(x), dtype=self.grid.dtype)
+        pheromone[in_bounds] = self.grid[y[in_bounds], x[in_bounds]]
+        return pheromone
+
+    def get_neighbor_pheromone(self, x:int, y:int,
+                               direction:int)->tuple:
+        """Gets pheromone values of the forward, right and left neighbors of
+          point (x, y) on the grid, for an ant heading in direction. Reads
+          the bordered field directly, without bounds checks."""
+        center = (y + 1) * (self.size + 2) + x + 1
+        forward, right, left = self._neighbor_offsets[direction]
+        flat_field = self._flat
+        return (flat_field[center + forward], flat_field[center + right],
+                flat_field[center + left])
+
+    def get_neighbor_pheromones(self, x:np.ndarray, y:np.ndarray,
+                                direction:np.ndarray)->np.ndarray:
+        """Gets pheromone values of the forward, right and left neighbors of
+          arrays of points on the grid, as columns of an (n, 3) array, in one
+          gather from the bordered field."""
+        centers = self._flat_index(x, y)
+        return self._flat[centers[:, None] + self.neighbor_offsets[direction]]
+
     ######## 'Set' Functions ########
     def set_pheromone_for_point(self, x:int, y:int, value:int)->None:
         """Sets new pheromone value for one point on the grid."""
         if not self._in_bounds(x, y):
             return
+        value = min(max(value, 0), self._max_value)
+        if self.sparse:
+            self._total_pheromone += value - self.grid[y, x].item()
         self.grid[y, x] = value
+        if self.chunk_size is not None and value > 0:
+            self._active_chunks[y // self.chunk_size, x // self.chunk_size] = True
+        cell = self._flat_index(x, y)
+        if self.sparse and value > 0 and not self._tracked[cell]:
+            self._track(np.array([cell]))
+
+    def set_grid(self, field:np.ndarray)->None:
+        """Replaces the whole pheromone field, e.g. with one loaded from a
+          checkpoint. field must be size x size with the grid's dtype; it is
+          copied in chunk by chunk, so a memory-mapped field is never read
+          whole."""
+        if field.shape != (self.size, self.size) or field.dtype != self.dtype:
+            raise ValueError("Invalid field; field should be a size x size"
+                             " array of the grid's dtype.")
+        if self.chunk_size is None:
+            self.grid[:] = field
+        else:
+            for row, col, chunk in self.iter_chunks(active_only=False):
+                chunk[:] = field[row * self.chunk_size:
+                                 (row + 1) * self.chunk_size,
+                                 col * self.chunk_size:
+                                 (col + 1) * self.chunk_size]
+                self._active_chunks[row, col] = chunk.any()
+        if self.sparse:
+            # clearing only the tracked flags leaves untouched pages alone
+            self._tracked[self._cells] = False
+            for cells in self._new_cells:
+                self._tracked[cells] = False
+            self._cells = np.empty(0, dtype=np.int64)
+            self._new_cells = []
+            rows, cols = np.nonzero(self.grid)
+            self._track(self._flat_index(cols, rows))
+            self._total_pheromone = self.grid.sum().item()
+
+    def add_pheromone_for_point(self, x:int, y:int, amount:int)->None:
+        """Adds amount of pheromone to one point on the grid, saturating at
+          the largest value grid.dtype can hold."""
+        if not self._in_bounds(x, y):
+            return
+        self.set_pheromone_for_point(x, y, self.grid[y, x].item() + amount)
+
+    def add_pheromone_for_points(self, x:np.ndarray, y:np.ndarray,
+                                 amount:int)->None:
+        """Adds amount of pheromone at arrays of points on the grid. Points
+          sharing a grid space each add their amount; points off grid are
+          skipped. Sums saturate at the largest value grid.dtype can hold."""
+        in_bounds = self._in_bounds_array(x, y)
+        cells, counts = np.unique(self._flat_index(x[in_bounds], y[in_bounds]),
+                                  return_counts=True)
+        previous = self._flat[cells].astype(self._wide_dtype)
+        totals = np.clip(previous + counts * amount, 0, self._max_value)
+        self._flat[cells] = totals
+        if self.sparse:
+            self._total_pheromone += (totals - previous).sum().item()
+        if self.chunk_size is not None and amount > 0:
+            width = self.size + 2
+            self._active_chunks[(cells // width - 1) // self.chunk_size,
+                                (cells % width - 1) // self.chunk_size] = True
+        if self.sparse and amount > 0:
+            self._track(cells)
+
+    def track_occupancy(self, x:np.ndarray, y:np.ndarray)->o.OccupancyIndex:
+        """Starts keeping an OccupancyIndex of the ants on the grid, counting
+          ants currently at points (x, y), and returns it."""
+        self.occupancy = o.OccupancyIndex(self.size)
+        self.occupancy.add_points(np.asarray(x, dtype=np.int64),
+                                  np.asarray(y, dtype=np.int64))
+        return self.occupancy
+
+    ######## Chunks ########
+    def iter_chunks(self, active_only:bool=True):
+        """
+        Yields the grid chunk by chunk, so large grids can be processed
+          without touching the whole array at once.
+
+        Args:
+            active_only: Bool, True to skip chunks that have not received
+              pheromone since they last evaporated to 0. Only used when
+              chunk_size is set.
+
+        Yields:
+            row, col, chunk: Ints of the chunk's position in the chunk
+              layout, and a writable Numpy view of the chunk. A grid without
+              chunk_size is one chunk.
+
+        """
+        if self.chunk_size is None:
+            yield 0, 0, self.grid
+            return
+        if active_only:
+            positions = zip(*np.nonzero(self._active_chunks))
+        else:
+            positions = np.ndindex(self._active_chunks.shape)
+        for row, col in positions:
+            rows = slice(row * self.chunk_size, (row + 1) * self.chunk_size)
+            cols = slice(col * self.chunk_size, (col + 1) * self.chunk_size)
+            yield int(row), int(col), self.grid[rows, cols]
+
+    def snapshot(self, path:str)->None:
+        """
+        Writes the field to path as a .npy file, chunk by chunk. The file is
+          created sparse, so only chunks holding pheromone are written.
+
+        Args:
+            path: String path of the .npy file.
+
+        Returns:
+            None
+
+        """
+        output = np.lib.format.open_memmap(path, mode="w+", dtype=self.dtype,
+                                           shape=(self.size, self.size))
+        for row, col, chunk in self.iter_chunks():
+            if self.chunk_size is None:
+                output[:] = chunk
+                continue
+            output[row * self.chunk_size:(row + 1) * self.chunk_size,
+                   col * self.chunk_size:(col + 1) * self.chunk_size] = chunk
+        output.flush()
+        del output
+
+    ######## Evaporation ########
+    def evaporate(self, rate:int,
+                  executor:concurrent.futures.Executor | None = None)->None:
+        """
+        Removes rate pheromone from every grid space, stopping at 0 without
+          wrapping around for unsigned dtypes. Sparse grids only visit grid
+          spaces that hold pheromone, so the cost scales with the trail
+          footprint rather than the grid area.
+
+        Args:
+            rate: Int representing pheromone removed per grid space.
+            executor: Thread pool to evaporate dense grids on, split into row
+              bands or chunks; Numpy releases the GIL while it works on each.
+              Default None; one thread. Sparse grids always use one thread.
+
+        Returns:
+            None
+
+        """
+        if not self.sparse:
+            # raising values below rate up to rate first keeps the
+            #  subtraction from going under 0. Without chunks the whole
+            #  bordered field is evaporated, as one contiguous array is faster
+            #  than the grid view; its border stays 0.
+            if self.chunk_size is None:
+                if executor is None:
+                    _evaporate_block(self._field, rate)
+                    return
+                bands = np.array_split(
+                    self._field, -(-len(self._field) // EVAPORATE_BAND_ROWS))
+                list(executor.map(_evaporate_block, bands,
+                                  [rate] * len(bands)))
+                return
+            chunks = list(self.iter_chunks())
+            blocks = [chunk for _, _, chunk in chunks]
+            if executor is None:
+                for block in blocks:
+                    _evaporate_block(block, rate)
+            else:
+                list(executor.map(_evaporate_block, blocks,
+                                  [rate] * len(blocks)))
+            for row, col, chunk in chunks:
+                if not chunk.any():
+                    self._active_chunks[row, col] = False
+            return
+
+        if self._new_cells:
+            self._cells = np.concatenate([self._cells, *self._new_cells])
+            self._new_cells = []
+
+        previous = self._flat[self._cells]
+        values = np.maximum(previous, rate)
+        np.subtract(values, rate, out=values)
+        self._flat[self._cells] = values
+        self._total_pheromone -= (previous.astype(self._wide_dtype)
+                                  - values).sum().item()
+
+        # stop tracking grid spaces that ran out of pheromone
+        empty = values <= 0
+        self._tracked[self._cells[empty]] = False
+        self._cells = self._cells[~empty]
+
+    def get_total_pheromone(self)->float:
+        """Returns the sum of pheromone over the grid. Sparse grids keep a
+          running total, so this is O(1)."""
+        if self.sparse:
+            return self._total_pheromone
+        return sum(chunk.sum().item() for _, _, chunk in self.iter_chunks())
+
+    def get_occupied_cells(self)->int:
+        """Returns the number of grid spaces holding pheromone. Sparse grids
+          count their tracked grid spaces, so this is O(1)."""
+        if self.sparse:
+            return len(self._cells) + sum(len(cells) for cells in self._new_cells)
+        return sum(int(np.count_nonzero(chunk))
+                   for _, _, chunk in self.iter_chunks())
+
+    def get_tracked_pheromone(self)->tuple[np.ndarray, np.ndarray]:
+        """Returns the flat indices, into a size x size field, of the grid
+          spaces a sparse grid tracks, and copies of their pheromone values.
+          Every grid space holding pheromone is among them."""
+        cells = np.concatenate([self._cells, *self._new_cells])
+        values = self._flat[cells]
+        width = self.size + 2
+        return (cells // width - 1) * self.size + cells % width - 1, values
 
     ######## Helper Function ########
     def _in_bounds(self, x:int, y:int)->int:
         """Checks if (x, y) is inside grid."""
         in_bounds = 0 <= x < self.size -1 and 0 <= y < self.size -1
         return in_bounds
+
+    def _in_bounds_array(self, x:np.ndarray, y:np.ndarray)->np.ndarray:
+        """Checks which (x, y) points are inside grid, same bounds as
+          _in_bounds."""
+        in_bounds = (0 <= x) & (x < self.size - 1) & (0 <= y) & (y < self.size - 1)
+        return in_bounds
+
+    def _flat_index(self, x:int | np.ndarray,
+                    y:int | np.ndarray)->int | np.ndarray:
+        """Converts (x, y) points on the grid to indices into the flattened
+          bordered field."""
+        return (y + 1) * (self.size + 2) + x + 1
+
+    def _track(self, cells:np.ndarray)->None:
+        """Starts tracking the flat field indices in cells for sparse
+          evaporation, skipping ones already tracked."""
+        cells = np.unique(cells[~self._tracked[cells]])
+        if len(cells):
+            self._tracked[cells] = True
+            self._new_cells.append(cells)
+
+
+def _evaporate_block(block:np.ndarray, rate:int)->None:
+    """Removes rate pheromone from every grid space in block, a writable
+      view of a dense field, stopping at 0."""
+    np.maximum(block, rate, out=block)
+    np.subtract(block, rate, out=block)
@@ -3,9 +3,15 @@
 import simulation_run as sr
 
 
-def run_figures():
+def run_figures(seed:int | None = None, cache_dir:str | None = None):
     """
     Runs simulations for parameters of figure 3a, b, c from the paper. 
+
+    Args:
+        seed: Int seeding every figure's run, so reruns give the same
+          figures. Default None; fresh OS entropy.
+        cache_dir: String path of a result cache directory; seeded reruns
+          load finished results from it instead of simulating. Default None.
     """
 
     # figure names, fidelity - probability per iteration of an ant remaining
@@ -21,7 +27,7 @@ def run_figures():
 
     for figure, fidelity in configs:
         sr.run_simulation(grid_size, fidelity, tau, figure, num_steps, 
-                          verbose, live_vis)
+                          verbose, live_vis, seed=seed, cache_dir=cache_dir)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,118 @@
+""" Contains MetricsRecorder class, records per-step simulation statistics
+ into preallocated arrays and writes them out as columns at the end of a
+ run. """
+
+# imports
+import numpy as np
+import grid as g
+import simulation_setup as ss
+
+# recorded columns, in file order
+COLUMNS = ("step", "F", "L", "live", "exited", "total_pheromone",
+           "occupied_cells")
+
+
+######## MetricsRecorder class ########
+class MetricsRecorder:
+    """
+    Records per-step statistics of a simulation. Every column is preallocated
+      for num_steps rows, so recording a step only writes one row. Values are
+      read from counters the ants and grid already keep where there are
+      any: recording is O(1) per step only on the array engine (kept
+      follower count) with sparse evaporation (kept pheromone total and
+      occupied count). Otherwise each row counts the followers in the list
+      of Ant objects and sums the field, scans the step itself already
+      makes when moving every ant and evaporating the dense grid; use
+      run_simulation's metrics_every to record every few steps instead.
+
+    Attributes:
+        num_steps: Int representing the number of rows preallocated.
+        num_recorded: Int representing the number of rows recorded so far.
+        columns: Dict of Numpy arrays, one per name in COLUMNS.
+    """
+
+    def __init__(self, num_steps:int)->None:
+        if num_steps < 0:
+            raise ValueError("Invalid number of steps; num_steps must not be"
+                             " negative.")
+        self.num_steps = num_steps
+        self.num_recorded = 0
+        self.columns = {name: np.zeros(num_steps, dtype=np.int64)
+                        for name in COLUMNS}
+        self.columns["total_pheromone"] = np.zeros(num_steps, dtype=float)
+
+    def __repr__(self)->str:
+        return f"metrics recorder | steps recorded: {self.num_recorded} of {self.num_steps}"
+
+    def record(self, step:int, ants_on_grid, simulation_grid:g.Grid,
+               exited:int)->None:
+        """
+        Records one row of statistics after a simulation step. O(1) for an
+          AntPopulation on a sparse grid; O(number of ants) for a list of
+          Ant objects and O(grid area) for a dense grid, see the class
+          docstring.
+
+        Args:
+            step: Int representing the iteration number.
+            ants_on_grid: List of Ant objects on simulation_grid, or an
+              AntPopulation.
+            simulation_grid: Grid object representing lattice ants are being
+              simulated on.
+            exited: Int representing the number of ants that have left the
+              grid.
+
+        Returns:
+            None
+
+        """
+        if self.num_recorded >= self.num_steps:
+            raise IndexError("Invalid step; all preallocated steps are"
+                             " recorded.")
+        row = self.num_recorded
+        F = ss.total_F_value(ants_on_grid)
+        live = len(ants_on_grid)
+        self.columns["step"][row] = step
+        self.columns["F"][row] = F
+        self.columns["L"][row] = live - F
+        self.columns["live"][row] = live
+        self.columns["exited"][row] = exited
+        self.columns["total_pheromone"][row] = \
+            simulation_grid.get_total_pheromone()
+        self.columns["occupied_cells"][row] = \
+            simulation_grid.get_occupied_cells()
+        self.num_recorded += 1
+
+    @classmethod
+    def from_dict(cls, recorded:dict)->"MetricsRecorder":
+        """Makes a recorder holding the rows of recorded, a dict of columns
+          like the one as_dict returns."""
+        recorder = cls(len(recorded["step"]))
+        for name in COLUMNS:
+            recorder.columns[name][:] = recorded[name]
+        recorder.num_recorded = recorder.num_steps
+        return recorder
+
+    def as_dict(self)->dict:
+        """Returns the recorded rows of every column."""
+        return {name: values[:self.num_recorded]
+                for name, values in self.columns.items()}
+
+    def save(self, path:str)->None:
+        """
+        Writes the recorded rows to path, one column per statistic: a ".npz"
+          file of arrays, or otherwise a CSV file with a header row.
+
+        Args:
+            path: String path of the output file.
+
+        Returns:
+            None
+
+        """
+        recorded = self.as_dict()
+        if path.lower().endswith(".npz"):
+            np.savez(path, **recorded)
+            return
+        table = np.column_stack([recorded[name] for name in COLUMNS])
+        np.savetxt(path, table, delimiter=",", header=",".join(COLUMNS),
+                   comments="", fmt=["%d"] * 5 + ["%.17g", "%d"])
@@ -0,0 +1,126 @@
+""" Contains OccupancyIndex class, a per-grid-space count of ants kept up to
+ date as ants spawn, move and leave, for density and crowding queries that
+ do not scan the ants. """
+
+# imports
+import numpy as np
+
+
+######## OccupancyIndex class ########
+class OccupancyIndex:
+    """
+    Number of ants on each grid space, updated incrementally. Kept by a Grid
+      once Grid.track_occupancy is called.
+
+    Attributes:
+        size: Int representing the number of points per grid side.
+        counts: Numpy 2D array of ints, the number of ants on each grid space,
+          indexed [y, x].
+        total: Int representing the number of ants counted.
+    """
+
+    def __init__(self, size:int)->None:
+        self.size = size
+        self.counts = np.zeros((size, size), dtype=np.int32)
+        self.total = 0
+        self._flat = self.counts.reshape(-1)
+        # summed-area table for region queries, rebuilt after changes
+        self._summed = None
+
+    def __repr__(self)->str:
+        return f"occupancy index | size: {self.size}x{self.size}, ants: {self.total}"
+
+    ######## Updates ########
+    def add(self, x:int, y:int)->None:
+        """Counts one ant arriving at (x, y)."""
+        self.counts[y, x] += 1
+        self.total += 1
+        self._summed = None
+
+    def remove(self, x:int, y:int)->None:
+        """Counts one ant leaving (x, y)."""
+        self.counts[y, x] -= 1
+        self.total -= 1
+        self._summed = None
+
+    def move(self, x:int, y:int, new_x:int, new_y:int)->None:
+        """Counts one ant moving from (x, y) to (new_x, new_y)."""
+        self.counts[y, x] -= 1
+        self.counts[new_y, new_x] += 1
+        self._summed = None
+
+    def add_points(self, x:np.ndarray, y:np.ndarray)->None:
+        """Counts one ant arriving at each of the points (x, y)."""
+        np.add.at(self._flat, y * self.size + x, 1)
+        self.total += len(x)
+        self._summed = None
+
+    def remove_points(self, x:np.ndarray, y:np.ndarray)->None:
+        """Counts one ant leaving each of the points (x, y)."""
+        np.subtract.at(self._flat, y * self.size + x, 1)
+        self.total -= len(x)
+        self._summed = None
+
+    def reset(self, x:np.ndarray, y:np.ndarray)->None:
+        """Recounts the index from scratch for ants at points (x, y)."""
+        self.counts[:] = 0
+        self.total = 0
+        self.add_points(x, y)
+
+    ######## Queries ########
+    def count_at(self, x:int, y:int)->int:
+        """Returns the number of ants on grid space (x, y)."""
+        return int(self.counts[y, x])
+
+    def count_in_region(self, x0:int, y0:int, x1:int, y1:int)->int:
+        """Returns the number of ants with x0 <= x < x1 and y0 <= y < y1."""
+        return int(self.counts[y0:y1, x0:x1].sum())
+
+    def count_in_regions(self, x0:np.ndarray, y0:np.ndarray, x1:np.ndarray,
+                         y1:np.ndarray)->np.ndarray:
+        """
+        Counts the ants in many rectangular regions at once. A summed-area
+          table is built on the first query after ants move, then each
+          region costs O(1).
+
+        Args:
+            x0: Numpy array of ints of the regions' first columns.
+            y0: Numpy array of ints of the regions' first rows.
+            x1: Numpy array of ints of the columns just past the regions.
+            y1: Numpy array of ints of the rows just past the regions.
+
+        Returns:
+            counts: Numpy array of ints, the number of ants in each region.
+
+        """
+        if self._summed is None:
+            self._summed = np.zeros((self.size + 1, self.size + 1),
+                                    dtype=np.int64)
+            np.cumsum(np.cumsum(self.counts, axis=0), axis=1,
+                      out=self._summed[1:, 1:])
+        summed = self._summed
+        return summed[y1, x1] - summed[y0, x1] - summed[y1, x0] \
+            + summed[y0, x0]
+
+    def density_stats(self, crowded:int = 2)->dict:
+        """
+        Summarizes how ants are spread over the grid.
+
+        Args:
+            crowded: Int representing the number of ants from which a grid
+              space counts as crowded. Default 2.
+
+        Returns:
+            Dict of number of "ants", "occupied_cells" holding at least one
+              ant, "max_count" on one grid space, "mean_occupied_count" over
+              occupied grid spaces and "crowded_cells".
+
+        """
+        occupied = int(np.count_nonzero(self.counts))
+        return {
+            "ants": self.total,
+            "occupied_cells": occupied,
+            "max_count": int(self.counts.max()),
+            "mean_occupied_count": self.total / occupied if occupied else 0.0,
+            "crowded_cells": int(np.count_nonzero(self.counts >= crowded)),
+        }
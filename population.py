@@ -0,0 +1,394 @@
+""" File containing AntPopulation class, stores every ant on the grid as NumPy
+ arrays so a whole population moves one grid space per turn at once. """
+
+# imports
+import numpy as np
+import fidelity as fi
+import grid as g
+import sampling as sp
+
+######## Global Variables ########
+from constants import (EXPLORE, EXPLORER_CODE, FOLLOW_CONTINUE, FOLLOW_DROP,
+                       FOLLOWER_CODE)
+from grid import DIRECTION_DX, DIRECTION_DY
+
+
+######## AntPopulation class ########
+class AntPopulation:
+    """
+    Represents every ant agent on the grid as a structure of arrays. Index i
+      of each array describes the same ant; only the first `count` entries
+      are in use, the rest is spare capacity. Ants that leave the grid are
+      swap-removed, so the first `count` entries are always on the grid.
+
+    Attributes:
+        x: Numpy array of ints representing x-locations at current timestep.
+        y: Numpy array of ints representing y-locations at current timestep.
+        direction: Numpy array of ints (0-7) representing direction of each
+          ant's movement; orients what direction is "forward".
+        state: Numpy array of state codes: EXPLORER_CODE or FOLLOWER_CODE.
+        on_grid: Numpy array of bools, False once an ant crosses the grid
+          boundary, until the ant is removed at the end of the move.
+        count: Int representing the number of ants on the grid.
+        exited: Int representing the number of ants that have left the grid
+          since the population was created.
+        followers: Int representing the number of follower ants on the grid,
+          kept up to date whenever ant states change.
+        B: Tuple representing the turning kernels (B1, B2, B3, B4), shared by
+          every ant in the population.
+        p_straight: Float between 0 and 1 representing the probability that an
+          exploratory ant will go forward rather than turn.
+        turn_kernel: TurnKernel of precomputed turn probabilities for B.
+        stream: RandomStream the population draws its random numbers from.
+          Default is the shared sampling.DEFAULT_STREAM.
+    """
+
+    # names of the per-ant arrays, grown and compacted together
+    _ARRAYS = ("x", "y", "direction", "state", "on_grid")
+
+    def __init__(self, capacity:int = 1024,
+                 B:tuple[float, float, float, float] =
+                 (0.360, 0.047, 0.008, 0.002),
+                 stream:sp.RandomStream | None = None)-> None:
+        if capacity <= 0:
+            raise ValueError("Invalid capacity; capacity must be larger than 0.")
+        self.B = B
+        self.p_straight = 1-sum(B)
+        self.turn_kernel = sp.get_turn_kernel(tuple(B))
+        self.stream = sp.DEFAULT_STREAM if stream is None else stream
+        self.count = 0
+        self.exited = 0
+        self.followers = 0
+        self.x = np.zeros(capacity, dtype=np.int64)
+        self.y = np.zeros(capacity, dtype=np.int64)
+        self.direction = np.zeros(capacity, dtype=np.int64)
+        self.state = np.zeros(capacity, dtype=np.int8)
+        self.on_grid = np.zeros(capacity, dtype=bool)
+
+    def __len__(self)->int:
+        return self.count
+
+    def __repr__(self)->str:
+        return f"ant population | on grid: {self.count}, exited: {self.exited}, followers: {self.num_followers()}, explorers: {self.num_explorers()}, turning kernel (B): {self.B}"
+
+    ######## 'Get' Functions ########
+    def get_active(self)->np.ndarray:
+        """Gets indices of ants that are on the grid."""
+        return np.arange(self.count)
+
+    def get_locations(self)->tuple[np.ndarray, np.ndarray]:
+        """Gets x, y locations of ants that are on the grid."""
+        return self.x[:self.count], self.y[:self.count]
+
+    def get_directions(self)->np.ndarray:
+        """Gets directions of ants that are on the grid."""
+        return self.direction[:self.count]
+
+    def num_on_grid(self)->int:
+        """Returns number of ants on the grid."""
+        return self.count
+
+    def num_exited(self)->int:
+        """Returns number of ants that have left the grid."""
+        return self.exited
+
+    def num_followers(self)->int:
+        """Returns number of follower ants on the grid."""
+        return self.followers
+
+    def num_explorers(self)->int:
+        """Returns number of explorer ants on the grid."""
+        return self.count - self.followers
+
+    ######## Population Functions ########
+    def add_ants(self, x:int, y:int, number:int = 1)->None:
+        """
+        Adds new explorer ants at (x, y) with random directions.
+
+        Args:
+            x: Int representing x-location of the new ants.
+            y: Int representing y-location of the new ants.
+            number: Int representing number of ants to add. Default 1.
+
+        Returns:
+            None
+
+        """
+        start = self.count
+        stop = start + number
+        if stop > len(self.x):
+            self._grow(stop)
+
+        self.x[start:stop] = x
+        self.y[start:stop] = y
+        self.direction[start:stop] = self.stream.integers(8, number)
+        self.state[start:stop] = EXPLORER_CODE
+        self.on_grid[start:stop] = True
+        self.count = stop
+
+    def add_ants_at(self, x:np.ndarray, y:np.ndarray)->None:
+        """
+        Adds one new explorer ant at each of the points (x, y), e.g. at
+          several hills, drawing every direction in one batch.
+
+        Args:
+            x: Numpy array of ints of the new ants' x-locations.
+            y: Numpy array of ints of the new ants' y-locations.
+
+        Returns:
+            None
+
+        """
+        start = self.count
+        stop = start + len(x)
+        if stop > len(self.x):
+            self._grow(stop)
+
+        self.x[start:stop] = x
+        self.y[start:stop] = y
+        self.direction[start:stop] = self.stream.integers(8, stop - start)
+        self.state[start:stop] = EXPLORER_CODE
+        self.on_grid[start:stop] = True
+        self.count = stop
+
+    def set_ants(self, x:np.ndarray, y:np.ndarray, direction:np.ndarray,
+                 state:np.ndarray)->None:
+        """
+        Replaces every ant with the given ones, e.g. when restoring a
+          checkpoint. No random numbers are drawn.
+
+        Args:
+            x: Numpy array of ant x-locations.
+            y: Numpy array of ant y-locations.
+            direction: Numpy array of ant directions (0-7).
+            state: Numpy array of ant state codes.
+
+        Returns:
+            None
+
+        """
+        number = len(x)
+        if number > len(self.x):
+            self._grow(number)
+        self.x[:number] = x
+        self.y[:number] = y
+        self.direction[:number] = direction
+        self.state[:number] = state
+        self.on_grid[:number] = True
+        self.count = number
+        self.followers = int(np.count_nonzero(state == FOLLOWER_CODE))
+
+    def _grow(self, min_capacity:int)->None:
+        """Doubles array capacity until it holds at least min_capacity ants."""
+        capacity = len(self.x)
+        while capacity < min_capacity:
+            capacity *= 2
+        for name in self._ARRAYS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def remove_ants(self, ants:np.ndarray)->None:
+        """
+        Removes ants by moving the last stored ants into their slots, so the
+          cost scales with the number of removed ants, not the population.
+
+        Args:
+            ants: Numpy array of unique indices of the ants to remove.
+
+        Returns:
+            None
+
+        """
+        number = len(ants)
+        if number == 0:
+            return
+        new_count = self.count - number
+        self.followers -= int(np.count_nonzero(self.state[ants] == FOLLOWER_CODE))
+
+        # slots below new_count left empty, and kept ants above new_count
+        #  that fill them
+        removed = np.zeros(number, dtype=bool)
+        tail = ants[ants >= new_count] - new_count
+        removed[tail] = True
+        holes = ants[ants < new_count]
+        movers = new_count + np.flatnonzero(~removed)
+
+        for name in self._ARRAYS:
+            values = getattr(self, name)
+            values[holes] = values[movers]
+        self.count = new_count
+        self.exited += number
+
+    ######## Explorer Movement Determination ########
+    def explorer_turn(self, number:int)->np.ndarray:
+        """
+        Determines if each of number explorer ants will move straight or
+          randomly turn, same distribution as Ant.explorer_turn.
+
+        Args:
+            number: Int representing number of explorer ants turning.
+
+        Returns:
+            delta_turn: Numpy array of ints of value +/- 1, 2, 3, 4, 0
+              representing the number of 45 degree units to turn.
+
+        """
+        delta_turn = self.turn_kernel.explorer_turns(
+            self.stream.uniforms(number))
+        return delta_turn
+
+    ######## Follower Movement Determination ########
+    def follower_turn(self, followers:np.ndarray,
+                      grid:g.Grid)->tuple[np.ndarray, np.ndarray]:
+        """
+        Determines if follower ants will continue following path or switch to
+          explorer, scanning the left, forward and right grid spaces of every
+          follower at once.
+
+        Args:
+            followers: Numpy array of indices of follower ants.
+            grid: Grid representing grid used in simulation.
+
+        Returns:
+            delta_turn: Numpy array of ints of value +/- 1 or 0 for ants that
+              keep following; entries for ants that lost the trail are 0.
+            lost: Numpy array of bools, True where the ant switches to
+              explorer.
+
+        """
+        C_0, C_1, C_7 = self._neighbor_pheromone(grid, followers).T
+
+        # same rules as Ant.follower_turn: forward if it has the most
+        #  pheromone, otherwise the stronger side, otherwise lost
+        straight = (C_0 > C_1) & (C_0 > C_7)
+        delta_turn = np.where(C_1 > C_7, 1, -1)
+        delta_turn[straight] = 0
+        lost = ~straight & (C_1 == C_7)
+        delta_turn[lost] = 0
+        return delta_turn, lost
+
+    def update_direction(self, ants:np.ndarray, grid:g.Grid,
+                         fidelity:int | fi.FidelityTable)->dict:
+        """
+        Updates the direction of the given ants, see Ant.update_direction.
+
+        Args:
+            ants: Numpy array of indices of the ants to update.
+            grid: Grid object used in simulation.
+            fidelity: Int representing the user input fidelity value.
+              Probability that the ant will stay on the path. A FidelityTable
+              gives each ant the fidelity for the concentration at its
+              location.
+
+        Returns:
+            decisions: Dict of int number of ants that took each path, keyed
+              EXPLORE, FOLLOW_CONTINUE and FOLLOW_DROP.
+
+        """
+        if isinstance(fidelity, fi.FidelityTable):
+            fidelity = fidelity.fidelities_at(
+                self._local_pheromone(grid, ants))
+        following = self.determine_state(ants, fidelity)
+        delta_turn = np.zeros(len(ants), dtype=np.int64)
+
+        follower_delta, lost = self.follower_turn(ants[following], grid)
+        delta_turn[following] = follower_delta
+
+        # lost followers become explorers and turn like them
+        exploring = ~following
+        exploring[np.flatnonzero(following)[lost]] = True
+        self.state[ants[exploring]] = EXPLORER_CODE
+        num_lost = int(np.count_nonzero(lost))
+        self.followers -= num_lost
+        delta_turn[exploring] = self.explorer_turn(
+            int(np.count_nonzero(exploring)))
+
+        self.direction[ants] = (self.direction[ants] + delta_turn) % 8
+
+        return {
+            EXPLORE: len(ants) - len(lost),
+            FOLLOW_CONTINUE: len(lost) - num_lost,
+            FOLLOW_DROP: num_lost,
+        }
+
+    def determine_state(self, ants:np.ndarray,
+                        fidelity:int | np.ndarray)->np.ndarray:
+        """
+        Determines whether each ant is follower or explorer based on fidelity.
+
+        Args:
+            ants: Numpy array of indices of the ants to update.
+            fidelity: Int representing the user input fidelity value, or a
+              Numpy array of ints with one fidelity per ant.
+
+        Returns:
+            following: Numpy array of bools, True for follower ants.
+
+        """
+        following = self.stream.integers(257, len(ants)) < fidelity
+        was_following = self.state[ants] == FOLLOWER_CODE
+        self.followers += int(np.count_nonzero(following)
+                              - np.count_nonzero(was_following))
+        self.state[ants] = np.where(following, FOLLOWER_CODE, EXPLORER_CODE)
+        return following
+
+    ######## Movement and Pheromone ########
+    def move(self, ants:np.ndarray, grid:g.Grid)->int:
+        """
+        Moves the given ants one lattice grid in their direction. Ants moving
+          across the grid boundary are marked off grid and removed, which
+          reorders the remaining ants.
+
+        Args:
+            ants: Numpy array of indices of the ants to move.
+            grid: Grid object representing the grid on which the ants move.
+
+        Returns:
+            number_exited: Int representing the number of ants that left the
+              grid.
+
+        """
+        direction = self.direction[ants]
+        new_x = self.x[ants] + DIRECTION_DX[direction]
+        new_y = self.y[ants] + DIRECTION_DY[direction]
+
+        inside = ((0 <= new_x) & (new_x < grid.size)
+                  & (0 <= new_y) & (new_y < grid.size))
+        if grid.occupancy is not None:
+            grid.occupancy.remove_points(self.x[ants], self.y[ants])
+            grid.occupancy.add_points(new_x[inside], new_y[inside])
+        self.x[ants[inside]] = new_x[inside]
+        self.y[ants[inside]] = new_y[inside]
+
+        leaving = ants[~inside]
+        self.on_grid[leaving] = False
+        self.remove_ants(np.unique(leaving))
+        return len(leaving)
+
+    def deposit(self, ants:np.ndarray, grid:g.Grid, tau:int)->None:
+        """
+        Places tau pheromone at the location of each given ant.
+
+        Args:
+            ants: Numpy array of indices of the depositing ants.
+            grid: Grid object representing the grid ants deposit onto.
+            tau: Int representing "units" of pheromone per ant.
+
+        Returns:
+            None
+
+        """
+        grid.add_pheromone_for_points(self.x[ants], self.y[ants], tau)
+
+    def _local_pheromone(self, grid:g.Grid, ants:np.ndarray)->np.ndarray:
+        """Reads the pheromone at the grid spaces of the given ants."""
+        return grid.get_pheromone_for_points(self.x[ants], self.y[ants])
+
+    def _neighbor_pheromone(self, grid:g.Grid, ants:np.ndarray)->np.ndarray:
+        """Reads the pheromone the given ants see at their forward, right and
+          left grid spaces, as columns of an (n, 3) array."""
+        return grid.get_neighbor_pheromones(self.x[ants], self.y[ants],
+                                            self.direction[ants])
+
@@ -0,0 +1,101 @@
+""" Contains StepProfiler class, accumulates wall time and call counts per
+ simulation step phase and per ant direction decision. Steps only time
+ themselves when given a profiler, so profiling costs nothing when off. """
+
+# imports
+import contextlib
+import json
+import time
+
+######## Global Variables ########
+from constants import DECISIONS, STEP_PHASES
+
+
+######## StepProfiler class ########
+class StepProfiler:
+    """
+    Accumulates wall time and call counts of simulation steps, see
+      simulation_setup.simulation_step and population_step.
+
+    Attributes:
+        phase_seconds: Dict of float seconds spent in each of STEP_PHASES.
+        phase_calls: Dict of int calls to each of STEP_PHASES. The object
+          engine counts one deposit and move call per ant, the array engine
+          one per step.
+        decision_seconds: Dict of float seconds spent choosing a direction
+          along each of DECISIONS. Only timed on the object engine, where each
+          ant decides on its own; part of the move phase.
+        decision_calls: Dict of int number of ant decisions along each of
+          DECISIONS.
+    """
+
+    def __init__(self)->None:
+        self.phase_seconds = dict.fromkeys(STEP_PHASES, 0.0)
+        self.phase_calls = dict.fromkeys(STEP_PHASES, 0)
+        self.decision_seconds = dict.fromkeys(DECISIONS, 0.0)
+        self.decision_calls = dict.fromkeys(DECISIONS, 0)
+
+    def __repr__(self)->str:
+        return f"step profiler | calls: {self.phase_calls}"
+
+    ######## Recording ########
+    @contextlib.contextmanager
+    def phase(self, name:str):
+        """Times the code inside a with block as one call of phase name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_seconds[name] += time.perf_counter() - start
+            self.phase_calls[name] += 1
+
+    def add_decision(self, decision:str, seconds:float = 0.0,
+                     calls:int = 1)->None:
+        """Adds calls ant decisions along path decision, taking seconds in
+          total."""
+        self.decision_seconds[decision] += seconds
+        self.decision_calls[decision] += calls
+
+    ######## Output ########
+    def as_dict(self)->dict:
+        """Returns the accumulated times and counts as a JSON-ready dict."""
+        return {
+            "phase_seconds": dict(self.phase_seconds),
+            "phase_calls": dict(self.phase_calls),
+            "decision_seconds": dict(self.decision_seconds),
+            "decision_calls": dict(self.decision_calls),
+        }
+
+    def report(self)->str:
+        """
+        Formats the accumulated times and counts as a table, with each
+          phase's share of the total step time.
+
+        Args:
+            None
+
+        Returns:
+            report: String of one line per phase and per decision path.
+
+        """
+        total = sum(self.phase_seconds.values())
+        lines = [f"{'phase':<16}{'seconds':>10}{'share':>8}{'calls':>12}"]
+        for name in STEP_PHASES:
+            seconds = self.phase_seconds[name]
+            share = seconds / total if total > 0 else 0.0
+            lines.append(f"{name:<16}{seconds:>10.4f}{share:>8.1%}"
+                         f"{self.phase_calls[name]:>12}")
+        lines.append(f"{'decision':<16}{'seconds':>10}{'':>8}{'calls':>12}")
+        for name in DECISIONS:
+            # decisions made in batches are counted but not timed
+            seconds = f"{self.decision_seconds[name]:>10.4f}"
+            if self.decision_seconds[name] == 0 and self.decision_calls[name]:
+                seconds = f"{'-':>10}"
+            lines.append(f"{name:<16}{seconds}{'':>8}"
+                         f"{self.decision_calls[name]:>12}")
+        return "\n".join(lines)
+
+    def save(self, path:str)->None:
+        """Writes the accumulated times and counts to path as JSON."""
+        with open(path, "w", encoding="utf-8") as profile_file:
+            json.dump(self.as_dict(), profile_file, indent=2)
@@ -0,0 +1,218 @@
+""" Contains ResultCache class, an on-disk cache of finished simulation
+ results keyed by a hash of the run configuration and the simulation code,
+ so repeated runs of the same seeded configuration return instantly. """
+
+# imports
+import functools
+import hashlib
+import json
+import os
+import numpy as np
+import ants as a
+import checkpoint as cp
+import grid as g
+import population as p
+
+# configuration keys that decide a run's results; sparse evaporation and the
+#  grid backend give identical results, so they are left out
+CONFIG_KEYS = ("grid_size", "fidelity", "tau", "B", "num_steps", "seed",
+               "engine", "grid_dtype", "tile_size", "spawner", "convergence")
+
+# source files whose code decides a run's results or how they are stored:
+#  every module run_simulation imports, other than the lazily imported
+#  visualize
+SOURCE_FILES = ("ants.py", "checkpoint.py", "constants.py", "convergence.py",
+                "fidelity.py", "grid.py", "metrics.py", "occupancy.py",
+                "population.py", "profiling.py", "result_cache.py",
+                "sampling.py", "simulation_setup.py", "simulation_run.py",
+                "snapshots.py", "spawning.py", "tiled.py")
+
+# default cache size limit, 1 GiB
+DEFAULT_MAX_BYTES = 2**30
+
+# prefix of metrics columns inside a cache entry
+_METRICS_PREFIX = "metrics_"
+
+
+######## Code version ########
+@functools.lru_cache(maxsize=None)
+def code_version()->str:
+    """Returns a hash of SOURCE_FILES, so cache entries made by different
+      simulation code never match."""
+    digest = hashlib.sha256()
+    directory = os.path.dirname(os.path.abspath(__file__))
+    for name in SOURCE_FILES:
+        with open(os.path.join(directory, name), "rb") as source_file:
+            digest.update(source_file.read())
+    return digest.hexdigest()[:16]
+
+
+######## ResultCache class ########
+class ResultCache:
+    """
+    Directory of finished simulation results, one compressed .npz file per
+      configuration. Entries hold final F, L, live and exited counts, the
+      final pheromone field and ants and, when recorded, the metrics time
+      series. Once the directory grows past max_bytes, the least recently
+      used entries are removed.
+
+    Attributes:
+        directory: String path of the cache directory.
+        max_bytes: Int representing the largest total size of all entries.
+        hits: Int representing number of lookups that found an entry.
+        misses: Int representing number of lookups that did not.
+    """
+
+    def __init__(self, directory:str, max_bytes:int = DEFAULT_MAX_BYTES)->None:
+        if max_bytes <= 0:
+            raise ValueError("Invalid max_bytes; max_bytes must be larger"
+                             " than 0.")
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def __repr__(self)->str:
+        return f"result cache | directory: {self.directory}, hits: {self.hits}, misses: {self.misses}"
+
+    @staticmethod
+    def key(config:dict)->str:
+        """Returns the cache key of config, a dict with one value for each of
+          CONFIG_KEYS, combined with the current code_version."""
+        text = json.dumps({name: config[name] for name in CONFIG_KEYS},
+                          sort_keys=True)
+        return hashlib.sha256(
+            (code_version() + text).encode("utf-8")).hexdigest()
+
+    def _path(self, key:str)->str:
+        """Returns the file path of the entry for key."""
+        return os.path.join(self.directory, key + ".npz")
+
+    ######## Lookup ########
+    def get(self, key:str, config:dict, sparse:bool = False,
+            need_metrics:bool = False)->dict | None:
+        """
+        Looks up the results stored for key.
+
+        Args:
+            key: String cache key, see ResultCache.key.
+            config: Dict of the run configuration, used to rebuild the grid
+              and ants.
+            sparse: Boolean to rebuild the grid with sparse evaporation.
+            need_metrics: Boolean, True to only accept an entry holding the
+              metrics time series.
+
+        Returns:
+            results: Dict like the one run_simulation returns, with the
+              rebuilt "ants" added, or None when there is no usable entry.
+
+        """
+        path = self._path(key)
+        try:
+            with np.load(path) as entry:
+                stored = {name: entry[name] for name in entry.files}
+        except (FileNotFoundError, OSError, ValueError):
+            # missing, evicted by another process, or cut off while writing
+            self.misses += 1
+            return None
+        metrics = {name[len(_METRICS_PREFIX):]: values
+                   for name, values in stored.items()
+                   if name.startswith(_METRICS_PREFIX)}
+        if need_metrics and not metrics:
+            self.misses += 1
+            return None
+        self.hits += 1
+        # mark as recently used
+        os.utime(path)
+
+        simulation_grid = g.Grid(config["grid_size"], sparse=sparse,
+                                 dtype=config["grid_dtype"])
+        simulation_grid.set_grid(stored["grid"])
+        results = {
+            "F": int(stored["F"]),
+            "L": int(stored["L"]),
+            "live": int(stored["live"]),
+            "exited": int(stored["exited"]),
+            "grid": simulation_grid,
+            "ants": cp.ants_from_arrays(
+                stored["ant_x"], stored["ant_y"], stored["ant_direction"],
+                stored["ant_state"], tuple(config["B"]), config["engine"],
+                exited=int(stored["exited"])),
+        }
+        if metrics:
+            results["metrics"] = metrics
+        if "converged_step" in stored:
+            converged_step = int(stored["converged_step"])
+            results["converged_step"] = (None if converged_step < 0
+                                         else converged_step)
+        return results
+
+    ######## Storing ########
+    def put(self, key:str, results:dict,
+            ants_on_grid:list[a.Ant] | p.AntPopulation)->None:
+        """
+        Stores the results of a finished run under key, then evicts least
+          recently used entries until the cache fits in max_bytes.
+
+        Args:
+            key: String cache key, see ResultCache.key.
+            results: Dict returned by run_simulation.
+            ants_on_grid: List of Ant objects, or an AntPopulation, left on
+              the grid at the end of the run.
+
+        Returns:
+            None
+
+        """
+        x, y, direction, state, _ = cp.ant_arrays(ants_on_grid)
+        arrays = {
+            "F": results["F"],
+            "L": results["L"],
+            "live": results["live"],
+            "exited": results["exited"],
+            "grid": results["grid"].grid,
+            "ant_x": x,
+            "ant_y": y,
+            "ant_direction": direction,
+            "ant_state": state,
+        }
+        if "converged_step" in results:
+            # -1 stands for a run that never converged
+            converged_step = results["converged_step"]
+            arrays["converged_step"] = (-1 if converged_step is None
+                                        else converged_step)
+        for name, values in results.get("metrics", {}).items():
+            arrays[_METRICS_PREFIX + name] = values
+
+        # write next to the entry, then move into place, so readers never
+        #  see a partly written entry
+        path = self._path(key)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "wb") as entry_file:
+            np.savez_compressed(entry_file, **arrays)
+        os.replace(temp_path, path)
+        self.evict()
+
+    def evict(self)->None:
+        """Removes least recently used entries until the total size of all
+          entries is at most max_bytes."""
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".npz"):
+                continue
+            try:
+                status = os.stat(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                continue
+            entries.append((status.st_mtime, status.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+            total -= size
@@ -0,0 +1,220 @@
+""" File containing random sampling helpers: buffered uniform random numbers
+ and precomputed turning kernel tables for explorer ants. """
+
+# imports
+from bisect import bisect_right
+from functools import lru_cache
+import numpy as np
+
+
+######## RandomStream class ########
+class RandomStream:
+    """
+    Buffered source of uniform random floats in [0, 1). Numbers are drawn from
+      NumPy in blocks and handed out as needed, so single draws cost a list
+      read instead of a NumPy call.
+
+    Attributes:
+        block_size: Int representing how many numbers are drawn per refill.
+        generator: Numpy Generator the numbers are drawn from. None draws from
+          the global np.random state.
+    """
+
+    def __init__(self, block_size:int = 4096,
+                 generator:np.random.Generator | None = None)->None:
+        if block_size <= 0:
+            raise ValueError("Invalid block size; block_size must be larger"
+                             " than 0.")
+        self.block_size = block_size
+        self.generator = generator
+        self._values = []  # single draws, consumed from the end
+        self._block = np.empty(0)  # bulk draws, consumed from the front
+        self._position = 0
+
+    def __repr__(self)->str:
+        return f"random stream | block size: {self.block_size}, generator: {self.generator}"
+
+    def uniform(self)->float:
+        """Returns one uniform random float in [0, 1)."""
+        if not self._values:
+            self._values = self._draw(self.block_size).tolist()
+        return self._values.pop()
+
+    def uniforms(self, number:int)->np.ndarray:
+        """Returns a Numpy array of number uniform random floats in [0, 1)."""
+        if number > self.block_size:
+            return self._draw(number)
+        if self._position + number > len(self._block):
+            self._block = self._draw(self.block_size)
+            self._position = 0
+        start = self._position
+        self._position += number
+        return self._block[start:self._position]
+
+    def integer(self, high:int)->int:
+        """Returns one random int from 0 up to, not including, high."""
+        return int(self.uniform() * high)
+
+    def integers(self, high:int, number:int)->np.ndarray:
+        """Returns a Numpy array of number random ints from 0 up to, not
+          including, high."""
+        return (self.uniforms(number) * high).astype(np.int64)
+
+    def poisson(self, rate:float)->int:
+        """Returns one random int from a Poisson distribution with mean rate.
+          Drawn straight from the Generator, not from the buffered numbers."""
+        if self.generator is None:
+            return int(np.random.poisson(rate))
+        return int(self.generator.poisson(rate))
+
+    def get_state(self)->dict:
+        """
+        Gets everything needed to continue this stream later: the Generator's
+          bit generator state and the buffered numbers not yet handed out.
+
+        Returns:
+            state: Dict with "bit_generator" state dict, "values" list and
+              "block" Numpy array of unused buffered numbers.
+
+        """
+        if self.generator is None:
+            raise ValueError("Invalid stream; only streams with a Generator"
+                             " have a state to save.")
+        return {
+            "bit_generator": self.generator.bit_generator.state,
+            "values": list(self._values),
+            "block": self._block[self._position:].copy(),
+        }
+
+    def set_state(self, state:dict)->None:
+        """Continues the stream from a state returned by get_state."""
+        if self.generator is None:
+            raise ValueError("Invalid stream; only streams with a Generator"
+                             " have a state to restore.")
+        self.generator.bit_generator.state = state["bit_generator"]
+        self._values = list(state["values"])
+        self._block = np.asarray(state["block"], dtype=float)
+        self._position = 0
+
+    def _draw(self, number:int)->np.ndarray:
+        """Draws a new block of number uniform random floats."""
+        if self.generator is None:
+            return np.random.random(number)
+        return self.generator.random(number)
+
+
+# shared stream for ants that are not given their own
+DEFAULT_STREAM = RandomStream()
+
+
+######## Stream Construction ########
+def make_stream(seed:int | np.random.SeedSequence | np.random.Generator
+                | None = None)->RandomStream:
+    """
+    Makes a RandomStream for one simulation run.
+
+    Args:
+        seed: Int or SeedSequence to seed a new Generator, or a Generator to
+          draw from directly. None seeds from fresh OS entropy.
+
+    Returns:
+        RandomStream drawing from its own Generator.
+
+    """
+    if isinstance(seed, np.random.Generator):
+        return RandomStream(generator=seed)
+    return RandomStream(generator=np.random.default_rng(seed))
+
+
+def spawn_streams(seed:int | np.random.SeedSequence | None,
+                  number:int)->list[RandomStream]:
+    """
+    Makes number independent RandomStreams from one seed, e.g. one per
+      replicate or worker process. Child streams come from
+      SeedSequence.spawn, so they never overlap and the same seed always
+      gives the same streams.
+
+    Args:
+        seed: Int or SeedSequence to spawn the child streams from.
+        number: Int representing number of streams to make.
+
+    Returns:
+        List of number RandomStreams.
+
+    """
+    if not isinstance(seed, np.random.SeedSequence):
+        seed = np.random.SeedSequence(seed)
+    return [make_stream(child) for child in seed.spawn(number)]
+
+
+######## TurnKernel class ########
+class TurnKernel:
+    """
+    Precomputed cumulative distributions of explorer turns for one turning
+      kernel B, so each turn is a lookup of one uniform random number.
+
+    Attributes:
+        B: Tuple representing the turning kernels (B1, B2, B3, B4).
+        p_straight: Float representing the probability that an explorer goes
+          forward rather than turns.
+        deltas: Numpy array of every delta_turn: 0, then +/- 1, 2, 3, 4.
+        cdf: Numpy array of cumulative probabilities of deltas.
+        angles: Numpy array of turning delta_turns, +/- 1, 2, 3, 4.
+        angle_cdf: Numpy array of cumulative probabilities of angles, given
+          that the ant turns.
+    """
+
+    def __init__(self, B:tuple[float, float, float, float])->None:
+        if sum(B) <= 0:
+            raise ValueError("Invalid turning kernel; B should sum to more"
+                             " than 0.")
+        self.B = tuple(B)
+        self.p_straight = max(1 - sum(B), 0.0)
+
+        # each B kernel is split evenly between turning left and right
+        B_adjusted = np.repeat(np.array(B, dtype=float) / sum(B), 2) / 2
+        self.angles = np.array([-1, 1, -2, 2, -3, 3, -4, 4])
+        self.angle_cdf = _cumulative(B_adjusted)
+        self.deltas = np.concatenate(([0], self.angles))
+        self.cdf = _cumulative(np.concatenate(
+            ([self.p_straight], (1 - self.p_straight) * B_adjusted)))
+
+        # plain lists make single lookups cheaper than NumPy scalars
+        self._angle_list = self.angles.tolist()
+        self._angle_cdf_list = self.angle_cdf.tolist()
+        self._delta_list = self.deltas.tolist()
+        self._cdf_list = self.cdf.tolist()
+
+    def __repr__(self)->str:
+        return f"turn kernel | B: {self.B}, probability forward movement: {self.p_straight}"
+
+    def explorer_turn(self, u:float)->int:
+        """Returns the delta_turn (0 or +/- 1, 2, 3, 4) for uniform draw u."""
+        return self._delta_list[bisect_right(self._cdf_list, u)]
+
+    def explorer_turns(self, u:np.ndarray)->np.ndarray:
+        """Returns delta_turns (0 or +/- 1, 2, 3, 4) for uniform draws u."""
+        return self.deltas[np.searchsorted(self.cdf, u, side="right")]
+
+    def angle_of_turn(self, u:float)->int:
+        """Returns the turn angle (+/- 1, 2, 3, 4) for uniform draw u."""
+        return self._angle_list[bisect_right(self._angle_cdf_list, u)]
+
+    def angles_of_turn(self, u:np.ndarray)->np.ndarray:
+        """Returns turn angles (+/- 1, 2, 3, 4) for uniform draws u."""
+        return self.angles[np.searchsorted(self.angle_cdf, u, side="right")]
+
+
+@lru_cache(maxsize=None)
+def get_turn_kernel(B:tuple[float, float, float, float])->TurnKernel:
+    """Returns the TurnKernel for B, built once per distinct B tuple."""
+    return TurnKernel(B)
+
+
+######## Helper Function ########
+def _cumulative(probabilities:np.ndarray)->np.ndarray:
+    """Cumulative sum of probabilities, with the last entry pinned to 1 so
+      every draw in [0, 1) maps to an outcome."""
+    cdf = np.cumsum(probabilities)
+    cdf[-1] = 1.0
+    return cdf
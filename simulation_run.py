@@ -1,14 +1,60 @@
 """Contains simulation function. To be run in main.py."""
 
 # imports
-import matplotlib.pyplot as mp
+from collections.abc import Callable
+import contextlib
+from functools import partial
+import numpy as np
 import simulation_setup as ss
+import checkpoint as cp
+import convergence as cv
+import fidelity as fi
+import metrics as m
 import grid as g
-import visualize as v
+import population as p
+import profiling as pr
+import result_cache as rc
+import sampling as sp
+import snapshots as sn
+import spawning as sw
+import tiled as t
 
+# simulation engines: one Ant object per ant, or one AntPopulation of arrays
+ENGINES = ("object", "array")
 
-def run_simulation(grid_size:int, fidelity:int, tau:int, figure:str, num_steps:int=1500,
-                   verbose:bool = False, live_vis:bool = False):
+
+def run_simulation(grid_size:int, fidelity:int | fi.FidelityTable | Callable,
+                   tau:int, figure:str, num_steps:int=1500,
+                   verbose:bool = False, live_vis:bool = False,
+                   engine:str = "object",
+                   seed:int | np.random.SeedSequence | np.random.Generator
+                   | None = None,
+                   B:tuple[float, float, float, float] =
+                   (0.360, 0.047, 0.008, 0.002),
+                   plot:bool = True,
+                   sparse_evaporation:bool = False,
+                   grid_dtype:str = "float64",
+                   render_path:str | None = None,
+                   render_stride:int = 10,
+                   checkpoint_path:str | None = None,
+                   checkpoint_every:int = 0,
+                   resume_from:str | None = None,
+                   grid_backend:str | None = None,
+                   grid_path:str | None = None,
+                   record_metrics:bool = False,
+                   metrics_path:str | None = None,
+                   metrics_every:int = 1,
+                   profile:bool = False,
+                   profile_path:str | None = None,
+                   cache_dir:str | None = None,
+                   cache_max_bytes:int = rc.DEFAULT_MAX_BYTES,
+                   snapshot_path:str | None = None,
+                   snapshot_every:int = 50,
+                   track_occupancy:bool = False,
+                   tile_size:int | None = None,
+                   num_workers:int | None = None,
+                   spawner:sw.Spawner | None = None,
+                   convergence:cv.ConvergenceMonitor | None = None)->dict:
     """
     Function runs an ant foraging simulation and shows final result trail
       network. 
@@ -20,7 +66,10 @@ def run_simulation(grid_size:int, fidelity:int, tau:int, figure:str, num_steps:i
         grid_size: Int representing the number of points of grid, default 256
          for a 256x256 point grid.
         fidelity: Int representing the probability of an ant to keep following
-          a trail. From paper 3a: 255, 3b: 251, 3c: 247
+          a trail. From paper 3a: 255, 3b: 251, 3c: 247. Also a function of
+          the concentration at an ant's location, e.g. from
+          fidelity.saturating_fidelity, compiled into a FidelityTable at the
+          start of the run, or a ready FidelityTable.
         tau: Int representing "units" of pheromone ants deposit to their
           location on the grid at each timestep.
         figure: str representing Figure name for figure titles.
@@ -30,51 +79,302 @@ def run_simulation(grid_size:int, fidelity:int, tau:int, figure:str, num_steps:i
           Default False; off.
         live_vis: Boolean to show live visualization, nice to see steps
           dynamically but takes a lot fo time. Default False; off.
+        engine: String representing how ants are stepped: "object" moves each
+          Ant object in turn, "array" moves an AntPopulation with batched
+          array operations. Default "object".
+        seed: Int or SeedSequence seeding this run's random numbers, or a
+          Generator to draw them from. The same int seed gives identical
+          results. Default None; fresh OS entropy.
+        B: Tuple representing the turning kernels (B1, B2, B3, B4) of every
+          ant. Default (0.360, 0.047, 0.008, 0.002).
+        plot: Boolean to show the final matplotlib figure. Default True; set
+          False to run headless, e.g. in parameter sweeps.
+        sparse_evaporation: Boolean to evaporate only grid spaces holding
+          pheromone; same results, faster when trails cover little of the
+          grid. Default False; off.
+        grid_dtype: String naming the Numpy dtype pheromone is stored in,
+          e.g. "uint16" or "int32" for 4x less memory than the default
+          "float64". Integer dtypes saturate rather than wrap around.
+        render_path: String path to write frames to without a GUI: a ".gif"
+          file, or otherwise a directory of PNG frames. Default None; off.
+        render_stride: Int representing how many steps pass between rendered
+          frames. Default 10.
+        checkpoint_path: String path of a checkpoint directory to save the
+          full simulation state to. Default None; off.
+        checkpoint_every: Int representing how many steps pass between
+          checkpoints; the final step is always saved. Default 0; only the
+          final step.
+        resume_from: String path of a checkpoint to start from instead of an
+          empty grid; num_steps counts the steps already done. The grid size,
+          B, sparse_evaporation, grid_dtype and, unless grid_backend is
+          given, grid backend stored in the checkpoint are used. With seed
+          None the saved random numbers continue exactly; with a seed the run
+          forks off with new random numbers, e.g. to branch several fidelity
+          values from one warm-up. Default None.
+        grid_backend: String representing where the pheromone field lives:
+          "memory", or "memmap" for a chunked numpy.memmap file for grids
+          larger than RAM. Default None; "memory", or for resumed runs the
+          backend and chunk size of the checkpointed grid.
+        grid_path: String path of the memmap file. Default None; a temporary
+          file.
+        record_metrics: Boolean to record F, L, live and exited ants, total
+          pheromone and occupied grid spaces every metrics_every steps; O(1)
+          per row only with the "array" engine and sparse_evaporation, see
+          metrics.MetricsRecorder. Default False.
+        metrics_path: String path to write the recorded metrics to at the end
+          of the run, ".npz" or ".csv"; implies record_metrics. Default None.
+        metrics_every: Int representing how many steps pass between recorded
+          metrics rows. Default 1; every step.
+        profile: Boolean to time every step phase (spawn, deposit, move,
+          evaporate) and count ant direction decisions (explore, follow
+          continue, follow drop), printing a table at the end of the run.
+          Default False.
+        profile_path: String path of a JSON file to write the profile to;
+          implies profile. Default None.
+        cache_dir: String path of a ResultCache directory. A run with an int
+          seed whose configuration and simulation code match a stored entry
+          returns the stored results without simulating; otherwise its
+          results are stored. Runs that resume, checkpoint, render, write
+          snapshots, show live figures or profile are never cached. Default
+          None; off.
+        cache_max_bytes: Int representing the size the cache directory is
+          kept under by removing least recently used entries. Default 1 GiB.
+        snapshot_path: String path of a file to stream the field and ant
+          positions to every snapshot_every steps, written on a background
+          thread; read it back with snapshots.read_snapshots. Default None;
+          off.
+        snapshot_every: Int representing how many steps pass between
+          snapshots. Default 50.
+        track_occupancy: Boolean to keep an OccupancyIndex of ants per grid
+          space, updated as ants move, as results["grid"].occupancy. Final
+          density statistics are added as "density". Default False.
+        tile_size: Int representing the side of square tiles to split the
+          grid into, stepping each tile's ants on a thread pool; needs the
+          "array" engine, and cannot be combined with track_occupancy or
+          profiling. Results depend on tile_size, not on num_workers.
+          Default None; untiled.
+        num_workers: Int representing number of threads for tiled stepping.
+          Default None; one per CPU.
+        spawner: Spawner releasing new ants at several hills on per-hill
+          schedules, e.g. many ants per step or Poisson arrivals. Its step
+          count is reset to the run's first step. Default None; one new ant
+          per step at the grid's hill.
+        convergence: ConvergenceMonitor that stops the run early once F, L
+          and total pheromone have settled; it is reset at the start of the
+          run. The step it stopped at is added as "converged_step", None if
+          the run went all num_steps. Default None; off.
 
     Returns:
-        None
+        results: Dict with final follower count "F", explorer count "L",
+          number of ants on the grid "live", number of ants that left the grid
+          "exited" and the final "grid". With metrics recorded, "metrics" holds
+          a dict of per-step arrays; when profiling, "profile" holds the
+          accumulated times and counts.
 
     """
-    ######## Pre-simulation ########
-    # initializing grid and list to store ant population
-    ants_on_grid = []  # will store all ant objects on the grid
-    simulation_grid = g.Grid(grid_size)
+    if engine not in ENGINES:
+        raise ValueError(f"Invalid engine; engine should be one of {ENGINES}.")
+    if metrics_every <= 0:
+        raise ValueError("Invalid metrics_every; metrics_every must be larger"
+                         " than 0.")
+    # matplotlib is slow to import, so only runs that draw import it
+    if plot or live_vis or render_path is not None:
+        import matplotlib.pyplot as mp
+        import visualize as v
+    if tile_size is not None and (engine != "array" or track_occupancy
+                                  or profile or profile_path is not None):
+        raise ValueError("Invalid tile_size; tiled stepping needs the 'array'"
+                         " engine, without track_occupancy or profiling.")
 
+    if spawner is not None:
+        spawner.check_grid(grid_size)
 
-    # optional debugging output, live figure
-    if verbose:
-        print(ants_on_grid)
-        print(simulation_grid)
-        print(simulation_grid.get_hill_loc())
-    if live_vis:
-        mp.figure()
+    # concentration-dependent fidelity becomes one table read per ant
+    fidelity = fi.make_fidelity_table(fidelity, grid_dtype)
 
+    ######## Result cache ########
+    # only runs fully decided by their configuration, without side effects
+    #  beyond the final plot and metrics file, are cached
+    cache = None
+    if (cache_dir is not None and isinstance(seed, int) and resume_from is None
+            and checkpoint_path is None and render_path is None
+            and snapshot_path is None and not live_vis and not profile
+            and profile_path is None and metrics_every == 1):
+        cache = rc.ResultCache(cache_dir, cache_max_bytes)
+        if isinstance(fidelity, fi.FidelityTable):
+            config_fidelity = fidelity.thresholds.tolist()
+        else:
+            config_fidelity = int(fidelity)
+        config = {"grid_size": grid_size, "fidelity": config_fidelity,
+                  "tau": tau,
+                  "B": list(B), "num_steps": num_steps, "seed": seed,
+                  "engine": engine, "grid_dtype": str(np.dtype(grid_dtype)),
+                  "tile_size": tile_size,
+                  "spawner": (None if spawner is None
+                              else spawner.as_config()),
+                  "convergence": (None if convergence is None
+                                  else convergence.as_config())}
+        cache_key = cache.key(config)
+        record_metrics = record_metrics or metrics_path is not None
+        cached = cache.get(cache_key, config, sparse_evaporation,
+                           need_metrics=record_metrics)
+        if cached is not None:
+            ants_on_grid = cached.pop("ants")
+            if track_occupancy:
+                x, y, *_ = cp.ant_arrays(ants_on_grid)
+                cached["density"] = cached["grid"].track_occupancy(
+                    x, y).density_stats()
+            print(f"Cached result, follower ants: {cached['F']}, explorer ants:"
+                  f" {cached['L']}")
+            if metrics_path is not None:
+                m.MetricsRecorder.from_dict(cached["metrics"]).save(
+                    metrics_path)
+            if plot:
+                v.visualize_grid(ants_on_grid, cached["grid"], figure)
+            return cached
+
+    ######## Pre-simulation ########
+    # initializing random numbers, grid and container to store ant population
+    if resume_from is not None:
+        checkpoint = cp.load_checkpoint(resume_from, engine, seed,
+                                        backend=grid_backend,
+                                        grid_path=grid_path)
+        stream = checkpoint["stream"]
+        ants_on_grid = checkpoint["ants"]
+        simulation_grid = checkpoint["grid"]
+        B = checkpoint["B"]
+        start_step = checkpoint["step"]
+        exited = checkpoint["exited"]
+    else:
+        stream = sp.make_stream(seed)
+        if engine == "array":
+            ants_on_grid = p.AntPopulation(B=B, stream=stream)
+        else:
+            ants_on_grid = []  # will store all ant objects on the grid
+        simulation_grid = g.Grid(grid_size, sparse=sparse_evaporation,
+                                 dtype=grid_dtype,
+                                 backend=grid_backend or "memory",
+                                 path=grid_path)
+        start_step = 0
+        exited = 0  # running count of ants that left the grid
+    if track_occupancy:
+        x, y, *_ = cp.ant_arrays(ants_on_grid)
+        simulation_grid.track_occupancy(x, y)
+    if spawner is not None:
+        spawner.step = start_step
+    if convergence is not None:
+        convergence.reset()
+    profiler = None
+    if profile or profile_path is not None:
+        profiler = pr.StepProfiler()
+    # the tiled stepper's thread pool, the renderer and the snapshot writer
+    #  are closed when the loop ends, also if a step raises or the run is
+    #  interrupted
+    with contextlib.ExitStack() as resources:
+        if tile_size is not None:
+            stepper = t.make_tiled_stepper(simulation_grid.get_size(),
+                                           tile_size, stream, B, num_workers)
+            resources.callback(stepper.close)
+            step = partial(stepper.step, spawner=spawner)
+        elif engine == "array":
+            step = partial(ss.population_step, profiler=profiler,
+                           spawner=spawner)
+        else:
+            step = partial(ss.simulation_step, B=B, stream=stream,
+                           profiler=profiler, spawner=spawner)
 
-    ######## During simulation ########
-    # Main simulation loop
-    print("####### DURING SIMULATION #######")
-    for i in range(num_steps):
-        ss.simulation_step(ants_on_grid, simulation_grid, fidelity, tau)
 
         # optional debugging output, live figure
         if verbose:
-            print(f"Step: {i}, num ants on grid: {len(ants_on_grid)}")
+            print(ants_on_grid)
+            print(simulation_grid)
+            print(simulation_grid.get_hill_loc())
         if live_vis:
-            v.visualize_grid_live(ants_on_grid, simulation_grid, i, figure, pause=0.05)
+            mp.figure()
+        recorder = None
+        if record_metrics or metrics_path is not None:
+            # one row for every step i with (i + 1) a multiple of
+            #  metrics_every
+            recorder = m.MetricsRecorder(max(num_steps // metrics_every
+                                             - start_step // metrics_every, 0))
+        renderer = None
+        if render_path is not None:
+            renderer = v.FrameRenderer(render_path, simulation_grid, figure,
+                                       stride=render_stride)
+            resources.callback(renderer.close)
+        snapshot_writer = None
+        if snapshot_path is not None:
+            snapshot_writer = sn.SnapshotWriter(snapshot_path,
+                                                simulation_grid)
+            resources.callback(snapshot_writer.close)
+
+
+        ######## During simulation ########
+        # Main simulation loop
+        print("####### DURING SIMULATION #######")
+        end_step = max(num_steps, start_step)
+        for i in range(start_step, num_steps):
+            exited += step(ants_on_grid, simulation_grid, fidelity, tau)
+            if recorder is not None and (i + 1) % metrics_every == 0:
+                recorder.record(i, ants_on_grid, simulation_grid, exited)
+            if (checkpoint_path is not None and checkpoint_every > 0
+                    and (i + 1) % checkpoint_every == 0):
+                cp.save_checkpoint(checkpoint_path, ants_on_grid,
+                                   simulation_grid, stream, i + 1, exited, B)
+
+            # optional debugging output, live figure
+            if verbose:
+                print(f"Step: {i}, num ants on grid: {len(ants_on_grid)}")
+            if live_vis:
+                v.visualize_grid_live(ants_on_grid, simulation_grid, i,
+                                      figure, pause=0.05)
+            if renderer is not None:
+                renderer.render(ants_on_grid, simulation_grid, i)
+            if snapshot_writer is not None and (i + 1) % snapshot_every == 0:
+                snapshot_writer.write(i, ants_on_grid, simulation_grid)
+            if convergence is not None and convergence.update(
+                    i, ants_on_grid, simulation_grid):
+                print(f"Converged at step {i}")
+                end_step = i + 1
+                break
 
 
     ######## Post-simulation ########
+    if checkpoint_path is not None:
+        cp.save_checkpoint(checkpoint_path, ants_on_grid, simulation_grid,
+                           stream, end_step, exited, B)
+
     # final statistics and visualize results
     print("####### POST SIMULATION #######")
 
     # final follower and explorer ant counts
-    print(
-        f"Follower ants: {ss.total_F_value(ants_on_grid)}, Explorer ants:"
-        f" {ss.total_L_value(ants_on_grid)}"
-    )
+    results = {
+        "F": ss.total_F_value(ants_on_grid),
+        "L": ss.total_L_value(ants_on_grid),
+        "live": len(ants_on_grid),
+        "exited": exited,
+        "grid": simulation_grid,
+    }
+    print(f"Follower ants: {results['F']}, Explorer ants: {results['L']}")
+    if convergence is not None:
+        results["converged_step"] = convergence.converged_step
+    if simulation_grid.occupancy is not None:
+        results["density"] = simulation_grid.occupancy.density_stats()
+    if recorder is not None:
+        results["metrics"] = recorder.as_dict()
+        if metrics_path is not None:
+            recorder.save(metrics_path)
+    if cache is not None:
+        cache.put(cache_key, results, ants_on_grid)
+    if profiler is not None:
+        print(profiler.report())
+        results["profile"] = profiler.as_dict()
+        if profile_path is not None:
+            profiler.save(profile_path)
 
     # Visualize matplotlib of grid at final timestep
-    v.visualize_grid(ants_on_grid, simulation_grid, figure)
+    if plot:
+        v.visualize_grid(ants_on_grid, simulation_grid, figure)
 
     # optional debugging output, live figure
     if live_vis:
@@ -83,3 +383,5 @@ def run_simulation(grid_size:int, fidelity:int, tau:int, figure:str, num_steps:i
     if verbose:
         print(ants_on_grid)
         print(simulation_grid.grid)
+
+    return results
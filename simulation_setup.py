@@ -2,15 +2,26 @@
  movement, pheromones, population updates. """
 
 # imports
+import contextlib
+import time
 import ants as a
+import fidelity as fi
 import grid as g
+import population as p
+import profiling as pr
+import sampling as sp
+import spawning as sw
 
 ######## Global Variables ########
 from constants import DIRECTION_VECTORS, EXPLORER, FOLLOWER, EVAP_RATE
 
+# reusable context that does nothing, for steps run without a profiler
+_NOT_TIMED = contextlib.nullcontext()
+
 
 ######## Ant Movement ########
-def move_ant(ant:a.Ant, grid:g.Grid, fidelity:int)->None:
+def move_ant(ant:a.Ant, grid:g.Grid, fidelity:int | fi.FidelityTable,
+             profiler:pr.StepProfiler | None = None)->None:
     """
     Function moves the ant one lattice grid in the ant's chosen direction.
 
@@ -19,7 +30,10 @@ def move_ant(ant:a.Ant, grid:g.Grid, fidelity:int)->None:
           the simulation.
         grid: Grid object representing the grid on which the ant needs to move.
         fidelity: Int representing the probability of an ant to keep following
-          a trail. From paper 3a: 255, 3b: 251, 3c: 247
+          a trail. From paper 3a: 255, 3b: 251, 3c: 247. A FidelityTable
+          gives the fidelity for the concentration at each ant's location.
+        profiler: StepProfiler to time the ant's direction decision with.
+          Default None; off.
 
     Returns:
         None.
@@ -29,7 +43,12 @@ def move_ant(ant:a.Ant, grid:g.Grid, fidelity:int)->None:
         ant_x, ant_y = ant.get_location()  # gets current x/y location of ant
 
         # update direction
-        ant.update_direction(grid, fidelity)
+        if profiler is None:
+            ant.update_direction(grid, fidelity)
+        else:
+            start = time.perf_counter()
+            decision = ant.update_direction(grid, fidelity)
+            profiler.add_decision(decision, time.perf_counter() - start)
         # gets the updated 0-7 direction where ant is headed relative to 0 being 'up'.
         ant_direction = ant.get_direction()
 
@@ -41,9 +60,13 @@ def move_ant(ant:a.Ant, grid:g.Grid, fidelity:int)->None:
         # Check if ant moving across grid boundary:
         if not (0 <= new_x < grid.size and 0 <= new_y < grid.size):
             ant.set_on_grid(False)  # sets the ant as off the grid
+            if grid.occupancy is not None:
+                grid.occupancy.remove(ant_x, ant_y)
             return
 
         ant.set_location(new_x, new_y)
+        if grid.occupancy is not None:
+            grid.occupancy.move(ant_x, ant_y, new_x, new_y)
 
 
 ######## Pheromone Functions ########
@@ -65,11 +88,7 @@ def deposit_pheromone(ant:a.Ant, grid:g.Grid, tau:int)->None:
     """
     if ant.is_on_grid() == True:
         x_deposit, y_deposit = ant.get_location()
-        grid.set_pheromone_for_point(
-            x_deposit,
-            y_deposit,
-            grid.get_pheromone_for_point(x_deposit, y_deposit) + tau,
-        )
+        grid.add_pheromone_for_point(x_deposit, y_deposit, tau)
 
 def evaporate_pheromone(grid:g.Grid)->None:
     """
@@ -82,12 +101,16 @@ def evaporate_pheromone(grid:g.Grid)->None:
     Returns:
         None.
     """
-    grid.grid -= EVAP_RATE # global application evaporation rate per step
-    grid.grid[grid.grid < 0] = 0 # setting negative values to 0
+    # global application evaporation rate per step, values stop at 0. Sparse
+    #  grids only visit grid spaces that hold pheromone.
+    grid.evaporate(EVAP_RATE)
 
 
 ######## Ant Population ########
-def add_ant(ants_on_grid:list[a.Ant], hill_loc:int)->None:
+def add_ant(ants_on_grid:list[a.Ant], hill_loc:int,
+            stream:sp.RandomStream | None = None,
+            B:tuple[float, float, float, float] =
+            (0.360, 0.047, 0.008, 0.002))->None:
     """
     Function that adds an ant to the grid. Meant to be run once per timestep.
 
@@ -95,19 +118,59 @@ def add_ant(ants_on_grid:list[a.Ant], hill_loc:int)->None:
         ants_on_grid: List of Ant objects on simulation_grid. Should contain
           only ants that are on the grid.
         hill_loc: Tuple with ant hill location, default (128, 128).
+        stream: RandomStream the new ant draws from. Default is the shared
+          sampling.DEFAULT_STREAM.
+        B: Tuple representing the turning kernels (B1, B2, B3, B4) of the new
+          ant.
     
     Returns:
         ants_on_grid: ants_on_grid, but updated with another ant.
 
     """
-    ants_on_grid.append(a.Ant(x=hill_loc, y=hill_loc))
+    ants_on_grid.append(a.Ant(x=hill_loc, y=hill_loc, B=B, stream=stream))
+
+
+def spawn_ants(ants_on_grid:list[a.Ant], simulation_grid:g.Grid,
+               stream:sp.RandomStream | None = None,
+               B:tuple[float, float, float, float] =
+               (0.360, 0.047, 0.008, 0.002),
+               spawner:sw.Spawner | None = None)->None:
+    """Adds the step's new Ant objects: released by spawner, or one at the
+      grid's hill without one. Keeps the grid's occupancy index counting
+      them."""
+    if spawner is not None:
+        spawner.spawn_ants(ants_on_grid, simulation_grid, stream, B)
+        return
+    add_ant(ants_on_grid, simulation_grid.get_hill_loc(), stream, B)
+    if simulation_grid.occupancy is not None:
+        simulation_grid.occupancy.add(*ants_on_grid[-1].get_location())
+
+
+def spawn_population(population:p.AntPopulation, simulation_grid:g.Grid,
+                     spawner:sw.Spawner | None = None)->None:
+    """Adds the step's new ants to population: released by spawner, or one
+      at the grid's hill without one. Keeps the grid's occupancy index
+      counting them."""
+    if spawner is not None:
+        spawner.spawn_population(population, simulation_grid)
+        return
+    hill_loc = simulation_grid.get_hill_loc()
+    population.add_ants(hill_loc, hill_loc)
+    if simulation_grid.occupancy is not None:
+        simulation_grid.occupancy.add(hill_loc, hill_loc)
 
 
 ######## Wrapper simulation function - all functions for one step ########
 def simulation_step(ants_on_grid:list[a.Ant], simulation_grid:g.Grid,
-                     fidelity:int, tau:int)->None:
+                     fidelity:int | fi.FidelityTable, tau:int,
+                     stream:sp.RandomStream | None = None,
+                     B:tuple[float, float, float, float] =
+                     (0.360, 0.047, 0.008, 0.002),
+                     profiler:pr.StepProfiler | None = None,
+                     spawner:sw.Spawner | None = None)->int:
     """
-    Performs one time step.
+    Performs one time step. Ants that leave the grid are removed from
+      ants_on_grid in place.
 
     Args:
         ants_on_grid: List of Ant objects on simulation_grid. Should contain
@@ -115,16 +178,30 @@ def simulation_step(ants_on_grid:list[a.Ant], simulation_grid:g.Grid,
         simulation_grid: Grid object representing lattice ants are being
           simulated on.
         fidelity: Int representing the probability of an ant to keep following
-          a trail. From paper 3a: 255, 3b: 251, 3c: 247
+          a trail. From paper 3a: 255, 3b: 251, 3c: 247. A FidelityTable
+          gives the fidelity for the concentration at each ant's location.
         tau: Int representing "units" of pheromone ants deposit to their
           location on the grid at each timestep.
+        stream: RandomStream new ants draw from. Default is the shared
+          sampling.DEFAULT_STREAM.
+        B: Tuple representing the turning kernels (B1, B2, B3, B4) of new
+          ants.
+        profiler: StepProfiler to add phase and decision times to. Default
+          None; off.
+        spawner: Spawner releasing new ants at its hills. Default None; one
+          new ant per step at the grid's hill.
 
     Returns:
-        None.
+        number_exited: Int representing the number of ants that left the grid
+          during this step.
 
     """
+    # one shared no-op context when not profiling
+    timed = profiler.phase if profiler is not None else _not_timed
+
     # generate new ant per timestep
-    add_ant(ants_on_grid, simulation_grid.get_hill_loc())
+    with timed("spawn"):
+        spawn_ants(ants_on_grid, simulation_grid, stream, B, spawner)
     active_ants = []
 
     # ant movement + ant deposition to new position
@@ -132,48 +209,130 @@ def simulation_step(ants_on_grid:list[a.Ant], simulation_grid:g.Grid,
         # if ant not on grid, skips deposit pheromone and move ant
         if not ant.is_on_grid():
             continue
-        # if an is on grid, deposit pheromone and move ant
-        deposit_pheromone(ant, simulation_grid, tau)
-        move_ant(ant, simulation_grid, fidelity)
+        # if an is on grid, deposit pheromone and move ant; per-ant timing
+        #  sits behind one check, so unprofiled steps pay nothing for it
+        if profiler is None:
+            deposit_pheromone(ant, simulation_grid, tau)
+            move_ant(ant, simulation_grid, fidelity)
+        else:
+            _profiled_deposit_and_move(ant, simulation_grid, fidelity, tau,
+                                       profiler)
 
         # if ant is on grid, add to "active_ants" list
         if ant.is_on_grid():
             active_ants.append(ant)
 
-    # update ant list with off-grid ants
-    ants_on_grid = active_ants
+    # drop off-grid ants from the caller's list
+    number_exited = len(ants_on_grid) - len(active_ants)
+    ants_on_grid[:] = active_ants
 
     # global grid evaporation
-    evaporate_pheromone(simulation_grid)
+    with timed("evaporate"):
+        evaporate_pheromone(simulation_grid)
+
+    return number_exited
+
+
+def _profiled_deposit_and_move(ant:a.Ant, simulation_grid:g.Grid,
+                               fidelity:int | fi.FidelityTable, tau:int,
+                               profiler:pr.StepProfiler)->None:
+    """Deposits pheromone for one ant and moves it, timing both phases and
+      the ant's direction decision with profiler."""
+    with profiler.phase("deposit"):
+        deposit_pheromone(ant, simulation_grid, tau)
+    with profiler.phase("move"):
+        move_ant(ant, simulation_grid, fidelity, profiler)
+
+
+def population_step(population:p.AntPopulation, simulation_grid:g.Grid,
+                    fidelity:int | fi.FidelityTable, tau:int,
+                    profiler:pr.StepProfiler | None = None,
+                    spawner:sw.Spawner | None = None)->int:
+    """
+    Performs one time step for an array-based ant population. Same phases as
+      simulation_step, but each phase runs on every ant at once.
+
+    Args:
+        population: AntPopulation representing ants on simulation_grid.
+        simulation_grid: Grid object representing lattice ants are being
+          simulated on.
+        fidelity: Int representing the probability of an ant to keep following
+          a trail. From paper 3a: 255, 3b: 251, 3c: 247. A FidelityTable
+          gives the fidelity for the concentration at each ant's location.
+        tau: Int representing "units" of pheromone ants deposit to their
+          location on the grid at each timestep.
+        profiler: StepProfiler to add phase times and decision counts to.
+          Default None; off.
+        spawner: Spawner releasing new ants at its hills. Default None; one
+          new ant per step at the grid's hill.
+
+    Returns:
+        number_exited: Int representing the number of ants that left the grid
+          during this step.
+
+    """
+    # one shared no-op context when not profiling
+    timed = profiler.phase if profiler is not None else _not_timed
+
+    # generate new ant per timestep
+    with timed("spawn"):
+        spawn_population(population, simulation_grid, spawner)
+        active = population.get_active()
+
+    # ant deposition, then ant movement
+    with timed("deposit"):
+        population.deposit(active, simulation_grid, tau)
+    with timed("move"):
+        decisions = population.update_direction(active, simulation_grid,
+                                                fidelity)
+        number_exited = population.move(active, simulation_grid)
+    if profiler is not None:
+        for decision, calls in decisions.items():
+            profiler.add_decision(decision, calls=calls)
+
+    # global grid evaporation
+    with timed("evaporate"):
+        evaporate_pheromone(simulation_grid)
+
+    return number_exited
+
+
+def _not_timed(_phase:str)->contextlib.nullcontext:
+    """Stands in for StepProfiler.phase when a step is not profiled."""
+    return _NOT_TIMED
 
 
 ######## Output Parameters ########
-def total_L_value(ants_on_grid:list[a.Ant]):
+def total_L_value(ants_on_grid:list[a.Ant] | p.AntPopulation):
     """
     Returns number of exploratory (lost) ants at time t across the whole grid.
 
     Args:
-        ants_on_grid: List of Ant objects on simulation_grid. Should contain
-          only ants that are on the grid.
+        ants_on_grid: List of Ant objects on simulation_grid, or an
+          AntPopulation. Should contain only ants that are on the grid.
 
     Returns:
         sum_L: Int representing the number of exploratory ants at time t.
     
     """
+    if isinstance(ants_on_grid, p.AntPopulation):
+        return ants_on_grid.num_explorers()
     sum_L = sum(1 for ant in ants_on_grid if ant.get_state() == EXPLORER)
     return sum_L
 
-def total_F_value(ants_on_grid:list[a.Ant]):
+def total_F_value(ants_on_grid:list[a.Ant] | p.AntPopulation):
     """
     Returns number of follower ants at time t across the whole grid.
 
     Args:
-        ants_on_grid: List of Ant objects on simulation_grid. Should contain
-          only ants that are on the grid.
+        ants_on_grid: List of Ant objects on simulation_grid, or an
+          AntPopulation. Should contain only ants that are on the grid.
 
     Returns:
         sum_F: Int representing the number of follower ants at time t.
 
     """
+    if isinstance(ants_on_grid, p.AntPopulation):
+        return ants_on_grid.num_followers()
     sum_F = sum(1 for ant in ants_on_grid if ant.get_state() == FOLLOWER)
     return sum_F
@@ -0,0 +1,238 @@
+""" Contains SnapshotWriter class, streams pheromone fields and ant positions
+ to an append-only file during a run, on a background thread, and
+ read_snapshots to read them back. """
+
+# imports
+import io
+import json
+import queue
+import struct
+import threading
+import numpy as np
+import ants as a
+import checkpoint as cp
+import grid as g
+import population as p
+
+# file layout: MAGIC, a length-prefixed JSON header, then one length-prefixed
+#  compressed .npz record per snapshot
+MAGIC = b"ANTSNAP1"
+_LENGTH = struct.Struct("<Q")
+
+# record kinds: a full sparse field, or only the grid spaces changed since the
+#  previous snapshot
+KEYFRAME = 0
+DELTA = 1
+
+
+######## SnapshotWriter class ########
+class SnapshotWriter:
+    """
+    Writes snapshots of a simulation to an append-only file. The stepping
+      loop only copies the parts of the field that may hold pheromone (the
+      tracked grid spaces of a sparse grid, the active chunks of a chunked
+      grid, otherwise the whole field) and the ants; finding changed grid
+      spaces, compressing and writing happen on a background thread. Each
+      snapshot stores the nonzero grid spaces (keyframes, every
+      keyframe_every snapshots) or the grid spaces changed since the
+      previous snapshot (deltas), since fields are mostly zero and change
+      little between snapshots. The writer thread keeps only the previous
+      snapshot's nonzero grid spaces, never a whole field.
+
+    Attributes:
+        path: String path of the snapshot file.
+        size: Int representing the number of points per grid side.
+        dtype: Numpy dtype of the pheromone field.
+        keyframe_every: Int representing how many snapshots pass between
+          keyframes; the first snapshot is always one.
+        num_written: Int representing number of snapshots handed to write.
+    """
+
+    def __init__(self, path:str, simulation_grid:g.Grid,
+                 keyframe_every:int = 20, max_pending:int = 16)->None:
+        if keyframe_every <= 0:
+            raise ValueError("Invalid keyframe_every; keyframe_every must be"
+                             " larger than 0.")
+        self.path = path
+        self.size = simulation_grid.get_size()
+        self.dtype = simulation_grid.dtype
+        self.keyframe_every = keyframe_every
+        self.num_written = 0
+        self._file = open(path, "wb")
+        header = json.dumps({"size": self.size, "dtype": str(self.dtype),
+                             "keyframe_every": keyframe_every}).encode("utf-8")
+        self._file.write(MAGIC + _LENGTH.pack(len(header)) + header)
+
+        # snapshots wait here for the writer thread; write only blocks if it
+        #  falls max_pending snapshots behind
+        self._queue = queue.Queue(maxsize=max_pending)
+        self._error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __repr__(self)->str:
+        return f"snapshot writer | path: {self.path}, snapshots: {self.num_written}"
+
+    def write(self, step:int, ants_on_grid:list[a.Ant] | p.AntPopulation,
+              simulation_grid:g.Grid)->None:
+        """
+        Hands a copy of the parts of the current field that may hold
+          pheromone, and of the ants, to the writer thread.
+
+        Args:
+            step: Int representing the iteration number.
+            ants_on_grid: List of Ant objects on simulation_grid, or an
+              AntPopulation.
+            simulation_grid: Grid object representing lattice ants are being
+              simulated on.
+
+        Returns:
+            None
+
+        """
+        self._raise_error()
+        x, y, direction, state, _ = cp.ant_arrays(ants_on_grid)
+        self._queue.put((step, _copy_field(simulation_grid), x.copy(),
+                         y.copy(), direction.copy(), state.copy()))
+        self.num_written += 1
+
+    def close(self)->None:
+        """Waits for pending snapshots to be written and closes the file."""
+        if self._file.closed:
+            return
+        self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+        self._raise_error()
+
+    ######## Writer thread ########
+    def _run(self)->None:
+        """Encodes and writes snapshots from the queue until close."""
+        # sorted flat indices and values of the previous nonzero grid spaces
+        previous = None
+        count = 0
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            if self._error is not None:
+                continue
+            try:
+                step, field, x, y, direction, state = item
+                current = self._nonzero_cells(field)
+                if previous is None or count % self.keyframe_every == 0:
+                    kind = KEYFRAME
+                    cells, values = current
+                else:
+                    kind = DELTA
+                    cells, values = _changed_cells(previous, current,
+                                                   self.dtype)
+                record = io.BytesIO()
+                np.savez_compressed(record, step=step, kind=kind, cells=cells,
+                                    values=values, x=x, y=y,
+                                    direction=direction, state=state)
+                data = record.getvalue()
+                self._file.write(_LENGTH.pack(len(data)) + data)
+                self._file.flush()
+                previous = current
+                count += 1
+            except Exception as error:  # surfaced on the stepping thread
+                self._error = error
+
+    def _nonzero_cells(self, field:tuple)->tuple[np.ndarray, np.ndarray]:
+        """Returns the sorted flat indices and values of the nonzero grid
+          spaces in a field copied by _copy_field."""
+        if field[0] == "cells":
+            _, cells, values = field
+            order = np.argsort(cells)
+            cells, values = cells[order], values[order]
+            nonzero = values != 0
+            return cells[nonzero], values[nonzero]
+        all_cells, all_values = [], []
+        for row, col, block in field[1]:
+            rows, cols = np.nonzero(block)
+            all_cells.append((rows + row) * self.size + cols + col)
+            all_values.append(block[rows, cols])
+        cells = np.concatenate([np.empty(0, dtype=np.int64), *all_cells])
+        values = np.concatenate([np.empty(0, dtype=self.dtype), *all_values])
+        order = np.argsort(cells)
+        return cells[order], values[order]
+
+    def _raise_error(self)->None:
+        """Raises an error hit by the writer thread, if any."""
+        if self._error is not None:
+            raise self._error
+
+
+######## Helper Functions ########
+def _copy_field(simulation_grid:g.Grid)->tuple:
+    """Copies the parts of the field that may hold pheromone: ("cells",
+      indices, values) of a sparse grid's tracked grid spaces, or ("blocks",
+      [(row, col, block), ...]) of a chunked grid's active chunks, or of the
+      whole field, with row and col the block's first grid space."""
+    if simulation_grid.sparse:
+        return ("cells", *simulation_grid.get_tracked_pheromone())
+    chunk_size = simulation_grid.chunk_size or 0
+    return ("blocks", [(row * chunk_size, col * chunk_size, chunk.copy())
+                       for row, col, chunk in simulation_grid.iter_chunks()])
+
+
+def _changed_cells(previous:tuple[np.ndarray, np.ndarray],
+                   current:tuple[np.ndarray, np.ndarray],
+                   dtype:np.dtype)->tuple[np.ndarray, np.ndarray]:
+    """Returns the flat indices and new values of the grid spaces that differ
+      between two snapshots, each given as sorted nonzero indices and
+      values."""
+    cells = np.union1d(previous[0], current[0])
+    previous_values = np.zeros(len(cells), dtype=dtype)
+    previous_values[np.searchsorted(cells, previous[0])] = previous[1]
+    current_values = np.zeros(len(cells), dtype=dtype)
+    current_values[np.searchsorted(cells, current[0])] = current[1]
+    changed = previous_values != current_values
+    return cells[changed], current_values[changed]
+
+
+######## Reading ########
+def read_snapshots(path:str):
+    """
+    Reads back the snapshots written by a SnapshotWriter, in order. A record
+      cut off by a crash ends the sequence.
+
+    Args:
+        path: String path of the snapshot file.
+
+    Yields:
+        snapshot: Dict with "step", the full "field" and the ants' "x", "y",
+          "direction" and "state" arrays.
+
+    """
+    with open(path, "rb") as snapshot_file:
+        if snapshot_file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Invalid snapshot file; missing snapshot file"
+                             " header.")
+        (length,) = _LENGTH.unpack(snapshot_file.read(_LENGTH.size))
+        header = json.loads(snapshot_file.read(length))
+        flat_field = np.zeros(header["size"] * header["size"],
+                              dtype=header["dtype"])
+
+        while True:
+            prefix = snapshot_file.read(_LENGTH.size)
+            if len(prefix) < _LENGTH.size:
+                return
+            (length,) = _LENGTH.unpack(prefix)
+            data = snapshot_file.read(length)
+            if len(data) < length:
+                return
+            with np.load(io.BytesIO(data)) as record:
+                if record["kind"] == KEYFRAME:
+                    flat_field[:] = 0
+                flat_field[record["cells"]] = record["values"]
+                yield {
+                    "step": int(record["step"]),
+                    "field": flat_field.reshape(header["size"],
+                                                header["size"]).copy(),
+                    "x": record["x"],
+                    "y": record["y"],
+                    "direction": record["direction"],
+                    "state": record["state"],
+                }
@@ -0,0 +1,178 @@
+""" Contains Spawner class, releases new ants at one or more hills following
+ per-hill release schedules, adding each step's ants in one batch, and the
+ schedules it follows. """
+
+# imports
+import numpy as np
+import ants as a
+import grid as g
+import population as p
+import sampling as sp
+
+
+######## Release schedules ########
+class FixedSchedule:
+    """
+    Releases a fixed number of ants every few steps.
+
+    Attributes:
+        number: Int representing number of ants released at a time.
+        every: Int representing how many steps pass between releases.
+        start: Int representing the step of the first release.
+    """
+
+    def __init__(self, number:int = 1, every:int = 1, start:int = 0)->None:
+        if number < 0 or every <= 0 or start < 0:
+            raise ValueError("Invalid schedule; number and start must be at"
+                             " least 0 and every larger than 0.")
+        self.number = number
+        self.every = every
+        self.start = start
+
+    def __repr__(self)->str:
+        return f"fixed schedule | ants: {self.number}, every: {self.every} steps, from step: {self.start}"
+
+    def count(self, step:int, stream:sp.RandomStream)->int:
+        """Returns number of ants released at step."""
+        if step < self.start or (step - self.start) % self.every:
+            return 0
+        return self.number
+
+    def as_config(self)->dict:
+        """Returns the schedule's parameters as a JSON-ready dict."""
+        return {"kind": "fixed", "number": self.number, "every": self.every,
+                "start": self.start}
+
+
+class PoissonSchedule:
+    """
+    Releases a Poisson distributed number of ants every step.
+
+    Attributes:
+        rate: Float representing the mean number of ants released per step.
+    """
+
+    def __init__(self, rate:float)->None:
+        if rate < 0:
+            raise ValueError("Invalid schedule; rate must be at least 0.")
+        self.rate = rate
+
+    def __repr__(self)->str:
+        return f"poisson schedule | mean ants per step: {self.rate}"
+
+    def count(self, step:int, stream:sp.RandomStream)->int:
+        """Returns number of ants released at step."""
+        return stream.poisson(self.rate)
+
+    def as_config(self)->dict:
+        """Returns the schedule's parameters as a JSON-ready dict."""
+        return {"kind": "poisson", "rate": self.rate}
+
+
+######## Spawner class ########
+class Spawner:
+    """
+    Releases new ants at each hill according to the hill's schedule. Each step
+      the per-hill counts are drawn, then all new ants are added together,
+      with their directions drawn in one batch.
+
+    Attributes:
+        hills: Numpy (n, 2) array of ints of hill (x, y) locations.
+        schedules: List of n schedules, FixedSchedule or PoissonSchedule, one
+          per hill.
+        step: Int representing the step of the next release.
+    """
+
+    def __init__(self, hills:list[tuple[int, int]],
+                 schedules:list[FixedSchedule | PoissonSchedule])->None:
+        self.hills = np.asarray(hills, dtype=np.int64).reshape(-1, 2)
+        if len(self.hills) == 0 or len(self.hills) != len(schedules):
+            raise ValueError("Invalid spawner; give at least one hill and"
+                             " one schedule per hill.")
+        self.schedules = list(schedules)
+        self.step = 0
+
+    def __repr__(self)->str:
+        return f"spawner | hills: {self.hills.tolist()}, next step: {self.step}"
+
+    def check_grid(self, size:int)->None:
+        """Raises ValueError if a hill lies off a grid of size points per
+          side."""
+        if np.any(self.hills < 0) or np.any(self.hills >= size):
+            raise ValueError("Invalid hills; every hill must lie on the"
+                             " grid.")
+
+    def as_config(self)->dict:
+        """Returns the hills and schedules as a JSON-ready dict."""
+        return {"hills": self.hills.tolist(),
+                "schedules": [schedule.as_config()
+                              for schedule in self.schedules]}
+
+    @classmethod
+    def from_config(cls, config:dict)->"Spawner":
+        """Makes a Spawner from a dict like the one as_config returns."""
+        kinds = {"fixed": FixedSchedule, "poisson": PoissonSchedule}
+        schedules = []
+        for schedule in config["schedules"]:
+            arguments = dict(schedule)
+            kind = arguments.pop("kind", "fixed")
+            if kind not in kinds:
+                raise ValueError(f"Invalid schedule kind; kind should be one"
+                                 f" of {tuple(kinds)}.")
+            schedules.append(kinds[kind](**arguments))
+        return cls([tuple(hill) for hill in config["hills"]], schedules)
+
+    ######## Releasing ants ########
+    def release_points(self, stream:sp.RandomStream)->tuple[np.ndarray,
+                                                            np.ndarray]:
+        """
+        Draws this step's releases and moves on to the next step.
+
+        Args:
+            stream: RandomStream random counts are drawn from.
+
+        Returns:
+            x, y: Numpy arrays of ints of the new ants' locations, grouped by
+              hill in hill order.
+
+        """
+        counts = [schedule.count(self.step, stream)
+                  for schedule in self.schedules]
+        self.step += 1
+        return (np.repeat(self.hills[:, 0], counts),
+                np.repeat(self.hills[:, 1], counts))
+
+    def spawn_population(self, population:p.AntPopulation,
+                         simulation_grid:g.Grid)->int:
+        """Adds this step's new ants to population and returns how many were
+          added."""
+        x, y = self.release_points(population.stream)
+        population.add_ants_at(x, y)
+        if simulation_grid.occupancy is not None:
+            simulation_grid.occupancy.add_points(x, y)
+        return len(x)
+
+    def spawn_ants(self, ants_on_grid:list[a.Ant], simulation_grid:g.Grid,
+                   stream:sp.RandomStream | None = None,
+                   B:tuple[float, float, float, float] =
+                   (0.360, 0.047, 0.008, 0.002))->int:
+        """Appends this step's new Ant objects to ants_on_grid and returns
+          how many were added. Directions are drawn in one batch."""
+        if stream is None:
+            stream = sp.DEFAULT_STREAM
+        x, y = self.release_points(stream)
+        directions = stream.integers(8, len(x)).tolist()
+        ants_on_grid.extend(a.Ant(x=ant_x, y=ant_y, B=B, stream=stream,
+                                  direction=direction)
+                            for ant_x, ant_y, direction
+                            in zip(x.tolist(), y.tolist(), directions))
+        if simulation_grid.occupancy is not None:
+            simulation_grid.occupancy.add_points(x, y)
+        return len(x)
+
+
+def single_hill(simulation_grid:g.Grid, number:int = 1)->Spawner:
+    """Makes a Spawner releasing number ants every step at the grid's usual
+      hill location."""
+    hill_loc = simulation_grid.get_hill_loc()
+    return Spawner([(hill_loc, hill_loc)], [FixedSchedule(number)])
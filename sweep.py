@@ -0,0 +1,254 @@
+""" Contains parameter sweep runner: runs many simulations across a process
+ pool and streams each run's results to a JSON lines file. """
+
+# imports
+import argparse
+import contextlib
+import functools
+import io
+import itertools
+import json
+import multiprocessing
+import os
+import numpy as np
+import convergence as cv
+import simulation_run as sr
+
+# default sweep values, the Figure 3 configurations
+DEFAULT_FIDELITIES = (255, 251, 247)
+DEFAULT_B = (0.360, 0.047, 0.008, 0.002)
+
+# configuration keys that identify a run; convergence settings change how
+#  long runs go and so their results, and are None for results files written
+#  before they were recorded
+CONFIG_KEYS = ("grid_size", "fidelity", "tau", "B", "num_steps", "seed",
+               "engine", "convergence")
+
+
+######## Sweep Configurations ########
+def sweep_configs(fidelities:list[int], taus:list[int],
+                  Bs:list[tuple[float, float, float, float]],
+                  grid_sizes:list[int], num_steps:list[int],
+                  seeds:list[int], engine:str = "array",
+                  convergence:dict | None = None)->list[dict]:
+    """
+    Builds one configuration per combination of sweep values.
+
+    Args:
+        fidelities: List of ints of fidelity values to sweep.
+        taus: List of ints of tau values to sweep.
+        Bs: List of turning kernel tuples (B1, B2, B3, B4) to sweep.
+        grid_sizes: List of ints of grid sizes to sweep.
+        num_steps: List of ints of numbers of steps to sweep.
+        seeds: List of ints of replicate seeds run for every combination.
+        engine: String representing the run_simulation engine. Default
+          "array".
+        convergence: Dict of ConvergenceMonitor arguments, e.g. {"window":
+          100, "tolerance": 0.01}, to stop every run once it has settled.
+          Stored with all monitor settings filled in, so equal monitors
+          give equal configs. Default None; every run goes all num_steps.
+
+    Returns:
+        configs: List of dicts with one value for each of CONFIG_KEYS.
+
+    """
+    if convergence is not None:
+        convergence = cv.ConvergenceMonitor(**convergence).as_config()
+    configs = []
+    for grid_size, fidelity, tau, B, steps, seed in itertools.product(
+            grid_sizes, fidelities, taus, Bs, num_steps, seeds):
+        configs.append({
+            "grid_size": grid_size,
+            "fidelity": fidelity,
+            "tau": tau,
+            "B": list(B),
+            "num_steps": steps,
+            "seed": seed,
+            "engine": engine,
+            "convergence": convergence,
+        })
+    return configs
+
+
+def config_key(config:dict)->str:
+    """Returns a string that identifies config, the same for equal configs."""
+    return json.dumps({key: config[key] if key != "convergence"
+                       else config.get(key) for key in CONFIG_KEYS},
+                      sort_keys=True)
+
+
+######## Running ########
+def grid_summary(grid:np.ndarray)->dict:
+    """
+    Summarizes a pheromone field for the results file.
+
+    Args:
+        grid: Numpy 2D array of pheromone concentrations.
+
+    Returns:
+        Dict of total, max and mean pheromone and number of occupied
+          (nonzero) grid spaces.
+
+    """
+    return {
+        "total_pheromone": float(grid.sum()),
+        "max_pheromone": float(grid.max()),
+        "mean_pheromone": float(grid.mean()),
+        "occupied_cells": int(np.count_nonzero(grid)),
+    }
+
+
+def run_config(config:dict, cache_dir:str | None = None)->dict:
+    """
+    Runs one headless simulation for config.
+
+    Args:
+        config: Dict with one value for each of CONFIG_KEYS.
+        cache_dir: String path of a result cache directory shared with other
+          runs, see simulation_run.run_simulation. Default None; off.
+
+    Returns:
+        record: Dict of config, final F and L, live and exited ant counts and
+          a summary of the final grid, plus the "converged_step" when
+          stopping early.
+
+    """
+    monitor = None
+    if config.get("convergence") is not None:
+        monitor = cv.ConvergenceMonitor(**config["convergence"])
+    # run_simulation prints progress; keep worker output quiet
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = sr.run_simulation(
+            config["grid_size"], config["fidelity"], config["tau"],
+            figure="sweep", num_steps=config["num_steps"],
+            engine=config["engine"], seed=config["seed"],
+            B=tuple(config["B"]), plot=False, sparse_evaporation=True,
+            cache_dir=cache_dir, convergence=monitor)
+
+    record = dict(config)
+    record.update({
+        "F": results["F"],
+        "L": results["L"],
+        "live": results["live"],
+        "exited": results["exited"],
+    })
+    if monitor is not None:
+        record["converged_step"] = results["converged_step"]
+    record.update(grid_summary(results["grid"].grid))
+    return record
+
+
+def completed_keys(results_path:str)->set[str]:
+    """
+    Reads the config keys of runs already written to results_path. A line
+    cut off by a crash is ignored, so its run is done again.
+
+    Args:
+        results_path: String path of the JSON lines results file.
+
+    Returns:
+        Set of config_key strings of completed runs.
+
+    """
+    done = set()
+    if not os.path.exists(results_path):
+        return done
+    with open(results_path, encoding="utf-8") as results_file:
+        for line in results_file:
+            try:
+                done.add(config_key(json.loads(line)))
+            except (json.JSONDecodeError, KeyError):
+                continue
+    return done
+
+
+def run_sweep(configs:list[dict], results_path:str,
+              processes:int | None = None,
+              cache_dir:str | None = None)->int:
+    """
+    Runs every configuration not already in results_path across a process
+      pool, appending one JSON line per run as soon as it finishes.
+
+    Args:
+        configs: List of configuration dicts, see sweep_configs.
+        results_path: String path of the JSON lines results file.
+        processes: Int representing number of worker processes. Default None;
+          one per CPU.
+        cache_dir: String path of a result cache directory, so runs done by
+          an earlier, overlapping sweep are not simulated again. Default
+          None; off.
+
+    Returns:
+        number_run: Int representing the number of runs done by this call.
+
+    """
+    done = completed_keys(results_path)
+    pending = [config for config in configs if config_key(config) not in done]
+    if not pending:
+        return 0
+
+    with open(results_path, "a", encoding="utf-8") as results_file:
+        with multiprocessing.Pool(processes) as pool:
+            for record in pool.imap_unordered(
+                    functools.partial(run_config, cache_dir=cache_dir),
+                    pending):
+                results_file.write(json.dumps(record) + "\n")
+                results_file.flush()
+    return len(pending)
+
+
+######## Command line ########
+def _parse_B(text:str)->tuple[float, float, float, float]:
+    """Parses a turning kernel given as four comma separated floats."""
+    B = tuple(float(value) for value in text.split(","))
+    if len(B) != 4:
+        raise argparse.ArgumentTypeError("B should be four comma separated"
+                                         " floats, e.g. 0.36,0.047,0.008,0.002")
+    return B
+
+
+def main(argv:list[str] | None = None)->None:
+    """Runs a parameter sweep from the command line."""
+    parser = argparse.ArgumentParser(description=(
+        "Run ant trail simulations for every combination of parameters."))
+    parser.add_argument("--fidelity", type=int, nargs="+",
+                        default=list(DEFAULT_FIDELITIES))
+    parser.add_argument("--tau", type=int, nargs="+", default=[8])
+    parser.add_argument("--B", type=_parse_B, nargs="+", default=[DEFAULT_B])
+    parser.add_argument("--grid-size", type=int, nargs="+", default=[256])
+    parser.add_argument("--num-steps", type=int, nargs="+", default=[1500])
+    parser.add_argument("--seeds", type=int, default=1,
+                        help="number of replicate seeds per combination")
+    parser.add_argument("--first-seed", type=int, default=0)
+    parser.add_argument("--engine", choices=sr.ENGINES, default="array")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--output", default="sweep_results.jsonl")
+    parser.add_argument("--cache-dir", default=None,
+                        help="result cache shared between sweeps")
+    parser.add_argument("--converge-window", type=int, default=None,
+                        help="stop runs once F, L and total pheromone settle"
+                        " over this many steps")
+    parser.add_argument("--converge-tolerance", type=float, default=0.01)
+    parser.add_argument("--converge-atol", type=float, default=0.0)
+    parser.add_argument("--converge-statistics", nargs="+",
+                        choices=cv.STATISTICS, default=list(cv.STATISTICS))
+    args = parser.parse_args(argv)
+
+    convergence = None
+    if args.converge_window is not None:
+        convergence = {"window": args.converge_window,
+                       "tolerance": args.converge_tolerance,
+                       "atol": args.converge_atol,
+                       "statistics": tuple(args.converge_statistics)}
+
+    seeds = list(range(args.first_seed, args.first_seed + args.seeds))
+    configs = sweep_configs(args.fidelity, args.tau, args.B, args.grid_size,
+                            args.num_steps, seeds, args.engine, convergence)
+    number_run = run_sweep(configs, args.output, args.processes,
+                           args.cache_dir)
+    print(f"Ran {number_run} of {len(configs)} configurations, results in"
+          f" {args.output}")
+
+
+if __name__ == "__main__":
+    main()
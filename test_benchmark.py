@@ -0,0 +1,40 @@
+"""Unit tests for benchmark.py"""
+
+# imports
+import pytest
+import benchmark as b
+from constants import STEP_PHASES
+
+
+######## run_case ########
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_run_case_reports_throughput(engine):
+    """Check that a case reports positive rates and every phase."""
+    case = b.benchmark_cases([32], [20], [251], [engine], num_steps=10)[0]
+
+    record = b.run_case(case, repeats=1)
+
+    assert record["steps_per_second"] > 0
+    assert record["ant_moves_per_second"] > record["steps_per_second"]
+    assert set(record["phase_seconds"]) == set(STEP_PHASES)
+    assert record["peak_memory_bytes"] > 0
+
+
+######## compare_to_baseline ########
+def _results(steps_per_second:float)->dict:
+    """Makes benchmark results holding one case at the given speed."""
+    case = b.benchmark_cases([256], [0], [255], ["array"])[0]
+    return {"cases": [dict(case, steps_per_second=steps_per_second)]}
+
+def test_compare_to_baseline_flags_slowdown():
+    """Check that only slowdowns past the threshold count as regressions."""
+    baseline = _results(100.0)
+
+    assert b.compare_to_baseline(_results(95.0), baseline, 0.1) == []
+    regressions = b.compare_to_baseline(_results(80.0), baseline, 0.1)
+    assert len(regressions) == 1
+    assert regressions[0]["slowdown"] == pytest.approx(0.2)
+
+def test_compare_to_baseline_skips_new_cases():
+    """Check that cases missing from the baseline are not regressions."""
+    assert b.compare_to_baseline(_results(1.0), {"cases": []}) == []
@@ -0,0 +1,104 @@
+"""Unit tests for checkpoint.py"""
+
+# imports
+import contextlib
+import io
+import os
+import numpy as np
+import checkpoint as cp
+import grid as g
+import population as p
+import sampling as sp
+import simulation_run as sr
+
+
+######## save_checkpoint and load_checkpoint ########
+def test_checkpoint_round_trip(tmp_path):
+    """Check that a restored checkpoint has the same field, ants and random
+    numbers as the saved simulation."""
+    stream = sp.make_stream(3)
+    population = p.AntPopulation(stream=stream)
+    population.add_ants(4, 5, 6)
+    simulation_grid = g.Grid(10, dtype=np.int32)
+    simulation_grid.set_pheromone_for_point(2, 3, 40)
+    stream.uniform() # leave part of the buffer unused
+
+    cp.save_checkpoint(str(tmp_path / "ck"), population, simulation_grid,
+                       stream, step=7, exited=2)
+    restored = cp.load_checkpoint(str(tmp_path / "ck"))
+
+    assert restored["step"] == 7
+    assert restored["exited"] == 2
+    assert restored["grid"].grid.dtype == np.int32
+    assert np.array_equal(restored["grid"].grid, simulation_grid.grid)
+    assert np.array_equal(restored["ants"].direction[:6],
+                          population.direction[:6])
+    assert restored["stream"].uniform() == stream.uniform()
+    assert np.array_equal(restored["stream"].uniforms(20), stream.uniforms(20))
+
+def test_checkpoint_does_not_change_file(tmp_path):
+    """Check that changing a restored field leaves the checkpoint alone."""
+    stream = sp.make_stream(3)
+    cp.save_checkpoint(str(tmp_path / "ck"), [], g.Grid(10), stream, step=0)
+
+    restored = cp.load_checkpoint(str(tmp_path / "ck"), engine="object")
+    restored["grid"].set_pheromone_for_point(1, 1, 5)
+
+    assert cp.load_checkpoint(str(tmp_path / "ck"))["grid"].grid.sum() == 0
+
+def test_checkpoint_survives_interrupted_save(tmp_path):
+    """Check that a save interrupted after moving the previous checkpoint
+    aside still restores it, and that the next save cleans up."""
+    path = str(tmp_path / "ck")
+    stream = sp.make_stream(3)
+    cp.save_checkpoint(path, [], g.Grid(10), stream, step=4)
+    os.replace(path, path + cp.OLD_SUFFIX) # crash before the new one lands
+
+    assert cp.load_checkpoint(path)["step"] == 4
+
+    cp.save_checkpoint(path, [], g.Grid(10), stream, step=5)
+    assert cp.load_checkpoint(path)["step"] == 5
+    assert sorted(os.listdir(tmp_path)) == ["ck"]
+
+def test_checkpoint_keeps_run_B_without_ants(tmp_path):
+    """Check that a checkpoint of an empty object-engine run keeps the run's
+    turning kernel rather than the default one."""
+    B = (0.4, 0.05, 0.01, 0.0)
+    cp.save_checkpoint(str(tmp_path / "ck"), [], g.Grid(10),
+                       sp.make_stream(3), step=2, B=B)
+
+    assert cp.load_checkpoint(str(tmp_path / "ck"), engine="object")["B"] == B
+
+
+######## run_simulation resume ########
+def test_resume_matches_uninterrupted_run(tmp_path):
+    """Check that a run resumed from a checkpoint ends exactly like an
+    uninterrupted run with the same seed."""
+    path = str(tmp_path / "ck")
+    with contextlib.redirect_stdout(io.StringIO()):
+        full = sr.run_simulation(32, 251, 8, "test", 80, engine="array",
+                                 seed=4, plot=False)
+        sr.run_simulation(32, 251, 8, "test", 40, engine="array", seed=4,
+                          plot=False, checkpoint_path=path)
+        resumed = sr.run_simulation(32, 251, 8, "test", 80, engine="array",
+                                    plot=False, resume_from=path)
+
+    assert (resumed["F"], resumed["L"]) == (full["F"], full["L"])
+    assert np.array_equal(resumed["grid"].grid, full["grid"].grid)
+
+def test_memmap_run_resumes_as_memmap(tmp_path):
+    """Check that a run resumed from a memmap grid's checkpoint keeps the
+    memmap backend and chunk size, and writes to the given grid_path."""
+    path = str(tmp_path / "ck")
+    with contextlib.redirect_stdout(io.StringIO()):
+        sr.run_simulation(32, 251, 8, "test", 20, engine="array", seed=4,
+                          plot=False, checkpoint_path=path,
+                          grid_backend="memmap",
+                          grid_path=str(tmp_path / "first.dat"))
+        resumed = sr.run_simulation(32, 251, 8, "test", 40, engine="array",
+                                    plot=False, resume_from=path,
+                                    grid_path=str(tmp_path / "second.dat"))
+
+    assert resumed["grid"].backend == "memmap"
+    assert resumed["grid"].chunk_size == 256
+    assert os.path.getsize(tmp_path / "second.dat") > 0
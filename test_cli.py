@@ -0,0 +1,93 @@
+"""Unit tests for cli.py"""
+
+# imports
+import json
+import subprocess
+import sys
+import numpy as np
+import pytest
+import cli
+import fidelity as fi
+import spawning as sw
+
+
+def _write_spec(tmp_path, spec:dict)->str:
+    """Writes spec as a JSON file in tmp_path and returns its path."""
+    path = tmp_path / "spec.json"
+    path.write_text(json.dumps(spec))
+    return str(path)
+
+
+def _small_spec(tmp_path)->dict:
+    """Spec of two short runs on a small grid, one of them with two seeds."""
+    return {"output_dir": str(tmp_path / "out"), "save_metrics": True,
+            "defaults": {"grid_size": 16, "tau": 8, "num_steps": 30,
+                         "engine": "array", "metrics_every": 10},
+            "runs": [{"figure": "a", "fidelity": 255, "seeds": [1, 2]},
+                     {"figure": "b", "fidelity": {"curve": "threshold",
+                                                  "low": 240, "high": 255,
+                                                  "threshold": 5}}]}
+
+
+######## spec_jobs ########
+def test_jobs_per_run_and_seed():
+    """Check that each run is repeated once per seed, named after its figure
+    and seed."""
+    spec = {"defaults": {"grid_size": 16, "seeds": [0]},
+            "runs": [{"figure": "a", "seeds": [3, 4]}, {"figure": "b"}]}
+
+    jobs = cli.spec_jobs(spec)
+
+    assert [job["name"] for job in jobs] == ["a_seed3", "a_seed4", "b_seed0"]
+    assert all(job["parameters"]["grid_size"] == 16 for job in jobs)
+
+def test_invalid_spec(tmp_path):
+    """Check that unknown keys and per-run parameters raise ValueError."""
+    with pytest.raises(ValueError):
+        cli.load_spec(_write_spec(tmp_path, {"output": "out"}))
+    with pytest.raises(ValueError):
+        cli.spec_jobs({"runs": [{"fidelty": 255}]})
+    with pytest.raises(ValueError):
+        cli.spec_jobs({"defaults": {"metrics_path": "run.csv"}})
+
+
+######## run_arguments ########
+def test_run_arguments():
+    """Check that tables become fidelity curves and spawners, and that runs
+    default to headless."""
+    arguments = cli.run_arguments({
+        "fidelity": {"curve": "saturating", "low": 240, "high": 256,
+                     "half_saturation": 20},
+        "spawner": {"hills": [[4, 4]], "schedules": [{"kind": "fixed",
+                                                      "number": 2}]},
+        "B": [0.4, 0.05, 0.01, 0.0]})
+
+    assert arguments["plot"] is False
+    assert fi.make_fidelity_table(arguments["fidelity"]).fidelity_at(0) == 240
+    assert isinstance(arguments["spawner"], sw.Spawner)
+    assert arguments["B"] == (0.4, 0.05, 0.01, 0.0)
+
+
+######## main ########
+def test_main_writes_results(tmp_path):
+    """Check that every run appends a results line and writes its metrics
+    every metrics_every steps."""
+    spec = _small_spec(tmp_path)
+    cli.main([_write_spec(tmp_path, spec)])
+
+    lines = (tmp_path / "out" / cli.RESULTS_FILE).read_text().splitlines()
+    records = [json.loads(line) for line in lines]
+    assert [record["name"] for record in records] == ["a_seed1", "a_seed2",
+                                                      "b"]
+    assert all(record["live"] > 0 for record in records)
+    steps = np.loadtxt(tmp_path / "out" / "a_seed1_metrics.csv",
+                       delimiter=",", skiprows=1)[:, 0]
+    assert list(steps) == [9, 19, 29]
+
+def test_headless_run_skips_matplotlib(tmp_path):
+    """Check that a headless run never imports matplotlib."""
+    spec = _small_spec(tmp_path)
+    code = ("import sys, cli; cli.main([sys.argv[1]]);"
+            " assert 'matplotlib' not in sys.modules")
+    subprocess.run([sys.executable, "-c", code, _write_spec(tmp_path, spec)],
+                   check=True, capture_output=True)
@@ -0,0 +1,81 @@
+"""Unit tests for convergence.py"""
+
+# imports
+import pytest
+import convergence as cv
+import grid as g
+import population as p
+import sampling as sp
+import simulation_run as sr
+
+
+######## ConvergenceMonitor ########
+def test_steady_run_converges():
+    """Check that unchanging statistics converge once both windows are full
+    and a whole window has stayed settled."""
+    monitor = cv.ConvergenceMonitor(window=10, tolerance=0.01)
+    population = p.AntPopulation(stream=sp.make_stream(0))
+    population.add_ants(5, 5, 20)
+    grid = g.Grid(16)
+    grid.set_pheromone_for_point(3, 3, 40)
+
+    converged = [monitor.update(step, population, grid) for step in range(40)]
+
+    assert converged.index(True) == 28
+    assert monitor.converged_step == 28
+    assert all(converged[28:])
+
+def test_growing_run_does_not_converge():
+    """Check that a steadily growing population never converges, and that
+    samples are only taken every `every` steps."""
+    monitor = cv.ConvergenceMonitor(window=10, tolerance=0.01, every=2,
+                                    statistics=("L",))
+    population = p.AntPopulation(stream=sp.make_stream(0))
+    grid = g.Grid(16)
+
+    for step in range(200):
+        population.add_ants(5, 5)
+        assert not monitor.update(step, population, grid)
+    assert monitor.num_samples == 100
+
+def test_atol_settles_small_statistics():
+    """Check that a statistic flickering near 0 only settles with an
+    absolute tolerance."""
+    def converged_step(atol:float)->int | None:
+        monitor = cv.ConvergenceMonitor(window=10, tolerance=0.1, atol=atol,
+                                        statistics=("total_pheromone",))
+        grid = g.Grid(16)
+        for step in range(300):
+            grid.set_pheromone_for_point(3, 3, (step // 7) % 2)
+            monitor.update(step, [], grid)
+        return monitor.converged_step
+
+    assert converged_step(0) is None
+    assert converged_step(0.5) == 28
+
+def test_invalid_monitor():
+    """Check that invalid monitor settings raise ValueError."""
+    with pytest.raises(ValueError):
+        cv.ConvergenceMonitor(statistics=("F", "followers"))
+    with pytest.raises(ValueError):
+        cv.ConvergenceMonitor(window=0)
+    with pytest.raises(ValueError):
+        cv.ConvergenceMonitor(atol=-1)
+
+
+######## run_simulation ########
+def test_run_stops_at_convergence(tmp_path):
+    """Check that a run stops at the converged step, and that cached runs
+    report the same step."""
+    def run()->dict:
+        return sr.run_simulation(
+            16, 247, 8, "test", num_steps=2000, engine="array", seed=3,
+            plot=False, record_metrics=True, cache_dir=str(tmp_path),
+            convergence=cv.ConvergenceMonitor(20, 0.2,
+                                              statistics=("F", "L")))
+    first = run()
+    second = run()
+
+    assert first["converged_step"] is not None
+    assert len(first["metrics"]["step"]) == first["converged_step"] + 1
+    assert second["converged_step"] == first["converged_step"]
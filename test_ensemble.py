@@ -0,0 +1,51 @@
+"""Unit tests for ensemble.py"""
+
+# imports
+import numpy as np
+import ensemble as e
+
+
+######## EnsembleGrid ########
+def test_deposit_stays_in_replicate():
+    """Check that pheromone only lands on the depositing ant's replicate."""
+    ensemble_grid = e.EnsembleGrid(10, 3)
+
+    ensemble_grid.add_pheromone_for_points(np.array([4, 4]), np.array([5, 5]),
+                                           np.array([1, 1]), 8)
+
+    assert ensemble_grid.grid[1, 5, 4] == 16
+    assert ensemble_grid.grid.sum() == 16
+
+
+######## EnsemblePopulation ########
+def test_followers_only_see_own_replicate():
+    """Check that a follower ignores trails on other replicates' grids."""
+    ensemble_grid = e.EnsembleGrid(10, 2)
+    ensemble_grid.grid[1, 3, 4] = 10 # forward of both ants, replicate 1 only
+    population = e.EnsemblePopulation(2)
+    population.add_ants(4, 4)
+    population.direction[:2] = 0
+
+    _, lost = population.follower_turn(np.array([0, 1]), ensemble_grid)
+
+    assert list(population.replicate[:2]) == [0, 1]
+    assert list(lost) == [True, False]
+
+
+######## run_ensemble ########
+def test_run_ensemble_shapes():
+    """Check that run_ensemble returns per-step, per-replicate counts."""
+    results = e.run_ensemble(20, 251, 8, 4, num_steps=30, seed=2)
+
+    assert results["F"].shape == (30, 4)
+    assert results["L"].shape == (30, 4)
+    assert results["grids"].shape == (4, 20, 20)
+    assert np.all(results["F"] + results["L"] <= np.arange(1, 31)[:, None])
+
+def test_run_ensemble_reproducible():
+    """Check that the same seed gives the same ensemble."""
+    first = e.run_ensemble(20, 251, 8, 3, num_steps=30, seed=5)
+    second = e.run_ensemble(20, 251, 8, 3, num_steps=30, seed=5)
+
+    assert np.array_equal(first["F"], second["F"])
+    assert np.array_equal(first["grids"], second["grids"])
@@ -0,0 +1,101 @@
+"""Unit tests for fidelity.py"""
+
+# imports
+import numpy as np
+import pytest
+import ants as a
+import ensemble as e
+import fidelity as fi
+import grid as g
+import population as p
+import sampling as sp
+import simulation_run as sr
+import simulation_setup as ss
+
+######## Global Variables ########
+from constants import EXPLORE, FOLLOW_DROP
+
+
+######## FidelityTable ########
+def test_table_lookups():
+    """Check single and batched lookups agree, and that concentrations past
+    the table use its last entry."""
+    table = fi.FidelityTable(fi.saturating_fidelity(200, 256, 10), 100)
+    concentrations = np.array([0.0, 3.7, 10.0, 100.0, 5000.0])
+    batched = table.fidelities_at(concentrations)
+
+    assert list(batched) == [table.fidelity_at(C) for C in concentrations]
+    assert batched[0] == 200 and batched[2] == 228
+    assert batched[-1] == table.thresholds[-1]
+    assert np.all(np.diff(table.thresholds) >= 0)
+
+def test_table_clips_to_fidelity_range():
+    """Check that fidelity values outside 0-257 are clipped."""
+    table = fi.FidelityTable(fi.threshold_fidelity(-5, 300, 2), 4)
+
+    assert list(table.thresholds) == [0, 0, 257, 257, 257]
+
+def test_make_fidelity_table():
+    """Check that ints pass through unchanged, and that small integer
+    dtypes limit the table size."""
+    function = fi.threshold_fidelity(240, 255, 8)
+
+    assert fi.make_fidelity_table(251) == 251
+    assert fi.make_fidelity_table(function, "uint8").max_concentration == 255
+    assert fi.make_fidelity_table(function).max_concentration == \
+        fi.DEFAULT_MAX_CONCENTRATION
+    with pytest.raises(TypeError):
+        fi.make_fidelity_table("251")
+    with pytest.raises(ValueError):
+        fi.saturating_fidelity(240, 255, 0)
+
+
+######## steps ########
+def test_constant_table_matches_int_fidelity():
+    """Check that a table holding one fidelity gives the same run as the
+    int fidelity on both engines."""
+    table = fi.FidelityTable(lambda concentrations: 251, 64)
+    results = []
+    for fidelity in (251, table):
+        grid = g.Grid(32)
+        population = p.AntPopulation(stream=sp.make_stream(6))
+        object_grid = g.Grid(32)
+        ants_on_grid = []
+        stream = sp.make_stream(6)
+        for _ in range(60):
+            ss.population_step(population, grid, fidelity, 8)
+            ss.simulation_step(ants_on_grid, object_grid, fidelity, 8, stream)
+        results.append((grid.grid.copy(), object_grid.grid.copy(),
+                        population.num_followers(),
+                        ss.total_F_value(ants_on_grid)))
+
+    for expected, result in zip(results[0], results[1]):
+        assert np.array_equal(expected, result)
+
+def test_ant_reads_own_concentration():
+    """Check that an ant's follower decision uses the fidelity for the
+    concentration on its own grid space."""
+    grid = g.Grid(16)
+    grid.set_pheromone_for_point(5, 5, 10)
+    table = fi.FidelityTable(fi.threshold_fidelity(0, 257, 5), 20)
+    marked = a.Ant(5, 5, stream=sp.make_stream(0), direction=0)
+    unmarked = a.Ant(8, 8, stream=sp.make_stream(0), direction=0)
+
+    # with no trail ahead, the follower loses it right away
+    assert marked.update_direction(grid, table) == FOLLOW_DROP
+    assert unmarked.update_direction(grid, table) == EXPLORE
+
+def test_ensemble_and_cached_runs(tmp_path):
+    """Check that fidelity functions run through the ensemble and the result
+    cache."""
+    function = fi.saturating_fidelity(230, 256, 16)
+    ensemble = e.run_ensemble(16, function, 8, 2, num_steps=20, seed=1)
+    first = sr.run_simulation(16, function, 8, "test", num_steps=20,
+                              engine="array", seed=1, plot=False,
+                              cache_dir=str(tmp_path))
+    second = sr.run_simulation(16, function, 8, "test", num_steps=20,
+                               engine="array", seed=1, plot=False,
+                               cache_dir=str(tmp_path))
+
+    assert ensemble["F"].shape == (20, 2)
+    assert np.array_equal(first["grid"].grid, second["grid"].grid)
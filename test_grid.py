@@ -4,6 +4,7 @@
 import pytest
 import numpy as np
 import grid as g
+from constants import DIRECTION_VECTORS
 
 ######## initialize ########
 
@@ -127,3 +128,161 @@ def test_set_then_get():
     value = grid.get_pheromone_for_point(5, 6)
 
     assert value == 8
+
+######## evaporate tests ########
+
+def test_evaporate_stops_at_zero():
+    """Check that evaporation removes pheromone but never goes below 0."""
+    grid = g.Grid(10)
+    grid.set_pheromone_for_point(2, 3, 5)
+    grid.set_pheromone_for_point(4, 4, 1)
+
+    grid.evaporate(2)
+
+    assert grid.get_pheromone_for_point(2, 3) == 3
+    assert grid.get_pheromone_for_point(4, 4) == 0
+    assert grid.grid.min() == 0
+
+def test_sparse_evaporate_matches_dense():
+    """Check that sparse evaporation gives the same grid as dense
+    evaporation."""
+    dense = g.Grid(20)
+    sparse = g.Grid(20, sparse=True)
+    x = np.array([1, 5, 5, 7, 12])
+    y = np.array([2, 6, 6, 3, 12])
+
+    for step in range(12):
+        for grid in (dense, sparse):
+            grid.add_pheromone_for_points(x + step % 3, y, 3)
+            grid.set_pheromone_for_point(step, step, 4)
+            grid.evaporate(1)
+        assert np.array_equal(dense.grid, sparse.grid)
+        assert dense.get_occupied_cells() == sparse.get_occupied_cells()
+
+######## dtype tests ########
+
+def test_integer_dtype_saturates():
+    """Check that integer grids stop at the dtype's largest value instead of
+    wrapping around."""
+    grid = g.Grid(10, dtype=np.uint8)
+    x = np.array([3] * 40)
+    y = np.array([4] * 40)
+
+    grid.add_pheromone_for_points(x, y, 8)
+    grid.add_pheromone_for_point(3, 4, 8)
+
+    assert grid.grid.dtype == np.uint8
+    assert grid.get_pheromone_for_point(3, 4) == 255
+
+def test_unsigned_dtype_evaporates_to_zero():
+    """Check that evaporating unsigned grids stops at 0."""
+    grid = g.Grid(10, dtype=np.uint16)
+    grid.set_pheromone_for_point(2, 2, 1)
+
+    grid.evaporate(3)
+
+    assert grid.get_pheromone_for_point(2, 2) == 0
+
+def test_invalid_dtype():
+    """Check that grids need a numeric dtype."""
+    with pytest.raises(TypeError, match="Invalid dtype; dtype must be an"\
+    " integer or float dtype."):
+        g.Grid(10, dtype=bool)
+
+######## memmap backend and chunk tests ########
+
+def test_memmap_grid_matches_memory_grid(tmp_path):
+    """Check that a chunked memmap grid gives the same field as an in-memory
+    grid."""
+    memory = g.Grid(40)
+    memmap = g.Grid(40, backend="memmap", path=str(tmp_path / "field.dat"),
+                    chunk_size=8)
+    x = np.array([1, 5, 5, 30, 12])
+    y = np.array([2, 6, 6, 3, 33])
+
+    for step in range(15):
+        for grid in (memory, memmap):
+            grid.add_pheromone_for_points(x + step % 4, y, 3)
+            grid.set_pheromone_for_point(step, 20, 4)
+            grid.evaporate(1)
+        assert np.array_equal(memory.grid, memmap.grid)
+        assert memory.get_occupied_cells() == memmap.get_occupied_cells()
+
+def test_sparse_memmap_grid(tmp_path):
+    """Check that a sparse memmap grid keeps its tracking flags in a memmap
+    and evaporates like a sparse in-memory grid."""
+    memory = g.Grid(40, sparse=True)
+    memmap = g.Grid(40, sparse=True, backend="memmap",
+                    path=str(tmp_path / "field.dat"))
+    x = np.array([1, 5, 5, 30, 12])
+    y = np.array([2, 6, 6, 3, 33])
+
+    for step in range(10):
+        for grid in (memory, memmap):
+            grid.add_pheromone_for_points(x + step % 4, y, 3)
+            grid.evaporate(1)
+    memmap.set_grid(memory.grid.copy())
+
+    assert isinstance(memmap._tracked, np.memmap)
+    assert np.array_equal(memory.grid, memmap.grid)
+    assert memory.get_occupied_cells() == memmap.get_occupied_cells()
+    assert np.count_nonzero(memmap._tracked) == memmap.get_occupied_cells()
+
+def test_evaporate_skips_empty_chunks():
+    """Check that chunks whose pheromone has evaporated stop being tracked."""
+    grid = g.Grid(16, chunk_size=4)
+    grid.set_pheromone_for_point(1, 1, 2)
+    grid.set_pheromone_for_point(9, 13, 5)
+
+    grid.evaporate(2)
+
+    assert [(row, col) for row, col, _ in grid.iter_chunks()] == [(3, 2)]
+
+def test_snapshot_round_trip(tmp_path):
+    """Check that a chunked snapshot loads back as the same field."""
+    grid = g.Grid(16, dtype=np.uint16, chunk_size=4)
+    grid.set_pheromone_for_point(1, 1, 2)
+    grid.set_pheromone_for_point(9, 13, 5)
+
+    grid.snapshot(str(tmp_path / "field.npy"))
+
+    assert np.array_equal(np.load(tmp_path / "field.npy"), grid.grid)
+
+def test_invalid_backend():
+    """Check that only known storage backends are accepted."""
+    with pytest.raises(ValueError, match="Invalid backend; backend must be"\
+    " 'memory' or 'memmap'."):
+        g.Grid(10, backend="disk")
+
+######## neighbor lookup tests ########
+
+def test_neighbor_pheromone_matches_point_reads():
+    """Check that neighbor reads from the bordered field match bounds checked
+    point reads everywhere on the grid, edges included."""
+    grid = g.Grid(6)
+    grid.grid[:5, :5] = np.arange(25).reshape(5, 5) + 1
+    ys, xs, directions = np.meshgrid(np.arange(6), np.arange(6), np.arange(8),
+                                     indexing="ij")
+    x, y, direction = xs.ravel(), ys.ravel(), directions.ravel()
+
+    gathered = grid.get_neighbor_pheromones(x, y, direction)
+
+    for i in range(len(x)):
+        expected = [grid.get_pheromone_for_point(
+            x[i] + DIRECTION_VECTORS[(direction[i] + turn) % 8][0],
+            y[i] + DIRECTION_VECTORS[(direction[i] + turn) % 8][1])
+            for turn in (0, 1, -1)]
+        assert list(gathered[i]) == expected
+        assert list(grid.get_neighbor_pheromone(int(x[i]), int(y[i]),
+                                                int(direction[i]))) == expected
+
+def test_evaporate_keeps_border_empty():
+    """Check that evaporating the whole bordered field leaves its border at
+    0."""
+    grid = g.Grid(8, dtype=np.uint8)
+    grid.add_pheromone_for_points(np.array([0, 6]), np.array([0, 6]), 5)
+
+    grid.evaporate(1)
+
+    assert grid.get_neighbor_pheromone(0, 0, 7) == (0, 0, 0)
+    assert grid.get_total_pheromone() == 8
@@ -0,0 +1,60 @@
+"""Unit tests for metrics.py"""
+
+# imports
+import numpy as np
+import pytest
+import grid as g
+import metrics as m
+import population as p
+import sampling as sp
+import simulation_setup as ss
+
+
+def _recorded_run(num_steps:int)->tuple:
+    """Runs a small sparse array simulation, recording every step."""
+    grid = g.Grid(20, sparse=True)
+    population = p.AntPopulation(stream=sp.make_stream(0))
+    recorder = m.MetricsRecorder(num_steps)
+    exited = 0
+    for step in range(num_steps):
+        exited += ss.population_step(population, grid, 251, 8)
+        recorder.record(step, population, grid, exited)
+    return recorder, population, grid
+
+
+######## record ########
+def test_record_matches_final_state():
+    """Check that the last recorded row matches the final simulation state."""
+    recorder, population, grid = _recorded_run(50)
+    recorded = recorder.as_dict()
+
+    assert len(recorded["step"]) == 50
+    assert recorded["F"][-1] == population.num_followers()
+    assert recorded["L"][-1] == population.num_explorers()
+    assert recorded["exited"][-1] == population.num_exited()
+    assert recorded["total_pheromone"][-1] == grid.grid.sum()
+    assert recorded["occupied_cells"][-1] == np.count_nonzero(grid.grid)
+
+def test_record_past_preallocated_steps():
+    """Check that recording more steps than preallocated is an error."""
+    recorder = m.MetricsRecorder(0)
+
+    with pytest.raises(IndexError, match="Invalid step; all preallocated"\
+    " steps are recorded."):
+        recorder.record(0, [], g.Grid(10), 0)
+
+
+######## save ########
+def test_save_csv_and_npz(tmp_path):
+    """Check that both output formats hold the recorded columns."""
+    recorder, _, _ = _recorded_run(10)
+
+    recorder.save(str(tmp_path / "metrics.csv"))
+    recorder.save(str(tmp_path / "metrics.npz"))
+
+    table = np.loadtxt(tmp_path / "metrics.csv", delimiter=",", skiprows=1)
+    arrays = np.load(tmp_path / "metrics.npz")
+    assert table.shape == (10, len(m.COLUMNS))
+    assert np.array_equal(table[:, 1], recorder.as_dict()["F"])
+    assert np.array_equal(arrays["occupied_cells"],
+                          recorder.as_dict()["occupied_cells"])
@@ -0,0 +1,70 @@
+"""Unit tests for occupancy.py"""
+
+# imports
+import numpy as np
+import pytest
+import checkpoint as cp
+import grid as g
+import occupancy as o
+import population as p
+import sampling as sp
+import simulation_setup as ss
+
+
+def _expected_counts(ants_on_grid, size:int)->np.ndarray:
+    """Counts ants per grid space by scanning the ants."""
+    x, y, *_ = cp.ant_arrays(ants_on_grid)
+    counts = np.zeros((size, size), dtype=np.int64)
+    np.add.at(counts, (y, x), 1)
+    return counts
+
+
+######## incremental updates ########
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_index_matches_ants(engine):
+    """Check that the index kept by the steps matches a scan of the ants,
+    as ants spawn, move and leave the grid."""
+    stream = sp.make_stream(4)
+    grid = g.Grid(16)
+    if engine == "array":
+        ants_on_grid = p.AntPopulation(stream=stream)
+        step = lambda: ss.population_step(ants_on_grid, grid, 251, 8)
+    else:
+        ants_on_grid = []
+        step = lambda: ss.simulation_step(ants_on_grid, grid, 251, 8, stream)
+    grid.track_occupancy([], [])
+
+    exited = 0
+    for _ in range(80):
+        exited += step()
+        assert np.array_equal(grid.occupancy.counts,
+                              _expected_counts(ants_on_grid, 16))
+    assert exited > 0
+    assert grid.occupancy.total == len(ants_on_grid)
+
+
+######## queries ########
+def test_region_queries():
+    """Check that single and batched region counts agree."""
+    index = o.OccupancyIndex(8)
+    index.add_points(np.array([0, 1, 1, 7, 4]), np.array([0, 1, 1, 7, 2]))
+    index.move(7, 7, 6, 6)
+
+    x0, y0 = np.array([0, 1, 0, 5]), np.array([0, 0, 0, 5])
+    x1, y1 = np.array([2, 2, 8, 8]), np.array([2, 2, 8, 8])
+    batched = index.count_in_regions(x0, y0, x1, y1)
+
+    assert list(batched) == [3, 2, 5, 1]
+    assert list(batched) == [index.count_in_region(*region)
+                             for region in zip(x0, y0, x1, y1)]
+    assert index.count_at(1, 1) == 2
+
+def test_density_stats():
+    """Check the summary of how ants are spread over the grid."""
+    index = o.OccupancyIndex(4)
+    index.add_points(np.array([0, 0, 0, 3]), np.array([0, 0, 0, 1]))
+
+    assert index.density_stats() == {"ants": 4, "occupied_cells": 2,
+                                     "max_count": 3,
+                                     "mean_occupied_count": 2.0,
+                                     "crowded_cells": 1}
@@ -0,0 +1,152 @@
+"""Unit tests for population.py"""
+
+# imports
+import pytest
+import numpy as np
+import grid as g
+import population as p
+import sampling as sp
+import simulation_setup as ss
+
+######## Global Variables ########
+from constants import EXPLORER_CODE, FOLLOWER_CODE
+
+
+######## add_ants ########
+def test_add_ants_grows_capacity():
+    """Check that add_ants stores every ant past the initial capacity."""
+    population = p.AntPopulation(capacity=2)
+
+    population.add_ants(5, 6, 3)
+
+    assert len(population) == 3
+    assert population.num_on_grid() == 3
+    assert np.all(population.x[:3] == 5)
+    assert np.all(population.y[:3] == 6)
+    assert np.all(population.state[:3] == EXPLORER_CODE)
+
+def test_invalid_capacity():
+    """Check that an AntPopulation needs a positive capacity."""
+    with pytest.raises(ValueError, match="Invalid capacity; capacity must be"\
+    " larger than 0."):
+        p.AntPopulation(capacity=0)
+
+
+######## follower_turn ########
+def test_follower_turn_forward():
+    """Check that followers keep going forward on the strongest trail."""
+    grid = g.Grid(10)
+    population = p.AntPopulation()
+    population.add_ants(4, 4)
+    population.direction[0] = 0
+    grid.grid[3, 4] = 10 # forward
+    grid.grid[3, 5] = 5 # right
+
+    delta_turn, lost = population.follower_turn(np.array([0]), grid)
+
+    assert delta_turn[0] == 0
+    assert not lost[0]
+
+def test_follower_turn_sides():
+    """Check that followers turn toward the stronger side space."""
+    grid = g.Grid(10)
+    population = p.AntPopulation()
+    population.add_ants(4, 4, 2)
+    population.direction[:2] = 0
+    grid.grid[3, 5] = 5 # right of both ants
+
+    delta_turn, lost = population.follower_turn(np.array([0, 1]), grid)
+
+    assert np.all(delta_turn == 1)
+    assert not np.any(lost)
+
+def test_follower_turn_lost():
+    """Check that followers without a trail ahead are lost."""
+    grid = g.Grid(10)
+    population = p.AntPopulation()
+    population.add_ants(4, 4)
+
+    _, lost = population.follower_turn(np.array([0]), grid)
+
+    assert lost[0]
+
+
+######## update_direction ########
+def test_update_direction_lost_followers_explore():
+    """Check that with full fidelity and no trail every ant becomes an
+    explorer."""
+    grid = g.Grid(10)
+    population = p.AntPopulation()
+    population.add_ants(4, 4, 20)
+
+    population.update_direction(population.get_active(), grid, 257)
+
+    assert population.num_explorers() == 20
+
+def test_update_direction_followers_stay():
+    """Check that with full fidelity ants on a trail stay followers."""
+    grid = g.Grid(10)
+    grid.grid[:, :] = 1
+    grid.grid[3, 4] = 10
+    population = p.AntPopulation()
+    population.add_ants(4, 4, 20)
+    population.direction[:20] = 0
+
+    population.update_direction(population.get_active(), grid, 257)
+
+    assert population.num_followers() == 20
+    assert np.all(population.state[:20] == FOLLOWER_CODE)
+    assert np.all(population.direction[:20] == 0)
+
+
+######## move and deposit ########
+def test_move_off_grid():
+    """Check that ants crossing the grid boundary are marked off grid."""
+    grid = g.Grid(10)
+    population = p.AntPopulation()
+    population.add_ants(0, 4, 2)
+    population.direction[:2] = [6, 2] # left, right
+
+    population.move(population.get_active(), grid)
+
+    assert population.num_on_grid() == 1
+    assert population.num_exited() == 1
+    xs, ys = population.get_locations()
+    assert list(xs) == [1]
+    assert list(ys) == [4]
+
+def test_remove_ants_swaps_tail():
+    """Check that remove_ants fills removed slots with the last ants."""
+    population = p.AntPopulation()
+    for x in range(5):
+        population.add_ants(x, 0)
+
+    population.remove_ants(np.array([1, 4]))
+
+    assert population.num_on_grid() == 3
+    assert population.num_exited() == 2
+    assert sorted(population.x[:3]) == [0, 2, 3]
+
+def test_deposit_accumulates():
+    """Check that ants sharing a grid space each deposit tau."""
+    grid = g.Grid(10)
+    population = p.AntPopulation()
+    population.add_ants(4, 4, 3)
+
+    population.deposit(population.get_active(), grid, 8)
+
+    assert grid.get_pheromone_for_point(4, 4) == 24
+
+
+######## follower counter ########
+def test_follower_count_matches_states():
+    """Check that the running follower count agrees with the ant states
+    through deposits, turns and ants leaving the grid."""
+    grid = g.Grid(16)
+    population = p.AntPopulation(stream=sp.make_stream(1))
+
+    for _ in range(60):
+        ss.population_step(population, grid, 251, 8)
+        followers = population.state[:population.count] == FOLLOWER_CODE
+        assert population.num_followers() == np.count_nonzero(followers)
+    assert population.num_exited() > 0
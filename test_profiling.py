@@ -0,0 +1,61 @@
+"""Unit tests for profiling.py"""
+
+# imports
+import pytest
+import grid as g
+import population as p
+import profiling as pr
+import sampling as sp
+import simulation_setup as ss
+from constants import DECISIONS, STEP_PHASES
+
+
+def _run(engine:str, profiler:pr.StepProfiler | None, num_steps:int = 60)->tuple:
+    """Runs a small simulation, returning its ants and the number of ant
+      moves made."""
+    stream = sp.make_stream(3)
+    grid = g.Grid(20)
+    if engine == "array":
+        ants_on_grid = p.AntPopulation(stream=stream)
+        step = lambda: ss.population_step(ants_on_grid, grid, 251, 8,
+                                          profiler=profiler)
+    else:
+        ants_on_grid = []
+        step = lambda: ss.simulation_step(ants_on_grid, grid, 251, 8, stream,
+                                          profiler=profiler)
+    ant_moves = 0
+    for _ in range(num_steps):
+        ant_moves += len(ants_on_grid) + 1
+        step()
+    return ants_on_grid, ant_moves
+
+
+######## StepProfiler ########
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_profiler_counts_every_decision(engine):
+    """Check that every ant move is counted along one decision path, and
+      every phase is timed."""
+    profiler = pr.StepProfiler()
+
+    _, ant_moves = _run(engine, profiler)
+
+    assert sum(profiler.decision_calls.values()) == ant_moves
+    assert profiler.decision_calls["follow_drop"] > 0
+    assert profiler.phase_calls["spawn"] == 60
+    assert all(profiler.phase_seconds[phase] > 0 for phase in STEP_PHASES)
+
+@pytest.mark.parametrize("engine", ["object", "array"])
+def test_profiler_does_not_change_results(engine):
+    """Check that a profiled run matches an unprofiled one."""
+    profiled, _ = _run(engine, pr.StepProfiler())
+    plain, _ = _run(engine, None)
+
+    assert ss.total_F_value(profiled) == ss.total_F_value(plain)
+    assert ss.total_L_value(profiled) == ss.total_L_value(plain)
+
+def test_report_lists_phases_and_decisions():
+    """Check that the report has one line per phase and decision path."""
+    report = pr.StepProfiler().report()
+
+    for name in STEP_PHASES + DECISIONS:
+        assert name in report
@@ -0,0 +1,82 @@
+"""Unit tests for result_cache.py"""
+
+# imports
+import os
+import subprocess
+import sys
+import numpy as np
+import pytest
+import result_cache as rc
+import simulation_run as sr
+
+
+def _run(cache_dir:str, seed:int = 0, **kwargs)->dict:
+    """Runs a small headless simulation with a result cache."""
+    return sr.run_simulation(32, 251, 8, "test", num_steps=40, engine="array",
+                             seed=seed, plot=False, cache_dir=cache_dir,
+                             **kwargs)
+
+
+######## run_simulation ########
+def test_cached_run_matches_simulated_run(tmp_path):
+    """Check that a rerun loads the stored results, metrics included."""
+    first = _run(str(tmp_path), record_metrics=True)
+    second = _run(str(tmp_path), record_metrics=True)
+
+    assert len(os.listdir(tmp_path)) == 1
+    assert (second["F"], second["L"], second["exited"]) == \
+        (first["F"], first["L"], first["exited"])
+    assert np.array_equal(second["grid"].grid, first["grid"].grid)
+    assert np.array_equal(second["metrics"]["F"], first["metrics"]["F"])
+
+def test_unseeded_runs_are_not_cached(tmp_path):
+    """Check that runs without an int seed never touch the cache."""
+    _run(str(tmp_path), seed=None)
+
+    assert os.listdir(tmp_path) == []
+
+
+######## ResultCache ########
+def test_key_depends_on_config():
+    """Check that configs differing in one value get different keys."""
+    config = {"grid_size": 32, "fidelity": 251, "tau": 8, "B": [0.36, 0.047,
+              0.008, 0.002], "num_steps": 40, "seed": 0, "engine": "array",
+              "grid_dtype": "float64", "tile_size": None,
+              "spawner": None, "convergence": None}
+
+    assert rc.ResultCache.key(config) == rc.ResultCache.key(dict(config))
+    assert rc.ResultCache.key(config) != \
+        rc.ResultCache.key(dict(config, seed=1))
+
+def test_evict_removes_least_recently_used(tmp_path):
+    """Check that eviction removes the oldest entries first."""
+    cache = rc.ResultCache(str(tmp_path), max_bytes=250)
+    for age, name in enumerate(["old", "used", "new"]):
+        path = tmp_path / f"{name}.npz"
+        path.write_bytes(b"0" * 100)
+        os.utime(path, (age, age))
+    os.utime(tmp_path / "used.npz", (5, 5))
+
+    cache.evict()
+
+    assert sorted(os.listdir(tmp_path)) == ["new.npz", "used.npz"]
+
+def test_invalid_max_bytes(tmp_path):
+    """Check that the cache needs room for entries."""
+    with pytest.raises(ValueError, match="Invalid max_bytes; max_bytes must"\
+    " be larger than 0."):
+        rc.ResultCache(str(tmp_path), max_bytes=0)
+
+def test_source_files_cover_run_imports():
+    """Check that every repository module simulation_run imports is hashed
+    into the code version."""
+    directory = os.path.dirname(os.path.abspath(rc.__file__))
+    code = ("import os, sys, simulation_run; print(' '.join("
+            "os.path.basename(module.__file__) for module in"
+            " list(sys.modules.values()) if getattr(module, '__file__', None)"
+            f" and os.path.dirname(os.path.abspath(module.__file__)) =="
+            f" {directory!r}))")
+    output = subprocess.run([sys.executable, "-c", code], cwd=directory,
+                            check=True, capture_output=True, text=True)
+
+    assert set(output.stdout.split()) <= set(rc.SOURCE_FILES)
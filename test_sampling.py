@@ -0,0 +1,87 @@
+"""Unit tests for sampling.py"""
+
+# imports
+import pytest
+import numpy as np
+import sampling as sp
+
+
+######## TurnKernel ########
+def test_turn_kernel_probabilities():
+    """Check that the kernel table goes straight with p_straight and turns
+    with probability B, split evenly left and right."""
+    kernel = sp.TurnKernel((0.2, 0.1, 0.0, 0.0))
+
+    probabilities = np.diff(np.concatenate(([0], kernel.cdf)))
+
+    assert kernel.p_straight == pytest.approx(0.7)
+    assert list(kernel.deltas) == [0, -1, 1, -2, 2, -3, 3, -4, 4]
+    assert probabilities == pytest.approx([0.7, 0.1, 0.1, 0.05, 0.05,
+                                           0, 0, 0, 0])
+
+def test_turn_kernel_skips_zero_kernels():
+    """Check that turns with zero probability are never drawn."""
+    kernel = sp.TurnKernel((0.5, 0.0, 0.0, 0.5))
+    u = np.linspace(0, 1, 1000, endpoint=False)
+
+    angles = kernel.angles_of_turn(u)
+
+    assert set(angles) == {-4, -1, 1, 4}
+    assert {kernel.angle_of_turn(value) for value in u} == {-4, -1, 1, 4}
+
+def test_turn_kernel_invalid():
+    """Check that a turning kernel must have some turn probability."""
+    with pytest.raises(ValueError, match="Invalid turning kernel; B should"\
+    " sum to more than 0."):
+        sp.TurnKernel((0, 0, 0, 0))
+
+def test_get_turn_kernel_cached():
+    """Check that the kernel table is built once per B."""
+    assert sp.get_turn_kernel((0.1, 0.1, 0.1, 0.1)) is \
+        sp.get_turn_kernel((0.1, 0.1, 0.1, 0.1))
+
+
+######## RandomStream ########
+def test_random_stream_refills():
+    """Check that the stream keeps handing out numbers past one block."""
+    stream = sp.RandomStream(block_size=8)
+
+    singles = [stream.uniform() for _ in range(20)]
+    bulk = np.concatenate([stream.uniforms(5) for _ in range(5)])
+
+    assert len(bulk) == 25
+    assert all(0 <= value < 1 for value in singles)
+    assert np.all((0 <= bulk) & (bulk < 1))
+    assert len(stream.uniforms(100)) == 100
+
+def test_random_stream_integers():
+    """Check that integer draws stay in range."""
+    stream = sp.RandomStream()
+
+    values = stream.integers(8, 1000)
+
+    assert values.min() >= 0
+    assert values.max() <= 7
+
+
+######## make_stream and spawn_streams ########
+def test_make_stream_reproducible():
+    """Check that the same seed gives the same random numbers."""
+    first = sp.make_stream(42)
+    second = sp.make_stream(42)
+
+    assert [first.uniform() for _ in range(10)] == \
+        [second.uniform() for _ in range(10)]
+    assert np.array_equal(first.uniforms(50), second.uniforms(50))
+
+def test_spawn_streams_independent():
+    """Check that spawned streams differ from each other but not between
+    runs with the same seed."""
+    streams = sp.spawn_streams(7, 3)
+    again = sp.spawn_streams(7, 3)
+
+    draws = [stream.uniforms(20) for stream in streams]
+
+    assert not np.array_equal(draws[0], draws[1])
+    assert not np.array_equal(draws[1], draws[2])
+    assert np.array_equal(draws[2], again[2].uniforms(20))
@@ -0,0 +1,62 @@
+"""Unit tests for snapshots.py"""
+
+# imports
+import numpy as np
+import pytest
+import grid as g
+import population as p
+import sampling as sp
+import simulation_setup as ss
+import snapshots as sn
+
+
+######## SnapshotWriter and read_snapshots ########
+@pytest.mark.parametrize("grid_options", [
+    {}, {"sparse": True}, {"chunk_size": 8},
+    {"backend": "memmap", "chunk_size": 8}])
+def test_snapshots_round_trip(tmp_path, grid_options):
+    """Check that keyframes and deltas read back as the fields and ants that
+    were written, for whole, tracked-cell and chunk copies of the field."""
+    path = str(tmp_path / "run.snap")
+    grid = g.Grid(24, dtype=np.uint16, **grid_options)
+    population = p.AntPopulation(stream=sp.make_stream(2))
+    writer = sn.SnapshotWriter(path, grid, keyframe_every=3)
+    expected = []
+
+    for step in range(40):
+        ss.population_step(population, grid, 251, 8)
+        if step % 4 == 0:
+            writer.write(step, population, grid)
+            expected.append((step, grid.grid.copy(),
+                             population.get_locations()[0].copy()))
+    writer.close()
+
+    snapshots = list(sn.read_snapshots(path))
+    assert len(snapshots) == len(expected)
+    for snapshot, (step, field, x) in zip(snapshots, expected):
+        assert snapshot["step"] == step
+        assert np.array_equal(snapshot["field"], field)
+        assert np.array_equal(snapshot["x"], x)
+
+def test_read_snapshots_stops_at_cut_off_record(tmp_path):
+    """Check that a record cut off by a crash ends the sequence."""
+    path = tmp_path / "run.snap"
+    grid = g.Grid(8)
+    writer = sn.SnapshotWriter(str(path), grid)
+    for step in range(2):
+        grid.add_pheromone_for_point(step, 1, 5)
+        writer.write(step, [], grid)
+    writer.close()
+    path.write_bytes(path.read_bytes()[:-10])
+
+    assert [snapshot["step"] for snapshot in sn.read_snapshots(str(path))] \
+        == [0]
+
+def test_read_snapshots_invalid_file(tmp_path):
+    """Check that files without the snapshot header are rejected."""
+    path = tmp_path / "other.bin"
+    path.write_bytes(b"not a snapshot file")
+
+    with pytest.raises(ValueError, match="Invalid snapshot file; missing"\
+    " snapshot file header."):
+        list(sn.read_snapshots(str(path)))
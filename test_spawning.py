@@ -0,0 +1,109 @@
+"""Unit tests for spawning.py"""
+
+# imports
+import numpy as np
+import pytest
+import ensemble as e
+import grid as g
+import population as p
+import sampling as sp
+import simulation_run as sr
+import simulation_setup as ss
+import spawning as sw
+
+
+######## schedules ########
+def test_fixed_schedule():
+    """Check that fixed schedules release on their own steps only."""
+    schedule = sw.FixedSchedule(5, every=3, start=2)
+    stream = sp.make_stream(0)
+
+    assert [schedule.count(step, stream) for step in range(9)] == \
+        [0, 0, 5, 0, 0, 5, 0, 0, 5]
+    with pytest.raises(ValueError):
+        sw.FixedSchedule(1, every=0)
+
+def test_poisson_schedule_mean():
+    """Check that Poisson releases average out to the rate."""
+    schedule = sw.PoissonSchedule(40.0)
+    stream = sp.make_stream(1)
+    counts = [schedule.count(step, stream) for step in range(2000)]
+
+    assert abs(np.mean(counts) - 40.0) < 1.0
+
+
+######## Spawner ########
+def test_spawn_population_at_every_hill():
+    """Check that one step adds each hill's ants at that hill, counted by the
+    occupancy index."""
+    grid = g.Grid(32)
+    grid.track_occupancy([], [])
+    population = p.AntPopulation(capacity=4, stream=sp.make_stream(2))
+    spawner = sw.Spawner([(3, 4), (20, 10)], [sw.FixedSchedule(3),
+                                              sw.FixedSchedule(1000)])
+
+    assert spawner.spawn_population(population, grid) == 1003
+    x, y = population.get_locations()
+    assert list(zip(x[:4], y[:4])) == [(3, 4)] * 3 + [(20, 10)]
+    assert np.all(population.get_directions() < 8)
+    assert grid.occupancy.count_at(20, 10) == 1000
+    assert spawner.step == 1
+
+def test_spawn_ants_matches_population():
+    """Check that both engines release the same ants for the same stream."""
+    spawner = sw.Spawner([(5, 5), (9, 2)], [sw.PoissonSchedule(4.0),
+                                            sw.FixedSchedule(2, every=2)])
+    ants_on_grid = []
+    for _ in range(10):
+        spawner.spawn_ants(ants_on_grid, g.Grid(16), sp.make_stream(3))
+    spawner.step = 0
+    population = p.AntPopulation(stream=sp.make_stream(3))
+    for _ in range(10):
+        population.stream = sp.make_stream(3)
+        spawner.spawn_population(population, g.Grid(16))
+
+    x, y = population.get_locations()
+    assert [ant.get_location() for ant in ants_on_grid] == \
+        list(zip(x.tolist(), y.tolist()))
+    assert [ant.get_direction() for ant in ants_on_grid] == \
+        population.get_directions().tolist()
+
+def test_ensemble_add_ants_at():
+    """Check that ants added at points go to every replicate."""
+    population = e.EnsemblePopulation(3, stream=sp.make_stream(0))
+    population.add_ants_at(np.array([1, 2]), np.array([3, 4]))
+
+    assert list(population.live_counts()) == [2, 2, 2]
+    assert list(population.x[:population.count]) == [1, 2] * 3
+
+
+######## run_simulation ########
+def test_run_with_spawner(tmp_path):
+    """Check that runs with a spawner step, cache and reject hills off the
+    grid."""
+    def spawner():
+        return sw.Spawner([(4, 4), (12, 12)], [sw.FixedSchedule(2),
+                                               sw.PoissonSchedule(1.5)])
+    first = sr.run_simulation(16, 251, 8, "test", num_steps=20,
+                              engine="array", seed=5, plot=False,
+                              cache_dir=str(tmp_path), spawner=spawner())
+    second = sr.run_simulation(16, 251, 8, "test", num_steps=20,
+                               engine="array", seed=5, plot=False,
+                               cache_dir=str(tmp_path), spawner=spawner())
+
+    assert first["live"] + first["exited"] > 40
+    assert np.array_equal(first["grid"].grid, second["grid"].grid)
+    with pytest.raises(ValueError):
+        sr.run_simulation(16, 251, 8, "test", num_steps=1, plot=False,
+                          spawner=sw.Spawner([(16, 0)],
+                                             [sw.FixedSchedule()]))
+
+def test_object_step_with_spawner():
+    """Check that object steps release the spawner's ants."""
+    ants_on_grid = []
+    grid = g.Grid(32)
+    spawner = sw.Spawner([(16, 16)], [sw.FixedSchedule(4)])
+    exited = ss.simulation_step(ants_on_grid, grid, 251, 8,
+                                sp.make_stream(0), spawner=spawner)
+
+    assert len(ants_on_grid) + exited == 4
@@ -0,0 +1,74 @@
+"""Unit tests for sweep.py"""
+
+# imports
+import json
+import sweep as sw
+
+
+######## sweep_configs ########
+def test_sweep_configs_product():
+    """Check that sweep_configs makes one config per combination."""
+    configs = sw.sweep_configs([255, 251], [8], [sw.DEFAULT_B], [64, 128],
+                               [100], [0, 1, 2])
+
+    assert len(configs) == 12
+    assert len({sw.config_key(config) for config in configs}) == 12
+
+def test_config_key_ignores_results():
+    """Check that a results record has the same key as its config."""
+    config = sw.sweep_configs([255], [8], [sw.DEFAULT_B], [64], [100], [0])[0]
+    record = dict(config, F=10, L=2)
+
+    assert sw.config_key(json.loads(json.dumps(record))) == \
+        sw.config_key(config)
+
+def test_config_key_includes_convergence():
+    """Check that runs with different convergence settings have different
+    keys, and that records without them match runs that go all steps."""
+    base = sw.sweep_configs([255], [8], [sw.DEFAULT_B], [64], [100], [0])[0]
+    stopped = sw.sweep_configs([255], [8], [sw.DEFAULT_B], [64], [100], [0],
+                               convergence={"window": 20})[0]
+    looser = sw.sweep_configs([255], [8], [sw.DEFAULT_B], [64], [100], [0],
+                              convergence={"window": 20, "tolerance": 0.1})[0]
+    old_record = {key: value for key, value in base.items()
+                  if key != "convergence"}
+
+    assert len({sw.config_key(config)
+                for config in (base, stopped, looser)}) == 3
+    assert sw.config_key(old_record) == sw.config_key(base)
+    assert stopped["convergence"]["tolerance"] == 0.01
+
+
+######## completed_keys ########
+def test_completed_keys_skips_cut_off_line(tmp_path):
+    """Check that a line cut off by a crash does not count as complete."""
+    configs = sw.sweep_configs([255, 251], [8], [sw.DEFAULT_B], [64], [100],
+                               [0])
+    results_path = tmp_path / "results.jsonl"
+    results_path.write_text(json.dumps(dict(configs[0], F=1, L=1)) + "\n"
+                            + json.dumps(configs[1])[:20])
+
+    done = sw.completed_keys(str(results_path))
+
+    assert done == {sw.config_key(configs[0])}
+
+def test_completed_keys_missing_file(tmp_path):
+    """Check that a missing results file means no runs are complete."""
+    assert sw.completed_keys(str(tmp_path / "missing.jsonl")) == set()
+
+
+######## run_sweep ########
+def test_run_sweep_skips_completed_runs(tmp_path):
+    """Check that a sweep writes one line per run, and that running it again
+    runs nothing."""
+    configs = sw.sweep_configs([255, 247], [8], [sw.DEFAULT_B], [16], [20],
+                               [0])
+    results_path = str(tmp_path / "results.jsonl")
+
+    assert sw.run_sweep(configs, results_path, processes=2) == 2
+    assert sw.run_sweep(configs, results_path, processes=2) == 0
+
+    with open(results_path, encoding="utf-8") as results_file:
+        records = [json.loads(line) for line in results_file]
+    assert sorted(record["fidelity"] for record in records) == [247, 255]
+    assert all(record["live"] + record["exited"] == 20 for record in records)
@@ -0,0 +1,115 @@
+"""Unit tests for tiled.py"""
+
+# imports
+import concurrent.futures
+import contextlib
+import io
+import threading
+import numpy as np
+import pytest
+import convergence as cv
+import grid as g
+import population as p
+import sampling as sp
+import simulation_run as sr
+import snapshots as sn
+import spawning as sw
+import tiled as t
+from constants import FOLLOWER_CODE
+
+
+def _run(num_workers:int, num_steps:int = 80)->tuple:
+    """Runs a small tiled simulation, returning its ants and grid."""
+    stream = sp.make_stream(5)
+    grid = g.Grid(32)
+    population = p.AntPopulation(stream=stream)
+    stepper = t.make_tiled_stepper(32, 8, stream, num_workers=num_workers)
+    exited = 0
+    for _ in range(num_steps):
+        exited += stepper.step(population, grid, 251, 8)
+    stepper.close()
+    return population, grid, exited
+
+
+######## TiledStepper ########
+def test_results_do_not_depend_on_workers():
+    """Check that one and several worker threads give identical runs."""
+    one, one_grid, _ = _run(1)
+    many, many_grid, _ = _run(4)
+
+    assert np.array_equal(one.get_locations()[0], many.get_locations()[0])
+    assert np.array_equal(one.get_directions(), many.get_directions())
+    assert np.array_equal(one_grid.grid, many_grid.grid)
+
+def test_ants_are_kept_across_tiles():
+    """Check that every spawned ant is either on the grid or exited, and
+    that the follower count matches the ant states."""
+    population, _, exited = _run(2)
+
+    assert population.num_on_grid() + exited == 80
+    assert population.num_exited() == exited
+    assert population.num_followers() == np.count_nonzero(
+        population.state[:population.count] == FOLLOWER_CODE)
+
+def test_steps_without_ants():
+    """Check that steps with no ants on the grid, before a spawner's first
+    release, leave an empty population."""
+    stream = sp.make_stream(5)
+    grid = g.Grid(32)
+    population = p.AntPopulation(stream=stream)
+    spawner = sw.Spawner([(16, 16)], [sw.FixedSchedule(2, start=3)])
+    stepper = t.make_tiled_stepper(32, 8, stream, num_workers=2)
+
+    counts = []
+    for _ in range(5):
+        stepper.step(population, grid, 251, 8, spawner=spawner)
+        counts.append(population.count)
+    stepper.close()
+
+    assert counts == [0, 0, 0, 2, 4]
+
+def test_invalid_tile_size():
+    """Check that tiles need a positive size."""
+    with pytest.raises(ValueError, match="Invalid tile size; tile_size must"\
+    " be larger than 0."):
+        t.TiledStepper(32, 0, [])
+
+def test_interrupted_run_releases_threads(tmp_path):
+    """Check that a run stopped by an exception mid-loop still shuts down
+    the tiled stepper's threads and finishes the snapshot file."""
+    class InterruptingMonitor(cv.ConvergenceMonitor):
+        """Monitor that interrupts the run at step 30."""
+        def update(self, step, ants, grid)->bool:
+            if step == 30:
+                raise KeyboardInterrupt
+            return False
+
+    threads_before = set(threading.enumerate())
+    path = str(tmp_path / "run.snap")
+    with pytest.raises(KeyboardInterrupt), \
+            contextlib.redirect_stdout(io.StringIO()):
+        sr.run_simulation(32, 251, 8, "test", 100, engine="array", seed=1,
+                          plot=False, tile_size=8, num_workers=2,
+                          snapshot_path=path, snapshot_every=10,
+                          convergence=InterruptingMonitor())
+
+    assert set(threading.enumerate()) <= threads_before
+    assert [snapshot["step"] for snapshot in sn.read_snapshots(path)] \
+        == [9, 19, 29]
+
+
+######## threaded evaporation ########
+@pytest.mark.parametrize("chunk_size", [None, 8])
+def test_threaded_evaporation_matches_serial(chunk_size):
+    """Check that evaporating on a thread pool gives the serial result."""
+    serial = g.Grid(600, dtype=np.uint8, chunk_size=chunk_size)
+    threaded = g.Grid(600, dtype=np.uint8, chunk_size=chunk_size)
+    x = np.arange(0, 599, 7)
+    for grid in (serial, threaded):
+        grid.add_pheromone_for_points(x, x[::-1], 3)
+
+    serial.evaporate(2)
+    with concurrent.futures.ThreadPoolExecutor(3) as executor:
+        threaded.evaporate(2, executor=executor)
+
+    assert np.array_equal(serial.grid, threaded.grid)
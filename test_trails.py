@@ -0,0 +1,98 @@
+"""Unit tests for trails.py"""
+
+# imports
+import numpy as np
+import grid as g
+import trails as tr
+
+
+def _plus_field()->np.ndarray:
+    """Field with two crossing trails, three grid spaces wide."""
+    field = np.zeros((64, 64))
+    field[30:33, 5:60] = 5
+    field[5:60, 30:33] = 5
+    return field
+
+
+######## extraction ########
+def test_crossing_trails():
+    """Check that two crossing trails give one branch point joined to four
+    trail ends."""
+    network = tr.extract_field_trails(_plus_field(), (31, 31), threshold=1)
+
+    assert network.num_components() == 1
+    assert network.num_branch_points() == 1
+    assert sorted(network.node_degree) == [1, 1, 1, 1, 4]
+    assert len(network.edge_start) == 4
+    assert np.all(network.edge_distance == 0)
+    assert network.component_cells[0] == np.count_nonzero(_plus_field())
+    assert network.total_length() == network.component_lengths()[0]
+
+def test_loop_and_separate_components():
+    """Check that a ring becomes one node with a loop edge, and a separate
+    speck its own component."""
+    y, x = np.mgrid[:64, :64]
+    radius = np.hypot(x - 32, y - 32)
+    field = np.where((radius > 15) & (radius < 18), 3.0, 0.0)
+    field[2, 2] = 3
+
+    network = tr.extract_field_trails(field, (32, 32), threshold=1)
+
+    assert network.num_components() == 2
+    assert list(network.node_degree) == [0, 2]
+    assert network.edge_start[0] == network.edge_end[0] == 1
+    assert 2 * np.pi * 15 < network.total_length() < 2 * np.pi * 20
+    assert 15 < network.component_distance[1] < 17
+
+def test_threshold_and_empty_field():
+    """Check that pheromone below the threshold is not trail."""
+    network = tr.extract_field_trails(_plus_field(), (31, 31), threshold=6)
+
+    assert network.num_components() == 0
+    assert len(network.node_x) == 0
+
+def test_graph_is_consistent():
+    """Check on noisy fields that every edge joins nodes of its own component
+    and node degrees count every edge end."""
+    stream = np.random.default_rng(0)
+    for _ in range(10):
+        field = (stream.random((48, 48)) < 0.45).astype(float)
+        network = tr.extract_field_trails(field, (24, 24))
+
+        assert network.node_degree.sum() == 2 * len(network.edge_start)
+        assert np.array_equal(network.node_component[network.edge_start],
+                              network.node_component[network.edge_end])
+        assert np.array_equal(network.edge_component,
+                              network.node_component[network.edge_start])
+        assert np.all(network.edge_length >= 1)
+
+def test_extract_trails_from_grid():
+    """Check that grids are measured from their own hill."""
+    simulation_grid = g.Grid(64)
+    simulation_grid.set_grid(_plus_field())
+
+    network = tr.extract_trails(simulation_grid)
+
+    assert network.hill == (32, 32)
+    assert network.component_distance[0] == 0
+
+
+######## union_find ########
+def test_union_find():
+    """Check that linked items share the smallest item as their root."""
+    roots = tr.union_find(7, np.array([5, 1, 3, 6]), np.array([6, 3, 6, 0]))
+
+    assert list(roots) == [0, 0, 2, 0, 4, 0, 0]
+
+
+######## export ########
+def test_save_and_load(tmp_path):
+    """Check that a saved network reads back the same."""
+    network = tr.extract_field_trails(_plus_field(), (31, 31))
+    path = str(tmp_path / "trails.npz")
+    network.save(path)
+    loaded = tr.TrailNetwork.load(path)
+
+    assert loaded.hill == network.hill
+    for name in tr.TrailNetwork._ARRAYS:
+        assert np.allclose(getattr(loaded, name), getattr(network, name))
@@ -0,0 +1,70 @@
+"""Unit tests for visualize.py"""
+
+# imports
+import os
+import matplotlib
+matplotlib.use("Agg") # draw without a display
+import matplotlib.pyplot as mp
+import numpy as np
+import pytest
+from PIL import Image
+import ants as a
+import grid as g
+import population as p
+import sampling as sp
+import simulation_setup as ss
+import visualize as v
+
+
+######## FrameRenderer ########
+@pytest.mark.parametrize("name", ["frames", "run.gif"])
+def test_frame_renderer_writes_strided_frames(tmp_path, name):
+    """Check that a renderer writes one frame per stride, as PNG files or as
+    GIF frames."""
+    path = str(tmp_path / name)
+    grid = g.Grid(16)
+    population = p.AntPopulation(stream=sp.make_stream(1))
+    renderer = v.FrameRenderer(path, grid, "test", stride=3)
+
+    for step in range(10):
+        ss.population_step(population, grid, 251, 8)
+        renderer.render(population, grid, step)
+    renderer.close()
+
+    assert renderer.num_frames == 4
+    if name.endswith(".gif"):
+        with Image.open(path) as gif:
+            assert gif.n_frames == 4
+    else:
+        assert sorted(os.listdir(path)) == [f"frame_{step:06d}.png"
+                                            for step in (0, 3, 6, 9)]
+
+
+######## _plot_ants and _group_by_direction ########
+def test_group_by_direction():
+    """Check that groups[d] holds the indices of the ants heading d, in
+    order."""
+    groups = v._group_by_direction(np.array([3, 0, 3, 7, 0, 3]))
+
+    assert len(groups) == 8
+    assert [list(group) for group in groups] == [[1, 4], [], [], [0, 2, 5],
+                                                 [], [], [], [3]]
+
+@pytest.mark.parametrize("num_ants", [0, 1, 50])
+def test_plot_ants_one_collection_per_heading(num_ants):
+    """Check that ants are drawn with at most one collection per heading,
+    each holding that heading's ants, and that no ants draw nothing."""
+    stream = sp.make_stream(4)
+    ants_on_grid = [a.Ant(x=x, y=x, stream=stream, direction=x % 8)
+                    for x in range(num_ants)]
+    mp.figure()
+    v._plot_ants(ants_on_grid)
+
+    collections = mp.gca().collections
+    assert len(collections) == min(num_ants, 8)
+    assert sum(len(collection.get_offsets())
+               for collection in collections) == num_ants
+    for collection in collections:
+        x = collection.get_offsets()[:, 0].astype(int)
+        assert len(set(x % 8)) == 1
+    mp.close()
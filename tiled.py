@@ -0,0 +1,173 @@
+""" Contains TiledStepper class, steps an AntPopulation with the grid split
+ into square tiles, updating the ants of each tile on a thread pool. """
+
+# imports
+import concurrent.futures
+import os
+import numpy as np
+import fidelity as fi
+import grid as g
+import population as p
+import sampling as sp
+import spawning as sw
+
+######## Global Variables ########
+from constants import EVAP_RATE
+
+
+######## TiledStepper class ########
+class TiledStepper:
+    """
+    Performs population_step with the ants grouped by the tile of the grid
+      they are on. Each step, all ants deposit, then every tile turns and
+      moves its own ants on a worker thread, then ants are regrouped by the
+      tile they moved into and the grid evaporates in parallel bands. Tiles
+      read the forward neighbors of their edge ants straight from the
+      neighboring tiles (the halo), which is safe because nothing writes to
+      the field while ants turn. Each tile draws from its own RandomStream,
+      so results depend on the tile size but not on the number of workers.
+
+    Attributes:
+        tile_size: Int representing the side of the square tiles, in grid
+          spaces.
+        tiles_per_side: Int representing the number of tiles along each side
+          of the grid.
+        tiles: List of AntPopulations, one per tile, holding the tile's ants
+          during a step.
+        num_workers: Int representing number of worker threads.
+        executor: ThreadPoolExecutor running the tiles.
+    """
+
+    def __init__(self, grid_size:int, tile_size:int,
+                 streams:list[sp.RandomStream],
+                 B:tuple[float, float, float, float] =
+                 (0.360, 0.047, 0.008, 0.002),
+                 num_workers:int | None = None)->None:
+        if tile_size <= 0:
+            raise ValueError("Invalid tile size; tile_size must be larger"
+                             " than 0.")
+        self.tile_size = tile_size
+        self.tiles_per_side = -(-grid_size // tile_size)
+        num_tiles = self.tiles_per_side ** 2
+        if len(streams) != num_tiles:
+            raise ValueError("Invalid streams; streams needs one RandomStream"
+                             " per tile.")
+        self.tiles = [p.AntPopulation(capacity=64, B=B, stream=stream)
+                      for stream in streams]
+        self.num_workers = num_workers or os.cpu_count() or 1
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            self.num_workers)
+
+    def __repr__(self)->str:
+        return f"tiled stepper | tiles: {self.tiles_per_side}x{self.tiles_per_side} of {self.tile_size}, workers: {self.num_workers}"
+
+    def step(self, population:p.AntPopulation, simulation_grid:g.Grid,
+             fidelity:int | fi.FidelityTable, tau:int,
+             spawner:sw.Spawner | None = None)->int:
+        """
+        Performs one time step, see simulation_setup.population_step.
+
+        Args:
+            population: AntPopulation representing ants on simulation_grid.
+            simulation_grid: Grid object representing lattice ants are being
+              simulated on.
+            fidelity: Int representing the probability of an ant to keep
+              following a trail, or a FidelityTable.
+            tau: Int representing "units" of pheromone ants deposit to their
+              location on the grid at each timestep.
+            spawner: Spawner releasing new ants at its hills. Default None;
+              one new ant per step at the grid's hill.
+
+        Returns:
+            number_exited: Int representing the number of ants that left the
+              grid during this step.
+
+        """
+        if simulation_grid.occupancy is not None:
+            raise ValueError("Invalid grid; tiled steps do not keep an"
+                             " occupancy index.")
+        # generate new ant per timestep, then every ant deposits
+        if spawner is not None:
+            spawner.spawn_population(population, simulation_grid)
+        else:
+            hill_loc = simulation_grid.get_hill_loc()
+            population.add_ants(hill_loc, hill_loc)
+        population.deposit(population.get_active(), simulation_grid, tau)
+
+        # hand each tile the ants currently on it
+        occupied = self._split(population)
+
+        def step_tile(tile:p.AntPopulation)->int:
+            active = tile.get_active()
+            tile.update_direction(active, simulation_grid, fidelity)
+            return tile.move(active, simulation_grid)
+        number_exited = sum(self.executor.map(
+            step_tile, [self.tiles[index] for index in occupied]))
+
+        # gather the ants back, so population stays the one ant store; its
+        #  own empty slice keeps steps without ants, e.g. before a spawner's
+        #  first release, to empty arrays of the right dtype
+        arrays = [np.concatenate([getattr(population, name)[:0]]
+                                 + [getattr(self.tiles[index], name)
+                                    [:self.tiles[index].count]
+                                    for index in occupied])
+                  for name in ("x", "y", "direction", "state")]
+        exited = population.exited
+        population.set_ants(*arrays)
+        population.exited = exited + number_exited
+
+        simulation_grid.evaporate(EVAP_RATE, executor=self.executor)
+        return number_exited
+
+    def _split(self, population:p.AntPopulation)->list[int]:
+        """Loads the ants of population into the tile they are on, keeping
+          their order, and returns the indices of tiles holding ants."""
+        count = population.count
+        x = population.x[:count]
+        y = population.y[:count]
+        tile_index = (y // self.tile_size) * self.tiles_per_side \
+            + x // self.tile_size
+        order = np.argsort(tile_index, kind="stable")
+        bounds = np.searchsorted(tile_index[order],
+                                 np.arange(len(self.tiles) + 1))
+
+        occupied = []
+        for index, tile in enumerate(self.tiles):
+            ants = order[bounds[index]:bounds[index + 1]]
+            if len(ants) == 0:
+                continue
+            tile.set_ants(x[ants], y[ants], population.direction[ants],
+                          population.state[ants])
+            occupied.append(index)
+        return occupied
+
+    def close(self)->None:
+        """Stops the worker threads."""
+        self.executor.shutdown()
+
+
+def make_tiled_stepper(grid_size:int, tile_size:int, stream:sp.RandomStream,
+                       B:tuple[float, float, float, float] =
+                       (0.360, 0.047, 0.008, 0.002),
+                       num_workers:int | None = None)->TiledStepper:
+    """
+    Makes a TiledStepper whose tile streams are seeded from stream, so a
+      seeded run stays reproducible.
+
+    Args:
+        grid_size: Int representing the number of points per grid side.
+        tile_size: Int representing the side of the square tiles.
+        stream: RandomStream of the run, drawn from once to seed the tiles.
+        B: Tuple representing the turning kernels (B1, B2, B3, B4).
+        num_workers: Int representing number of worker threads. Default
+          None; one per CPU.
+
+    Returns:
+        TiledStepper for the grid.
+
+    """
+    tiles_per_side = -(-grid_size // tile_size) if tile_size > 0 else 1
+    seed = int(stream.integers(2**62, 1)[0])
+    return TiledStepper(grid_size, tile_size,
+                        sp.spawn_streams(seed, tiles_per_side ** 2), B,
+                        num_workers)
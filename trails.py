@@ -0,0 +1,433 @@
+""" Contains trail network extraction: thresholds a final pheromone field,
+ labels connected trails, thins them to one-pixel skeletons and turns the
+ skeletons into a graph of nodes and edges, using NumPy and a vectorized
+ union-find. """
+
+# imports
+import numpy as np
+import grid as g
+
+# flat offsets of the 8 neighbors of a grid space, in Zhang-Suen order
+#  P2-P9: up, up-right, right, down-right, down, down-left, left, up-left
+_NEIGHBOR_STEPS = ((0, -1), (1, -1), (1, 0), (1, 1), (0, 1), (-1, 1),
+                   (-1, 0), (-1, -1))
+
+
+######## TrailNetwork class ########
+class TrailNetwork:
+    """
+    Trail network of a pheromone field as a graph. Nodes are trail ends
+      (degree 1), branch points (degree 3 or more) and isolated specks
+      (degree 0); edges are the skeleton paths between them. Loops without a
+      branch point get one node closing them. Coordinates are grid spaces,
+      distances are to the hill, lengths count 1 per straight and sqrt(2) per
+      diagonal skeleton step.
+
+    Attributes:
+        threshold: Float representing the smallest pheromone value counted as
+          trail.
+        hill: Tuple of ints of the hill (x, y) location.
+        node_x: Numpy array of ints of node x-locations.
+        node_y: Numpy array of ints of node y-locations.
+        node_degree: Numpy array of ints of the number of edge ends at each
+          node.
+        node_component: Numpy array of ints of each node's trail component.
+        edge_start: Numpy array of ints of each edge's first node.
+        edge_end: Numpy array of ints of each edge's last node.
+        edge_length: Numpy array of floats of edge lengths along the trail.
+        edge_distance: Numpy array of floats of each edge's closest distance
+          to the hill.
+        edge_component: Numpy array of ints of each edge's trail component.
+        component_cells: Numpy array of ints of the number of trail grid
+          spaces in each connected trail component.
+        component_distance: Numpy array of floats of each component's closest
+          distance to the hill.
+    """
+
+    # saved arrays, in file order
+    _ARRAYS = ("node_x", "node_y", "node_degree", "node_component",
+               "edge_start", "edge_end", "edge_length", "edge_distance",
+               "edge_component", "component_cells", "component_distance")
+
+    def __init__(self, threshold:float, hill:tuple[int, int],
+                 **arrays:np.ndarray)->None:
+        self.threshold = threshold
+        self.hill = hill
+        for name in self._ARRAYS:
+            setattr(self, name, arrays[name])
+
+    def __repr__(self)->str:
+        return f"trail network | components: {self.num_components()}, nodes: {len(self.node_x)}, edges: {len(self.edge_start)}, branch points: {self.num_branch_points()}, total length: {self.total_length():.1f}"
+
+    ######## 'Get' Functions ########
+    def num_components(self)->int:
+        """Returns number of connected trail components."""
+        return len(self.component_cells)
+
+    def num_branch_points(self)->int:
+        """Returns number of nodes where three or more trails meet."""
+        return int(np.count_nonzero(self.node_degree >= 3))
+
+    def total_length(self)->float:
+        """Returns summed length of every trail."""
+        return float(self.edge_length.sum())
+
+    def component_lengths(self)->np.ndarray:
+        """Returns summed trail length of each component."""
+        return np.bincount(self.edge_component, weights=self.edge_length,
+                           minlength=self.num_components())
+
+    def component_branch_points(self)->np.ndarray:
+        """Returns number of branch points in each component."""
+        return np.bincount(self.node_component[self.node_degree >= 3],
+                           minlength=self.num_components())
+
+    ######## Export ########
+    def save(self, path:str)->None:
+        """Writes the graph to path as a compressed .npz file, with 32-bit
+          integers and floats."""
+        arrays = {name: getattr(self, name) for name in self._ARRAYS}
+        for name, values in arrays.items():
+            arrays[name] = values.astype(np.float32 if values.dtype.kind == "f"
+                                         else np.int32)
+        np.savez_compressed(path, threshold=self.threshold,
+                            hill=np.array(self.hill), **arrays)
+
+    @classmethod
+    def load(cls, path:str)->"TrailNetwork":
+        """Reads a graph written by save."""
+        with np.load(path) as stored:
+            arrays = {name: stored[name] for name in cls._ARRAYS}
+            return cls(float(stored["threshold"]),
+                       tuple(int(value) for value in stored["hill"]),
+                       **arrays)
+
+
+######## Extraction ########
+def extract_trails(simulation_grid:g.Grid,
+                   threshold:float = 1.0)->TrailNetwork:
+    """
+    Extracts the trail network of a grid's pheromone field.
+
+    Args:
+        simulation_grid: Grid object holding the final pheromone field.
+        threshold: Float representing the smallest pheromone value counted
+          as trail. Default 1.0; any pheromone.
+
+    Returns:
+        TrailNetwork of the field.
+
+    """
+    hill_loc = simulation_grid.get_hill_loc()
+    return extract_field_trails(simulation_grid.grid, (hill_loc, hill_loc),
+                                threshold)
+
+
+def extract_field_trails(field:np.ndarray, hill:tuple[int, int],
+                         threshold:float = 1.0)->TrailNetwork:
+    """
+    Extracts the trail network of a pheromone field, see extract_trails.
+
+    Args:
+        field: Numpy 2D array of pheromone, indexed [y, x].
+        hill: Tuple of ints of the hill (x, y) location.
+        threshold: Float representing the smallest pheromone value counted
+          as trail.
+
+    Returns:
+        TrailNetwork of the field.
+
+    """
+    mask = np.asarray(field) >= threshold
+    rows = np.flatnonzero(mask.any(axis=1))
+    columns = np.flatnonzero(mask.any(axis=0))
+    if len(rows) == 0:
+        return _empty_network(threshold, hill)
+
+    # work on the trails' bounding box with a one grid space border, so
+    #  neighbors are flat offsets without bounds checks
+    y0, x0 = rows[0], columns[0]
+    box = mask[y0:rows[-1] + 1, x0:columns[-1] + 1]
+    width = box.shape[1] + 2
+    padded = np.zeros((box.shape[0] + 2, width), dtype=bool)
+    padded[1:-1, 1:-1] = box
+    flat_mask = padded.reshape(-1)
+    offsets = np.array([dy * width + dx for dx, dy in _NEIGHBOR_STEPS])
+
+    def distances(cells:np.ndarray)->np.ndarray:
+        """Distance of padded flat cells to the hill."""
+        return np.hypot(cells % width - 1 + x0 - hill[0],
+                        cells // width - 1 + y0 - hill[1])
+
+    # connected trail components, 8-connected
+    cells = np.flatnonzero(flat_mask)
+    component, num_components = label_cells(flat_mask, cells, offsets)
+    component_cells = np.bincount(component, minlength=num_components)
+    component_distance = np.full(num_components, np.inf)
+    np.minimum.at(component_distance, component, distances(cells))
+    cell_index = np.full(flat_mask.size, -1, dtype=np.int64)
+    cell_index[cells] = np.arange(len(cells))
+
+    # one grid space wide skeleton and its graph
+    skeleton = skeletonize(flat_mask, cells, offsets)
+    graph = _skeleton_graph(padded.size, width, skeleton)
+    node_cells, edge_start, edge_end, edge_length, edge_cells = graph
+
+    edge_distance = np.full(len(edge_start), np.inf)
+    np.minimum.at(edge_distance, edge_cells[0], distances(edge_cells[1]))
+    node_degree = np.bincount(np.concatenate((edge_start, edge_end)),
+                              minlength=len(node_cells))
+    return TrailNetwork(
+        threshold, hill,
+        node_x=node_cells % width - 1 + x0,
+        node_y=node_cells // width - 1 + y0,
+        node_degree=node_degree,
+        node_component=component[cell_index[node_cells]],
+        edge_start=edge_start,
+        edge_end=edge_end,
+        edge_length=edge_length,
+        edge_distance=edge_distance,
+        edge_component=component[cell_index[node_cells[edge_start]]],
+        component_cells=component_cells,
+        component_distance=component_distance)
+
+
+def label_cells(flat_mask:np.ndarray, cells:np.ndarray,
+                offsets:np.ndarray)->tuple[np.ndarray, int]:
+    """
+    Labels 8-connected components of a bordered flat mask.
+
+    Args:
+        flat_mask: Numpy flat array of bools of a mask with an empty border.
+        cells: Numpy array of ints of the mask's set flat indices, sorted.
+        offsets: Numpy array of the 8 flat neighbor offsets.
+
+    Returns:
+        component: Numpy array of ints of each cell's component, numbered in
+          order of each component's first cell.
+        num_components: Int representing the number of components.
+
+    """
+    index = np.full(flat_mask.size, -1, dtype=np.int64)
+    index[cells] = np.arange(len(cells))
+    # right, down-left, down and down-right neighbors cover each pair once
+    first, second = [], []
+    for offset in offsets[[2, 5, 4, 3]]:
+        neighbors = cells + offset
+        linked = flat_mask[neighbors]
+        first.append(np.flatnonzero(linked))
+        second.append(index[neighbors[linked]])
+    roots = union_find(len(cells), np.concatenate(first),
+                       np.concatenate(second))
+    _, component = np.unique(roots, return_inverse=True)
+    return component, int(component.max()) + 1 if len(component) else 0
+
+
+def union_find(number:int, first:np.ndarray, second:np.ndarray)->np.ndarray:
+    """
+    Joins items linked by pairs, all pairs at once: every round hooks the
+      larger root of each linked pair onto the smaller one, then jumps
+      pointers until each item points at its root.
+
+    Args:
+        number: Int representing the number of items.
+        first: Numpy array of ints of the first item of each pair.
+        second: Numpy array of ints of the second item of each pair.
+
+    Returns:
+        roots: Numpy array of ints, each item's root, the smallest item of
+          its group.
+
+    """
+    parent = np.arange(number)
+    while len(first):
+        first_root, second_root = parent[first], parent[second]
+        split = first_root != second_root
+        if not split.any():
+            break
+        # pairs already joined never split again
+        first, second = first[split], second[split]
+        first_root, second_root = first_root[split], second_root[split]
+        np.minimum.at(parent, np.maximum(first_root, second_root),
+                      np.minimum(first_root, second_root))
+        while True:
+            grandparent = parent[parent]
+            if np.array_equal(grandparent, parent):
+                break
+            parent = grandparent
+    return parent
+
+
+######## Skeleton ########
+def _removal_tables()->np.ndarray:
+    """Zhang-Suen removal decisions of both passes for every pattern of 8
+      neighbors, bit k set when neighbor P(k+2) is."""
+    codes = np.arange(256)
+    neighbors = (codes[:, None] >> np.arange(8)) & 1 == 1
+    count = neighbors.sum(axis=1)
+    # number of 0 to 1 changes going once around the neighbors
+    changes = (~neighbors & np.roll(neighbors, -1, axis=1)).sum(axis=1)
+    keep_shape = (count >= 2) & (count <= 6) & (changes == 1)
+    # P2*P4*P6 and P4*P6*P8 on the first pass, P2*P4*P8 and P2*P6*P8 on the
+    #  second, as neighbor columns
+    return np.array([keep_shape & ~neighbors[:, first].all(axis=1)
+                     & ~neighbors[:, second].all(axis=1)
+                     for first, second in (((0, 2, 4), (2, 4, 6)),
+                                           ((0, 2, 6), (0, 4, 6)))])
+
+
+_REMOVE = _removal_tables()
+
+
+def skeletonize(flat_mask:np.ndarray, cells:np.ndarray,
+                offsets:np.ndarray)->np.ndarray:
+    """
+    Thins a bordered flat mask to one grid space wide lines with the
+      Zhang-Suen algorithm. Each cell's neighbors are packed into an 8-bit
+      code looked up in a table of removal decisions, and after the first
+      passes only cells next to removed cells are checked again, since the
+      others would decide the same.
+
+    Args:
+        flat_mask: Numpy flat array of bools of a mask with an empty border.
+        cells: Numpy array of ints of the mask's set flat indices, sorted.
+        offsets: Numpy array of the 8 flat neighbor offsets, P2 to P9.
+
+    Returns:
+        skeleton: Numpy array of ints of the flat indices left set.
+
+    """
+    thinned = flat_mask.copy()
+    bits = thinned.view(np.uint8)
+    # cells to check again in each of the two passes, flagged so each is
+    #  queued once
+    pending = [cells, cells]
+    queued = [flat_mask.copy(), flat_mask.copy()]
+    # scratch space for dropping repeats without sorting
+    slot = np.zeros(flat_mask.size, dtype=np.int32)
+    while len(pending[0]) or len(pending[1]):
+        for number in (0, 1):
+            check = pending[number]
+            queued[number][check] = False
+            check = check[thinned[check]]
+            pending[number] = check[:0]
+            code = np.zeros(len(check), dtype=np.uint8)
+            for bit, offset in enumerate(offsets):
+                code |= bits[check + offset] << bit
+            removed = check[_REMOVE[number][code]]
+            if len(removed) == 0:
+                continue
+            thinned[removed] = False
+            touched = (removed[:, None] + offsets).reshape(-1)
+            touched = touched[thinned[touched]]
+            order = np.arange(len(touched), dtype=np.int32)
+            slot[touched] = order
+            touched = touched[slot[touched] == order]
+            for waiting in (0, 1):
+                new = touched[~queued[waiting][touched]]
+                queued[waiting][new] = True
+                pending[waiting] = np.concatenate((pending[waiting], new))
+    return np.flatnonzero(thinned)
+
+
+def _skeleton_graph(size:int, width:int, skeleton:np.ndarray)->tuple:
+    """
+    Builds the graph of a one grid space wide skeleton. Diagonal steps only
+      count where neither straight step around the corner is set, so
+      staircases do not look like branch points.
+
+    Args:
+        size: Int representing the number of flat grid spaces.
+        width: Int representing the width of the bordered grid.
+        skeleton: Numpy array of ints of the skeleton's flat indices, sorted.
+
+    Returns:
+        node_cells: Numpy array of ints of each node's flat index.
+        edge_start, edge_end: Numpy arrays of ints of edge end nodes.
+        edge_length: Numpy array of floats of edge lengths.
+        edge_cells: Tuple of Numpy arrays (edge, flat index) of every grid
+          space on each edge.
+
+    """
+    flat_skeleton = np.zeros(size, dtype=bool)
+    flat_skeleton[skeleton] = True
+    index = np.full(size, -1, dtype=np.int64)
+    index[skeleton] = np.arange(len(skeleton))
+
+    # adjacent skeleton pairs: right, down, and diagonals free of corners
+    first, second, length = [], [], []
+    for offset, corners in ((1, ()), (width, ()), (width + 1, (1, width)),
+                            (width - 1, (-1, width))):
+        neighbors = skeleton + offset
+        linked = flat_skeleton[neighbors]
+        for corner in corners:
+            linked &= ~flat_skeleton[skeleton + corner]
+        first.append(np.flatnonzero(linked))
+        second.append(index[neighbors[linked]])
+        length.append(np.full(len(first[-1]), np.sqrt(2) if corners else 1.0))
+    first, second = np.concatenate(first), np.concatenate(second)
+    length = np.concatenate(length)
+    degree = np.bincount(np.concatenate((first, second)),
+                         minlength=len(skeleton))
+
+    # nodes are clusters of cells not of degree 2, chains are runs of cells of
+    #  degree 2; both are grown by joining pairs of the same kind
+    is_node = degree != 2
+    same = is_node[first] == is_node[second]
+    roots = union_find(len(skeleton), first[same], second[same])
+    node_roots, group = np.unique(roots, return_inverse=True)
+    node_group = is_node[node_roots]
+    # number nodes and chains separately, both in order of first cell
+    number = np.where(node_group, np.cumsum(node_group) - 1,
+                      np.cumsum(~node_group) - 1)[group]
+    num_nodes = int(np.count_nonzero(node_group))
+    num_chains = len(node_roots) - num_nodes
+    node_cells = skeleton[node_roots[node_group]]
+
+    # chain ends attach to nodes; each open chain has exactly two
+    attach = is_node[first] != is_node[second]
+    chain_cell = np.where(is_node[first], second, first)[attach]
+    node_cell = np.where(is_node[first], first, second)[attach]
+    chain = number[chain_cell]
+    order = np.argsort(chain, kind="stable")
+    ends = number[node_cell][order].reshape(-1, 2) if len(order) else \
+        np.empty((0, 2), dtype=np.int64)
+    open_chains = chain[order][::2]
+
+    # chains closed on themselves get a node at their first cell
+    closed = np.ones(num_chains, dtype=bool)
+    closed[open_chains] = False
+    loops = np.flatnonzero(closed)
+    loop_cells = skeleton[node_roots[~node_group][loops]]
+    node_cells = np.concatenate((node_cells, loop_cells))
+    loop_nodes = num_nodes + np.arange(len(loops))
+
+    chain_ids = np.concatenate((open_chains, loops))
+    edge_start = np.concatenate((ends[:, 0], loop_nodes))
+    edge_end = np.concatenate((ends[:, 1], loop_nodes))
+    edge_of_chain = np.empty(num_chains, dtype=np.int64)
+    edge_of_chain[chain_ids] = np.arange(len(chain_ids))
+
+    # lengths: steps inside chains plus the steps onto their end nodes
+    in_chain = same & ~is_node[first]
+    edge_length = np.bincount(
+        edge_of_chain[number[np.concatenate((first[in_chain], chain_cell))]],
+        weights=np.concatenate((length[in_chain], length[attach])),
+        minlength=len(chain_ids))
+    on_chain = np.flatnonzero(~is_node)
+    edge_cells = (
+        np.concatenate((edge_of_chain[number[on_chain]],
+                        edge_of_chain[chain])),
+        np.concatenate((skeleton[on_chain], skeleton[node_cell])))
+    return node_cells, edge_start, edge_end, edge_length, edge_cells
+
+
+def _empty_network(threshold:float, hill:tuple[int, int])->TrailNetwork:
+    """Returns a TrailNetwork without any trails."""
+    ints = np.empty(0, dtype=np.int64)
+    floats = np.empty(0, dtype=float)
+    return TrailNetwork(
+        threshold, hill, node_x=ints, node_y=ints, node_degree=ints,
+        node_component=ints, edge_start=ints, edge_end=ints,
+        edge_length=floats, edge_distance=floats, edge_component=ints,
+        component_cells=ints, component_distance=floats)
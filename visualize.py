@@ -1,24 +1,30 @@
 """File contains visualization functions"""
 
 # imports
+import os
 import matplotlib.pyplot as mp
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
 import ants as a
 import grid as g
+import occupancy as o
+import population as p
 
 ######## Global Variables ########
 from constants import DIRECTION_TO_ANGLE
 
 
 ######## Static Visualization at a timestep ########
-def visualize_grid(ants_on_grid:list[a.Ant], simulation_grid:g.Grid, figure:str)->None:
+def visualize_grid(ants_on_grid:list[a.Ant] | p.AntPopulation, simulation_grid:g.Grid, figure:str)->None:
     """
     Function visualizes the grid and ants at one timestep. The grid shows
       pheromone concentrations (white - 0, grey - some, black - high), shows
       ant dots.
 
     Args:
-        ants_on_grid: List of Ant objects on simulation_grid. Should contain
-          only ants that are on the grid.
+        ants_on_grid: List of Ant objects on simulation_grid, or an
+          AntPopulation. Should contain only ants that are on the grid.
         simulation_grid: Grid object representing lattice ants are being
           simulated on.
         figure: str representing Figure name for figure titles.
@@ -37,14 +43,34 @@ def visualize_grid(ants_on_grid:list[a.Ant], simulation_grid:g.Grid, figure:str)
     mp.show()
 
 
+def visualize_density(occupancy:o.OccupancyIndex, figure:str)->None:
+    """
+    Function shows a heatmap of the number of ants on each grid space, read
+      from an OccupancyIndex rather than the ants.
+
+    Args:
+        occupancy: OccupancyIndex of the simulation grid.
+        figure: str representing Figure name for figure titles.
+
+    Returns:
+        None.
+
+    """
+    mp.figure()
+    mp.imshow(occupancy.counts, cmap="viridis", origin="upper")
+    mp.colorbar(label="ants per grid space")
+    mp.title(f"Ant density: figure {figure}")
+    mp.show()
+
+
 ######## Dynamic Visualization ########
-def visualize_grid_live(ants_on_grid:list[a.Ant], simulation_grid:g.Grid, step:int, figure:str, pause=0.05):
+def visualize_grid_live(ants_on_grid:list[a.Ant] | p.AntPopulation, simulation_grid:g.Grid, step:int, figure:str, pause=0.05):
     """
     Show live visualization of grid + ants.
 
     Args:
-        ants_on_grid: List of Ant objects on simulation_grid. Should contain
-          only ants that are on the grid.
+        ants_on_grid: List of Ant objects on simulation_grid, or an
+          AntPopulation. Should contain only ants that are on the grid.
         simulation_grid: Grid object representing lattice ants are being
           simulated on.
         step: Int representing the iteration number.
@@ -65,6 +91,125 @@ def visualize_grid_live(ants_on_grid:list[a.Ant], simulation_grid:g.Grid, step:i
     mp.pause(pause)
 
 
+######## Headless Visualization ########
+class FrameRenderer:
+    """
+    Renders simulation frames to disk without a GUI. One figure is built up
+      front on the Agg backend; each frame only swaps the pheromone image data
+      and ant positions before drawing.
+
+    Attributes:
+        output_path: String path frames are written to. A path ending in
+          ".gif" is an animated GIF, each frame appended as it is rendered
+          and the file finished when the renderer closes; any other path is
+          a directory of numbered PNG frames.
+        stride: Int representing how many steps pass between frames.
+        figure: str representing Figure name for frame titles.
+        num_frames: Int representing the number of frames rendered so far.
+    """
+
+    def __init__(self, output_path:str, simulation_grid:g.Grid, figure:str,
+                 stride:int = 10, vmax:int = 84, fps:int = 10)->None:
+        if stride <= 0:
+            raise ValueError("Invalid stride; stride must be larger than 0.")
+        self.output_path = output_path
+        self.stride = stride
+        self.figure = figure
+        self.num_frames = 0
+        self._gif = output_path.lower().endswith(".gif")
+        self._fps = fps
+        # open GIF file and the first frame, whose palette every frame uses
+        self._gif_file = None
+        self._palette = None
+        if not self._gif:
+            os.makedirs(output_path, exist_ok=True)
+
+        # figure, image and ant artists are built once and reused per frame
+        self._fig = Figure(figsize=(6.4, 4.8))
+        self._canvas = FigureCanvasAgg(self._fig)
+        self._ax = self._fig.add_subplot()
+        self._image = self._ax.imshow(simulation_grid.grid, cmap="Greys",
+                                      origin="upper", vmin=0, vmax=vmax)
+        self._fig.colorbar(self._image, ax=self._ax,
+                           label="Pheromone Concentration (C(x,t))")
+        self._ax.set_xlim(0, simulation_grid.get_size())
+        self._ax.set_ylim(simulation_grid.get_size(), 0)
+        self._ax.set_xlabel("X Position (grid spaces)")
+        self._ax.set_ylabel("Y Position (grid spaces)")
+        # one scatter per heading, since a scatter has one marker shape
+        self._ant_artists = {
+            direction: self._ax.scatter([], [], marker=(3, 0, angle),
+                                        c="red", s=10)
+            for direction, angle in DIRECTION_TO_ANGLE.items()
+        }
+
+    def __repr__(self)->str:
+        return f"frame renderer | output: {self.output_path}, stride: {self.stride}, frames: {self.num_frames}"
+
+    def render(self, ants_on_grid:list[a.Ant] | p.AntPopulation,
+               simulation_grid:g.Grid, step:int)->None:
+        """
+        Renders a frame of the grid and ants if step falls on the stride.
+
+        Args:
+            ants_on_grid: List of Ant objects on simulation_grid, or an
+              AntPopulation. Should contain only ants that are on the grid.
+            simulation_grid: Grid object representing lattice ants are being
+              simulated on.
+            step: Int representing the iteration number.
+
+        Returns:
+            None.
+
+        """
+        if step % self.stride != 0:
+            return
+
+        self._image.set_data(simulation_grid.grid)
+        xs, ys, directions = _ant_arrays(ants_on_grid)
+        groups = _group_by_direction(directions)
+        for direction, artist in self._ant_artists.items():
+            group = groups[direction]
+            artist.set_offsets(np.column_stack((xs[group], ys[group])))
+        self._ax.set_title(f"Simulated ant trail networks: figure"
+                           f" {self.figure}, Step {step}")
+        self._canvas.draw()
+
+        if self._gif:
+            self._write_gif_frame()
+        else:
+            self._canvas.print_png(os.path.join(
+                self.output_path, f"frame_{step:06d}.png"))
+        self.num_frames += 1
+
+    def close(self)->None:
+        """Finishes the output; ends the animated GIF if there is one."""
+        if self._gif_file is not None:
+            self._gif_file.write(b";") # GIF trailer
+            self._gif_file.close()
+            self._gif_file = None
+
+    def _write_gif_frame(self)->None:
+        """Appends the drawn canvas to the GIF file as a palette frame, 1 byte
+          per pixel, opening the file with the first frame. Frames are
+          matched to the first frame's 64 color palette, so no frames are
+          kept in memory."""
+        from PIL import GifImagePlugin, Image # pillow ships with matplotlib
+        rgba = np.asarray(self._canvas.buffer_rgba())
+        image = Image.fromarray(rgba[..., :3])
+        duration = int(1000 / self._fps)
+        if self._gif_file is None:
+            self._palette = image.quantize(colors=64)
+            self._gif_file = open(self.output_path, "wb")
+            header, _ = GifImagePlugin.getheader(
+                self._palette, info={"loop": 0, "duration": duration})
+            self._gif_file.writelines(header)
+        frame = image.quantize(palette=self._palette)
+        self._gif_file.writelines(GifImagePlugin.getdata(frame,
+                                                         duration=duration))
+        self._gif_file.flush()
+
+
 ######## Helper Functions ########
 def _plot_grid(grid:g.Grid, vmax:int)->None:
     """
@@ -87,25 +232,67 @@ def _plot_grid(grid:g.Grid, vmax:int)->None:
     mp.ylabel("Y Position (grid spaces)")
 
 
-def _plot_ants(ants_on_grid:list[a.Ant])->None:
+def _plot_ants(ants_on_grid:list[a.Ant] | p.AntPopulation)->None:
     """
     Function plot ants on grid.
     
     Args:
-        ants_on_grid: List of Ant objects on simulation_grid. Should contain
-          only ants that are on the grid.
+        ants_on_grid: List of Ant objects on simulation_grid, or an
+          AntPopulation. Should contain only ants that are on the grid.
     
     Returns:
         None
 
     """
-    # showing ant
-    for ant in ants_on_grid:
-        if not ant.is_on_grid():
-            continue
-        x, y = ant.get_location()
-        direction = ant.get_direction()
+    xs, ys, directions = _ant_arrays(ants_on_grid)
 
+    # showing ants, one scatter per heading since a scatter has one marker
+    #  shape
+    for direction, group in enumerate(_group_by_direction(directions)):
+        if len(group) == 0:
+            continue
         angle = DIRECTION_TO_ANGLE[direction]
 
-        mp.scatter(x, y, marker=(3, 0, angle), c="red", s=10)
+        mp.scatter(xs[group], ys[group], marker=(3, 0, angle), c="red", s=10)
+
+
+def _ant_arrays(ants_on_grid:list[a.Ant] | p.AntPopulation)->tuple[
+        np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Function gets positions and directions of the ants on the grid as arrays.
+
+    Args:
+        ants_on_grid: List of Ant objects on simulation_grid, or an
+          AntPopulation.
+
+    Returns:
+        xs, ys, directions: Numpy arrays of ant x-locations, y-locations and
+          directions.
+
+    """
+    if isinstance(ants_on_grid, p.AntPopulation):
+        xs, ys = ants_on_grid.get_locations()
+        return xs, ys, ants_on_grid.get_directions()
+
+    headings = [(*ant.get_location(), ant.get_direction())
+                for ant in ants_on_grid if ant.is_on_grid()]
+    xs, ys, directions = np.array(headings, dtype=np.int64).reshape(-1, 3).T
+    return xs, ys, directions
+
+
+def _group_by_direction(directions:np.ndarray)->list[np.ndarray]:
+    """
+    Function splits ants by heading with one sort instead of one pass per
+      heading.
+
+    Args:
+        directions: Numpy array of ant directions (0-7).
+
+    Returns:
+        groups: List of 8 Numpy arrays; groups[d] holds the indices of ants
+          with direction d.
+
+    """
+    order = np.argsort(directions, kind="stable")
+    bounds = np.cumsum(np.bincount(directions, minlength=8))[:-1]
+    return np.split(order, bounds)